@@ -0,0 +1,170 @@
+# ai/api_key_cache.py
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+def _key_digest(api_key: str) -> bytes:
+    """
+    캐시 키로 쓸 API 키의 HMAC-SHA256 값.
+    원본 키를 메모리에 보관하지 않고, 딕셔너리 조회가 키 문자열 비교(앞부분이 맞을수록 오래 걸림)에 의존하지 않도록 함
+    """
+    return hmac.new(settings.SECRET_KEY.encode(), api_key.encode(), hashlib.sha256).digest()
+
+
+class APIKeyCache:
+    """
+    API 키 -> SensorDevice(company 포함) 조회 결과를 짧게 보관하는 프로세스 내 캐시.
+    - 크기 제한(LRU)과 TTL: 다른 워커 프로세스에서 바뀐 내용도 ttl초 안에는 반영됨
+    - 없는 키(음성 결과)는 별도의 작은 LRU에 더 짧은 negative_ttl초 동안만 보관
+      (무작위 키를 계속 보내도 정상 디바이스 항목이 밀려나지 않음)
+    - 디바이스 저장/삭제가 커밋되면 시그널로 해당 디바이스의 항목을 바로 제거 (비활성화, 키 변경)
+    - 무효화할 때마다 세대(generation)를 올려서, 무효화 전에 DB에서 읽기 시작한(오래되었을 수 있는) 결과는 저장하지 않음
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0, negative_size: int = 256, negative_ttl: float = 5.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_size = negative_size
+        self.negative_ttl = negative_ttl
+        # digest -> (device, 만료 시각)
+        self._entries = OrderedDict()
+        # digest -> 만료 시각
+        self._missing = OrderedDict()
+        # device id -> digest (키가 바뀐 디바이스의 예전 항목을 찾기 위함)
+        self._digests_by_device = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, digest: bytes, now: float):
+        """ (캐시에서 찾았는지, 디바이스 또는 None, 현재 세대) """
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return True, entry[0], self._generation
+            expires_at = self._missing.get(digest)
+            if expires_at is not None and expires_at > now:
+                self.hits += 1
+                return True, None, self._generation
+            self.misses += 1
+            return False, None, self._generation
+
+    def _store(self, digest: bytes, device, now: float, generation: int):
+        with self._lock:
+            if generation != self._generation:
+                # 조회하는 동안 무효화됨: 읽은 값이 이미 오래되었을 수 있으므로 저장하지 않음
+                return
+            if device is None:
+                self._missing[digest] = now + self.negative_ttl
+                self._missing.move_to_end(digest)
+                while len(self._missing) > self.negative_size:
+                    self._missing.popitem(last=False)
+            else:
+                self._missing.pop(digest, None)
+                self._entries[digest] = (device, now + self.ttl)
+                self._entries.move_to_end(digest)
+                self._digests_by_device[device.pk] = digest
+                while len(self._entries) > self.max_size:
+                    _, (evicted, _) = self._entries.popitem(last=False)
+                    self._digests_by_device.pop(evicted.pk, None)
+
+    def get(self, api_key: str, loader):
+        """
+        API 키에 해당하는 활성 디바이스를 반환. 없으면 None.
+        캐시에 없거나 만료되었으면 loader(api_key)로 DB에서 조회해서 저장함
+        """
+        if self.ttl <= 0:
+            return loader(api_key)
+
+        digest = _key_digest(api_key)
+        now = time.monotonic()
+        found, device, generation = self._lookup(digest, now)
+        if not found:
+            device = loader(api_key)
+            self._store(digest, device, now, generation)
+        return device
+
+    async def aget(self, api_key: str, loader):
+        """ get()의 비동기 버전. loader는 코루틴 함수 """
+        if self.ttl <= 0:
+            return await loader(api_key)
+
+        digest = _key_digest(api_key)
+        now = time.monotonic()
+        found, device, generation = self._lookup(digest, now)
+        if not found:
+            device = await loader(api_key)
+            self._store(digest, device, now, generation)
+        return device
+
+    def invalidate_device(self, device):
+        """ 디바이스의 캐시 항목(예전 키 포함)과, 새 키에 대한 음성 결과를 제거 """
+        with self._lock:
+            self._generation += 1
+            digest = self._digests_by_device.pop(device.pk, None)
+            if digest is not None:
+                self._entries.pop(digest, None)
+            if device.api_key:
+                self._missing.pop(_key_digest(device.api_key), None)
+
+    def invalidate_company(self, company_id):
+        """ 회사 정보가 바뀌거나 삭제되면 그 회사 디바이스의 항목을 모두 제거 """
+        with self._lock:
+            self._generation += 1
+            for digest, (device, _) in list(self._entries.items()):
+                if device.company_id == company_id:
+                    del self._entries[digest]
+                    self._digests_by_device.pop(device.pk, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._missing.clear()
+            self._digests_by_device.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "negative_size": len(self._missing),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# 프로세스 전체에서 공유하는 API 키 캐시
+api_key_cache = APIKeyCache(
+    max_size=getattr(settings, "AI_API_KEY_CACHE_SIZE", 1024),
+    ttl=getattr(settings, "AI_API_KEY_CACHE_TTL", 60.0),
+    negative_ttl=getattr(settings, "AI_API_KEY_NEGATIVE_TTL", 5.0),
+)
+
+
+def get_active_device(api_key: str):
+    """ API 키로 활성 SensorDevice(company 포함)를 조회 (캐시 사용). 없으면 None """
+    from .models import SensorDevice
+
+    def load(key):
+        # select_related: SensorDevice를 찾을 건데, 연결된 company 정보도 바로 쓸 거니까, 한 번에 두 테이블을 합쳐서 달라고 하는 것과 같음
+        return SensorDevice.objects.select_related("company").filter(api_key=key, is_active=True).first()
+
+    return api_key_cache.get(api_key, load)
+
+
+async def aget_active_device(api_key: str):
+    """ get_active_device()의 비동기 버전 (비동기 뷰에서 사용) """
+    from .models import SensorDevice
+
+    async def load(key):
+        return await SensorDevice.objects.select_related("company").filter(api_key=key, is_active=True).afirst()
+
+    return await api_key_cache.aget(api_key, load)
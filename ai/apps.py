@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "ai"
+
+    def ready(self):
+        # 모델 시그널 등록
+        from . import signals  # noqa: F401
@@ -0,0 +1,239 @@
+# ai/evaluation_pool.py
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+
+class EvaluationQueueFull(Exception):
+    """ 점수 계산 대기열이 가득 찼을 때 발생 (뷰에서 429 + Retry-After로 응답) """
+
+
+class EvaluationPoolUnavailable(Exception):
+    """ 작업자 프로세스가 비정상 종료되어 잠시 점수 계산을 할 수 없을 때 발생 (뷰에서 503 + Retry-After로 응답) """
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"점수 계산 작업자를 사용할 수 없습니다. {retry_after:.0f}초 후 다시 시도해 주세요.")
+        self.retry_after = retry_after
+
+
+def _init_worker(database_names: dict, nice: int = 0):
+    """
+    점수 계산 프로세스(spawn) 초기화. Django를 설정하고, 부모 프로세스와 같은 DB(테스트 DB 등)를 보도록 DB 이름을 맞춤
+    AI_PREWARM_EVALUATORS가 켜져 있으면 첫 작업 전에 평가기를 미리 만듦
+    nice만큼 우선순위를 낮춰서, CPU가 모자랄 때 웹 프로세스(대시보드 요청)가 먼저 실행되도록 함
+    DJANGO_SETTINGS_MODULE 환경 변수는 부모 프로세스에서 물려받음
+    """
+    import django
+
+    if nice and hasattr(os, "nice"):
+        os.nice(nice)
+    django.setup()
+    for alias, name in database_names.items():
+        connections[alias].settings_dict["NAME"] = name
+
+    from .evaluator_cache import warm_up_evaluators
+
+    if getattr(settings, "AI_PREWARM_EVALUATORS", False):
+        warm_up_evaluators()
+
+
+def parse_in_worker(content_type: str, body: bytes):
+    """
+    점수 계산 프로세스에서 비동기 평가 요청 본문을 해석/검증 (JSON 해석과 프레임 수천 개 검증이 웹 프로세스의 GIL을 잡지 않도록)
+    반환 값: (검증된 데이터, None) 또는 (None, (오류 본문, 상태 코드))
+    """
+    from .views import parse_evaluation_body
+
+    return parse_evaluation_body(content_type, body)
+
+
+def score_in_worker(motion_type, raw_sensor_data, channels: list = None):
+    """
+    점수 계산 프로세스에서 실행되는 함수. 평가기 준비 -> 전처리 -> DTW -> 그래프 투영 -> 미리보기까지 계산
+    평가기는 프로세스마다 evaluator_cache에 보관되므로 같은 동작의 두 번째 요청부터는 DB를 읽지 않음
+    반환 값: (평가 결과, 그래프용 1차원 시계열, 투영 축 버전, 그래프 미리보기, [(단계, 초), ...])
+    """
+    from .evaluator_cache import get_evaluator
+    from .logic import _score_sensor_data, make_graph_preview
+
+    # 오래 쉬는 동안 끊어진 DB 연결은 정리 (요청 시작/종료 시그널이 없는 프로세스이므로 직접 호출)
+    close_old_connections()
+
+    spans = []
+    started = time.perf_counter()
+
+    def lap(stage: str):
+        nonlocal started
+        now = time.perf_counter()
+        spans.append((stage, now - started))
+        started = now
+
+    evaluator = get_evaluator(motion_type.motion_name, version=motion_type.data_revision)
+    lap("evaluator")
+
+    result, pca_result_data, projection_revision = _score_sensor_data(evaluator, motion_type, raw_sensor_data, channels, lap=lap)
+    preview = make_graph_preview(pca_result_data) if pca_result_data is not None else None
+    return result, pca_result_data, projection_revision, preview, spans
+
+
+class EvaluationSlot:
+    """
+    EvaluationPool.reserve()로 미리 잡은 대기열 자리. 자리를 돌려주기 전까지 run()으로 작업을 여러 번(한 번에 하나씩) 넘길 수 있고,
+    with 블록을 빠져나올 때 자리를 돌려줌. 실행 중인 작업이 있으면(요청이 취소된 경우 등) 그 작업이 끝날 때 돌려줌
+    """
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._held = True
+        self._future = None
+
+    def release(self):
+        if not self._held:
+            return
+        self._held = False
+        if self._future is not None and not self._future.done():
+            self._future.add_done_callback(lambda future: self._pool._release())
+        else:
+            self._pool._release()
+
+    async def run(self, func, *args):
+        """ 잡아 둔 자리로 func(*args)를 작업자에서 실행하고 결과를 기다림 """
+        if not self._held:
+            raise RuntimeError("이미 돌려준 대기열 자리입니다.")
+        executor, self._future = self._pool._submit(func, *args)
+        return await self._pool._wait(executor, self._future)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class EvaluationPool:
+    """
+    비동기 평가 뷰(AsyncEvaluationView)의 점수 계산(CPU 작업)을 요청 스레드/이벤트 루프 밖에서 실행하는 작업자 풀.
+    - 기본은 프로세스 풀(spawn): DTW/전처리가 GIL을 잡고 있어도 같은 프로세스의 대시보드 요청이 밀리지 않음
+    - 처리 중 + 대기 중인 작업이 max_pending개면 새 작업은 받지 않고 EvaluationQueueFull 발생 (backpressure)
+      거절 횟수는 자리를 확인하는 잠금 안에서 셈
+    - 작업자 프로세스가 비정상 종료되면(메모리 부족 등) EvaluationPoolUnavailable을 발생시키고,
+      연속으로 깨질수록 길어지는 대기 시간(최대 max_backoff초)이 지난 뒤에 풀을 새로 만듦
+      (작업자 초기화가 계속 실패할 때 요청마다 풀을 만들고 깨뜨리는 것을 반복하지 않음)
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 8, use_processes: bool = True, nice: int = 0,
+                 max_backoff: float = 60.0):
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.use_processes = use_processes
+        self.nice = max(0, nice)
+        self.max_backoff = max_backoff
+        self._executor = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.rejected = 0
+        self.broken = 0
+        # 연속으로 깨진 횟수와, 풀을 다시 만들 수 있는 시각 (time.monotonic 기준)
+        self._consecutive_broken = 0
+        self._unavailable_until = 0.0
+
+    def _get_executor(self):
+        with self._lock:
+            retry_after = self._unavailable_until - time.monotonic()
+            if retry_after > 0:
+                raise EvaluationPoolUnavailable(retry_after)
+            if self._executor is None:
+                if self.use_processes:
+                    database_names = {alias: connections[alias].settings_dict["NAME"] for alias in connections}
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker,
+                        initargs=(database_names, self.nice),
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ai-evaluation")
+            return self._executor
+
+    def _release(self):
+        with self._lock:
+            self.pending -= 1
+
+    def reserve(self) -> EvaluationSlot:
+        """ 대기열 자리 하나를 잡음. 가득 찼으면 거절 횟수를 세고 EvaluationQueueFull 발생 """
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise EvaluationQueueFull()
+            self.pending += 1
+        return EvaluationSlot(self)
+
+    async def run(self, func, *args):
+        """
+        func(*args)를 작업자 풀에서 실행하고 결과를 기다림. 대기열이 가득 차면 EvaluationQueueFull 발생
+        요청이 중간에 취소되어도 이미 시작된 작업이 끝날 때까지는 대기열 자리를 차지함
+        """
+        with self.reserve() as slot:
+            return await slot.run(func, *args)
+
+    def _submit(self, func, *args):
+        """ 작업자에 작업을 넘기고 (작업자 풀, future)를 반환 """
+        executor = self._get_executor()
+        try:
+            return executor, executor.submit(func, *args)
+        except BrokenProcessPool:
+            raise self._mark_broken(executor)
+
+    async def _wait(self, executor, future):
+        try:
+            result = await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            raise self._mark_broken(executor)
+        with self._lock:
+            self._consecutive_broken = 0
+        return result
+
+    def _mark_broken(self, executor) -> EvaluationPoolUnavailable:
+        """ 깨진 풀을 버리고, 다시 만들 때까지 기다릴 시간을 정해서 EvaluationPoolUnavailable로 반환 """
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self.broken += 1
+                self._consecutive_broken += 1
+                backoff = min(self.max_backoff, 2.0 ** (self._consecutive_broken - 1))
+                self._unavailable_until = time.monotonic() + backoff
+            retry_after = max(1.0, self._unavailable_until - time.monotonic())
+        executor.shutdown(wait=False, cancel_futures=True)
+        return EvaluationPoolUnavailable(retry_after)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self.pending,
+                "max_pending": self.max_pending,
+                "rejected": self.rejected,
+                "broken": self.broken,
+            }
+
+
+# 프로세스 전체에서 공유하는 점수 계산 풀 (첫 작업을 받을 때 작업자를 시작함)
+evaluation_pool = EvaluationPool(
+    workers=getattr(settings, "AI_ASYNC_EVAL_WORKERS", 2),
+    max_pending=getattr(settings, "AI_ASYNC_EVAL_MAX_PENDING", 8),
+    use_processes=getattr(settings, "AI_ASYNC_EVAL_PROCESSES", True),
+    nice=getattr(settings, "AI_ASYNC_EVAL_NICE", 10),
+)
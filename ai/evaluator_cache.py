@@ -1,36 +1,211 @@
 # ai/evaluator_cache.py
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
 from .safty_training_ai import MotionEvaluator
 
-# 동작 이름(motion_name)을 키로, MotionEvaluator 객체를 값으로 저장하는 캐시
-evaluator_cache = {}
+
+class EvaluatorCache:
+    """
+    동작 이름(motion_name)을 키로 MotionEvaluator 객체를 보관하는 캐시.
+    - 크기 제한(LRU): 가장 오래 사용되지 않은 평가기부터 제거
+    - TTL(선택): 생성된 지 ttl초가 지난 평가기는 다시 생성
+    - 버전: MotionType.data_revision이 바뀌면(모범 동작 추가/삭제) 저장된 평가기를 오래된 것으로 보고 다시 생성
+      data_revision은 DB에 있으므로 여러 워커 프로세스(gunicorn 등) 사이의 무효화 채널 역할도 함
+    - single-flight: 같은 동작에 대한 첫 요청이 동시에 들어와도 평가기는 한 번만 생성(DB 조회도 한 번)
+    """
+
+    def __init__(self, max_size: int = 32, ttl: float = None, factory=MotionEvaluator):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.factory = factory
+        # motion_name -> (평가기, 데이터 버전, 생성 시각)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # 동작별 생성 잠금과 그 잠금을 기다리는 스레드 수: motion_name -> (잠금, 스레드 수)
+        # (같은 동작의 평가기를 동시에 두 번 만들지 않기 위함. 기다리는 스레드가 없으면 지워서 동작 수만큼 쌓이지 않게 함)
+        self._build_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale = 0
+
+    def _get_fresh_entry(self, motion_name: str, version):
+        """ 잠금을 잡은 상태에서 호출. 최신 평가기가 있으면 반환하고, 오래되었으면 제거 후 None 반환 """
+        entry = self._entries.get(motion_name)
+        if entry is None:
+            return None
+
+        evaluator, entry_version, created_at = entry
+        expired = self.ttl is not None and time.monotonic() - created_at > self.ttl
+        if expired or (version is not None and entry_version != version):
+            del self._entries[motion_name]
+            self.stale += 1
+            return None
+
+        # 최근에 사용한 항목을 맨 뒤로 옮김 (LRU)
+        self._entries.move_to_end(motion_name)
+        return evaluator
+
+    def get(self, motion_name: str, version=None) -> MotionEvaluator:
+        """
+        캐시에서 평가기를 가져오거나, 없거나 오래되었으면 새로 생성하여 저장 후 반환.
+        version에는 현재 동작 데이터의 버전(MotionType.data_revision)을 넘김.
+        """
+        with self._lock:
+            evaluator = self._get_fresh_entry(motion_name, version)
+            if evaluator is not None:
+                self.hits += 1
+                return evaluator
+            build_lock, waiters = self._build_locks.get(motion_name, (None, 0))
+            if build_lock is None:
+                build_lock = threading.Lock()
+            self._build_locks[motion_name] = (build_lock, waiters + 1)
+
+        try:
+            return self._build(motion_name, version, build_lock)
+        finally:
+            with self._lock:
+                build_lock, waiters = self._build_locks[motion_name]
+                if waiters > 1:
+                    self._build_locks[motion_name] = (build_lock, waiters - 1)
+                else:
+                    del self._build_locks[motion_name]
+
+    def _build(self, motion_name: str, version, build_lock) -> MotionEvaluator:
+        """ 동작별 생성 잠금을 잡고 평가기를 만들어 저장. 기다리는 동안 다른 스레드가 만들었으면 그 평가기를 반환 """
+        with build_lock:
+            # 기다리는 동안 다른 스레드가 이미 만들었을 수 있으므로 다시 확인
+            with self._lock:
+                evaluator = self._get_fresh_entry(motion_name, version)
+                if evaluator is not None:
+                    self.hits += 1
+                    return evaluator
+                self.misses += 1
+
+            # 캐시에 없으면, 새로 생성 (이때 DB 조회 발생). 생성 중에는 전체 잠금을 잡지 않음
+            evaluator = self.factory(motion_name)
+
+            with self._lock:
+                self._entries[motion_name] = (evaluator, version, time.monotonic())
+                self._entries.move_to_end(motion_name)
+                while self.max_size and len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            return evaluator
+
+    def clear(self, motion_name: str = None):
+        """ 특정 동작 또는 전체 평가기를 캐시에서 제거 """
+        with self._lock:
+            if motion_name:
+                self._entries.pop(motion_name, None)
+            else:
+                self._entries.clear()
+
+    def stats(self) -> dict:
+        """ 캐시 상태와 적중/미스/제거 횟수 """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "stale": self.stale,
+            }
+
+
+# 프로세스 전체에서 공유하는 평가기 캐시
+evaluator_cache = EvaluatorCache(
+    max_size=getattr(settings, "AI_EVALUATOR_CACHE_SIZE", 32),
+    ttl=getattr(settings, "AI_EVALUATOR_CACHE_TTL", None),
+)
+
+
+def get_motion_data_version(motion_name: str):
+    """ DB에 저장된 동작 데이터 버전(MotionType.data_revision)을 조회. 동작이 없으면 None """
+    from .models import MotionType
+
+    return MotionType.objects.filter(motion_name=motion_name).values_list("data_revision", flat=True).first()
+
 
 # 타입힌트 문법: motion_name 인자는 문자열(str)이고, 반환 값은 MotionEvaluator 객체임을 명시!
-def get_evaluator(motion_name: str) -> MotionEvaluator:
+def get_evaluator(motion_name: str, version=None) -> MotionEvaluator:
     """
     캐시에서 평가기(Evaluator)를 가져오거나, 없으면 새로 생성하여 캐시에 저장 후 반환하는 함수.
+    version을 넘기지 않으면 DB에서 현재 데이터 버전을 조회해서 오래된 평가기인지 확인함.
     """
-    # 1. 캐시에 해당 동작의 평가기가 있는지 확인
-    if motion_name in evaluator_cache:
-        # print(f"'{motion_name}' 평가기를 캐시에서 로드합니다.") # 디버깅용
-        return evaluator_cache[motion_name]
-
-    # 2. 캐시에 없으면, 새로 생성 (이때 DB 조회 발생)
-    evaluator = MotionEvaluator(motion_name)
-    evaluator_cache[motion_name] = evaluator  # 캐시에 저장
-    return evaluator
+    if version is None:
+        version = get_motion_data_version(motion_name)
+    return evaluator_cache.get(motion_name, version)
 
 # 인자 값 필수X(= None)
 def clear_evaluator_cache(motion_name: str = None):
     """
     특정 동작 또는 전체 평가기 캐시를 비움
-    모범/0점 동작 데이터가 변경되었을 때 호출해야 함
+    DB의 MotionType.data_revision을 올리므로, 다른 워커 프로세스들도 다음 요청에서 버전 차이를 보고 평가기를 다시 만듬
     """
-    global evaluator_cache
+    from django.db.models import F
+    from .models import MotionType
+
+    motion_types = MotionType.objects.all()
+    if motion_name:
+        motion_types = motion_types.filter(motion_name=motion_name)
+    motion_types.update(data_revision=F("data_revision") + 1)
+
+    evaluator_cache.clear(motion_name)
 
     if motion_name:
-        if motion_name in evaluator_cache:
-            del evaluator_cache[motion_name]
-            print(f"'{motion_name}' 평가기 캐시가 삭제되었습니다.")
+        print(f"'{motion_name}' 평가기 캐시가 삭제되었습니다.")
     else:
-        evaluator_cache = {}
         print("전체 평가기 캐시가 삭제되었습니다.")
+
+
+def warm_up_evaluators(motion_names=None) -> dict:
+    """
+    동작들의 평가기를 미리 만들어 캐시에 넣음 (워커를 fork하기 전이나 작업자 프로세스 시작 시 호출)
+    motion_names를 넘기지 않으면 전체 동작 중 캐시 크기(max_size)만큼. 반환 값: {동작 이름: 생성 시간(초)}
+    """
+    from .models import MotionType
+
+    motion_types = MotionType.objects.order_by("motion_name")
+    if motion_names is not None:
+        motion_types = motion_types.filter(motion_name__in=motion_names)
+    if evaluator_cache.max_size:
+        motion_types = motion_types[:evaluator_cache.max_size]
+
+    elapsed = {}
+    for motion_name, revision in motion_types.values_list("motion_name", "data_revision"):
+        started = time.perf_counter()
+        evaluator_cache.get(motion_name, revision)
+        elapsed[motion_name] = time.perf_counter() - started
+    return elapsed
+
+
+def prefork_warm_up():
+    """
+    settings.AI_PREWARM_EVALUATORS가 켜져 있으면, 워커를 fork하기 전에(backend/wsgi.py, asgi.py에서 호출) 평가기를 미리 만듦
+    - gunicorn은 --preload로 실행해야 마스터 프로세스에서 한 번 실행되고 워커가 그대로 물려받음
+    - 실패해도(DB 연결 불가 등) 서버는 그대로 시작하고, 평가기는 첫 요청에서 만들어짐
+    """
+    if not getattr(settings, "AI_PREWARM_EVALUATORS", False):
+        return None
+
+    from django.db import connections
+
+    started = time.perf_counter()
+    try:
+        elapsed = warm_up_evaluators()
+    except Exception as e:
+        print(f"[Warning] 평가기 미리 만들기 실패 (첫 요청에서 생성): {e}")
+        return None
+    finally:
+        # fork된 워커들이 같은 DB 연결(소켓)을 나눠 쓰지 않도록 fork 전에 닫음
+        connections.close_all()
+
+    print(f"평가기 {len(elapsed)}개를 미리 만들었습니다 ({time.perf_counter() - started:.2f}초).")
+    return elapsed
@@ -0,0 +1,140 @@
+# ai/jobs.py
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import BackgroundJob, MotionType, MotionRecording
+
+# 진행률을 DB에 저장하는 최소 간격(초). 쌍마다 UPDATE를 날리지 않도록 제한
+PROGRESS_SAVE_INTERVAL = 0.5
+
+
+def enqueue_calibration_job(motion_type: MotionType, recording: MotionRecording = None) -> BackgroundJob:
+    """
+    max_dtw_distance 재계산 작업을 큐에 넣음.
+    AI_CALIBRATION_ASYNC가 False이면(기본, 워커가 없는 배포) 워커 없이 바로 처리함.
+    """
+    job = BackgroundJob.objects.create(
+        kind=BackgroundJob.Kind.CALIBRATE_MAX_DTW,
+        motion_type=motion_type,
+        recording=recording,
+    )
+    if not getattr(settings, "AI_CALIBRATION_ASYNC", False):
+        job.status = BackgroundJob.Status.RUNNING
+        job.started_at = job.heartbeat_at = timezone.now()
+        job.save(update_fields=["status", "started_at", "heartbeat_at"])
+        run_job(job)
+    return job
+
+
+def claim_next_job():
+    """
+    가장 오래된 대기 작업 하나를 '처리 중'으로 바꾸고 반환. 없으면 None.
+    skip_locked로 여러 워커가 동시에 돌아도 같은 작업을 두 번 가져가지 않음.
+    max_dtw_distance 증분 계산은 이전 결과에 의존하므로, 이미 처리 중인 작업이 있는 동작의 작업은 가져가지 않음.
+    다른 워커가 같은 동작의 작업을 방금 가져갔지만 아직 커밋하지 않았을 수 있으므로,
+    동작(MotionType) 행을 잠근 뒤 처리 중인 작업을 잠금 읽기로 다시 확인함 (잠금을 기다리는 동안 커밋된 상태까지 보임)
+    """
+    busy_motion_types = set()
+    while True:
+        running_motion_types = BackgroundJob.objects.filter(status=BackgroundJob.Status.RUNNING).values("motion_type")
+        with transaction.atomic():
+            job = (
+                BackgroundJob.objects.select_for_update(skip_locked=True)
+                .filter(status=BackgroundJob.Status.QUEUED)
+                .exclude(motion_type__in=running_motion_types)
+                .exclude(motion_type__in=busy_motion_types)
+                .order_by("created_at")
+                .first()
+            )
+            if job is None:
+                return None
+
+            list(MotionType.objects.select_for_update().filter(pk=job.motion_type_id).values_list("pk", flat=True))
+            running = BackgroundJob.objects.select_for_update().filter(
+                motion_type_id=job.motion_type_id, status=BackgroundJob.Status.RUNNING
+            )
+            if list(running.values_list("pk", flat=True)[:1]):
+                # 잠금을 기다리는 동안 다른 워커가 같은 동작의 작업을 시작함: 다른 동작의 작업을 찾음
+                busy_motion_types.add(job.motion_type_id)
+                continue
+
+            job.status = BackgroundJob.Status.RUNNING
+            job.started_at = job.heartbeat_at = timezone.now()
+            job.save(update_fields=["status", "started_at", "heartbeat_at"])
+        return job
+
+
+def requeue_stale_jobs(older_than_seconds: float) -> int:
+    """
+    워커가 죽어서 '처리 중'으로 남은 작업을 다시 대기 상태로 돌림. 돌린 작업 수 반환
+    시작 시각이 아니라 마지막 heartbeat(진행률 저장 시 갱신)를 기준으로 하므로, 오래 걸리지만 진행 중인 작업은 건드리지 않음
+    """
+    threshold = timezone.now() - timedelta(seconds=older_than_seconds)
+    return BackgroundJob.objects.filter(status=BackgroundJob.Status.RUNNING).filter(
+        Q(heartbeat_at__lt=threshold) | Q(heartbeat_at__isnull=True, started_at__lt=threshold)
+    ).update(status=BackgroundJob.Status.QUEUED, started_at=None, heartbeat_at=None, progress=0)
+
+
+def _run_calibration(job: BackgroundJob, progress) -> dict:
+    from .logic import update_max_dtw_for_motion, get_reference_graph_series
+
+    motion_type = job.motion_type
+    new_max_dtw = update_max_dtw_for_motion(motion_type, new_recording=job.recording, progress=progress)
+    # 모범 동작이 바뀌었으므로 대시보드 그래프용 시계열도 미리 다시 계산해 둠 (첫 조회 요청이 계산하지 않도록)
+    get_reference_graph_series(MotionType.objects.get(pk=motion_type.pk))
+    return {
+        "motionName": motion_type.motion_name,
+        "updated": new_max_dtw is not None,
+        "max_dtw_distance": float(motion_type.max_dtw_distance),
+    }
+
+
+# 작업 종류 -> 처리 함수
+JOB_HANDLERS = {
+    BackgroundJob.Kind.CALIBRATE_MAX_DTW: _run_calibration,
+}
+
+
+def run_job(job: BackgroundJob) -> BackgroundJob:
+    """
+    '처리 중' 상태의 작업을 실행하고 결과(완료/실패)를 저장
+    실행하는 동안 requeue_stale_jobs()가 작업을 다시 대기시켰으면(다른 워커가 다시 가져갔을 수 있음) 진행률/결과를 쓰지 않음
+    """
+    last_saved = 0.0
+    # 이 워커가 가져간 그 실행일 때만 갱신 (다시 대기시키면 started_at이 지워지고, 다시 가져가면 새 시각이 됨)
+    claimed = BackgroundJob.objects.filter(pk=job.pk, status=BackgroundJob.Status.RUNNING, started_at=job.started_at)
+
+    def progress(done: int, total: int):
+        nonlocal last_saved
+        now = time.monotonic()
+        if now - last_saved >= PROGRESS_SAVE_INTERVAL:
+            last_saved = now
+            # 진행률과 함께 heartbeat를 갱신해서 requeue_stale_jobs()가 살아 있는 작업을 다시 대기시키지 않도록 함
+            values = {"heartbeat_at": timezone.now()}
+            if total:
+                values["progress"] = round(done / total * 100, 1)
+            claimed.update(**values)
+
+    try:
+        job.result = JOB_HANDLERS[job.kind](job, progress)
+        job.status = BackgroundJob.Status.SUCCEEDED
+        job.progress = 100
+    except Exception as e:
+        print(f"[Error] 백그라운드 작업 실패 ({job.kind}, {job.pk}): {e}")
+        traceback.print_exc()
+        job.status = BackgroundJob.Status.FAILED
+        job.error = str(e)
+
+    job.finished_at = timezone.now()
+    saved = claimed.update(
+        result=job.result, status=job.status, progress=job.progress, error=job.error, finished_at=job.finished_at,
+    )
+    if not saved:
+        print(f"[Warning] 백그라운드 작업 결과를 버림 ({job.kind}, {job.pk}): 실행 중에 다시 대기 상태가 되었거나 다른 워커가 가져감")
+    return job
@@ -1,34 +1,156 @@
 # ai/logic.py
 
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
 from sklearn.decomposition import PCA
 from dtaidistance import dtw_ndim
 
-from .evaluator_cache import get_evaluator, clear_evaluator_cache
-from .models import MotionType, MotionRecording, UserRecording
+from .evaluator_cache import get_evaluator
+from .evaluation_pool import EvaluationPoolUnavailable, EvaluationQueueFull, evaluation_pool, score_in_worker
+from .metrics import record_span, span
+from .models import LatestUserRecording, MotionType, MotionRecording, UserRecording
 from organizations.models import Employee
 from enrollments.models import Enrollment
 from .serializers import UserRecordingSerializer
-from .safty_training_ai import preprocess_sensor_data
+from .safty_training_ai import dtw_thread_limits, dtw_upper_bound, fit_projection_axis, project_onto_axis, lttb_downsample, DTW_WINDOW
 
-def _run_pca_on_preprocessed_data(preprocessed_data_json: list):
-    """ 이미 전처리된 JSON 데이터를 받아 PCA를 적용하고 1차원 데이터를 반환하는 헬퍼 함수 """
-    if not preprocessed_data_json:
+def _run_pca_on_preprocessed_data(preprocessed_data_json):
+    """ 이미 전처리된 데이터(JSON 리스트 또는 numpy 배열)를 받아 PCA를 적용하고 1차원 데이터를 반환하는 헬퍼 함수 """
+    if preprocessed_data_json is None or len(preprocessed_data_json) == 0:
         return []
-    
-    import pandas as pd
-    df = pd.DataFrame(preprocessed_data_json)
-    
-    if df.empty:
+
+    data = np.asarray(preprocessed_data_json, dtype=np.float64)
+    if data.ndim != 2 or data.size == 0:
         return []
 
     pca = PCA(n_components=1)
-    principal_component = pca.fit_transform(df.values)
+    principal_component = pca.fit_transform(data)
     
     return principal_component.flatten().tolist()
 
-def get_evaluation_graph_data(enrollment_id: int) -> dict:
-    """ 특정 수강생의 최근 평가와 모범 동작을 그래프용 데이터로 가공하여 반환 """
+def get_motion_projection(motion_type: MotionType):
+    """
+    동작의 그래프용 투영 축 (평균 벡터, 축 벡터)을 반환. 모범 동작 데이터가 없으면 None
+    저장된 축이 현재 data_revision으로 계산된 것이 아니면(모범 동작 추가/삭제) 다시 계산해서 저장함
+    """
+    # 버전부터 확인해서, 다시 계산해야 할 때는 (미뤄 둔) 예전 축을 읽지 않음
+    if motion_type.projection_revision == motion_type.data_revision and motion_type.projection_axis is not None:
+        return np.asarray(motion_type.projection_mean), np.asarray(motion_type.projection_axis)
+
+    revision = motion_type.data_revision
+    references = MotionRecording.objects.filter(motion_type=motion_type, score_category="reference").defer("sensor_data_json")
+    projection = fit_projection_axis([recording.get_sensor_data_to_numpy() for recording in references])
+    if projection is None:
+        return None
+
+    mean, axis = projection
+    motion_type.projection_mean = mean.tolist()
+    motion_type.projection_axis = axis.tolist()
+    motion_type.projection_revision = revision
+    # 계산하는 동안 모범 동작이 바뀌었으면(data_revision 증가) 오래된 축을 저장하지 않음
+    MotionType.objects.filter(pk=motion_type.pk, data_revision=revision).update(
+        projection_mean=motion_type.projection_mean,
+        projection_axis=motion_type.projection_axis,
+        projection_revision=revision,
+    )
+    return projection
+
+def project_for_graph(motion_type: MotionType, preprocessed_data, get_projection=get_motion_projection) -> list:
+    """
+    전처리된 데이터를 동작의 투영 축에 내린 1차원 그래프 데이터. 축을 쓸 수 없으면(채널 수 불일치 등) 요청별 PCA로 대체
+    get_projection: 동작의 투영 축을 반환하는 함수 (배치 평가는 스레드에서 DB에 접근하지 않도록 미리 구한 축을 넘김)
+    """
+    return _project_with_revision(motion_type, preprocessed_data, get_projection)[0]
+
+def _project_with_revision(motion_type: MotionType, preprocessed_data, get_projection=get_motion_projection):
+    """ project_for_graph와 같고, 사용한 투영 축의 버전을 함께 반환. 반환 값: (1차원 리스트, 축 버전 또는 None(요청별 PCA)) """
+    if preprocessed_data is None or len(preprocessed_data) == 0:
+        return [], None
+
+    data = np.asarray(preprocessed_data, dtype=np.float64)
+    projection = get_projection(motion_type)
+    if projection is None or data.ndim != 2 or data.shape[1] != projection[1].shape[0]:
+        return _run_pca_on_preprocessed_data(data), None
+
+    mean, axis = projection
+    # get_projection이 축을 다시 계산했으면 motion_type.projection_revision도 새 버전으로 바뀌어 있음
+    return project_onto_axis(data, mean, axis).tolist(), motion_type.projection_revision
+
+def get_reference_graph_series(motion_type: MotionType):
+    """
+    대시보드 그래프용 모범 동작 1차원 시계열을 반환. 모범 동작이 없으면 None
+    MotionType에 저장된 시계열이 현재 data_revision으로 계산된 것이면 그대로 쓰고(DB 조회 없음),
+    아니면(모범 동작 추가/삭제) 가장 최근 모범 동작으로 한 번 다시 계산해서 저장함
+    """
+    # 버전부터 확인해서, 다시 계산해야 할 때는 (미뤄 둔) 예전 시계열을 읽지 않음
+    if motion_type.reference_graph_revision == motion_type.data_revision and motion_type.reference_graph_series is not None:
+        return motion_type.reference_graph_series
+
+    revision = motion_type.data_revision
+    reference_recording = (
+        MotionRecording.objects.filter(motion_type=motion_type, score_category="reference")
+        .defer("sensor_data_json")
+        .order_by("-recorded_at")
+        .first()
+    )
+    if reference_recording is None:
+        return None
+    series = project_for_graph(motion_type, reference_recording.get_sensor_data_to_numpy())
+    if not series:
+        return None
+
+    motion_type.reference_graph_series = series
+    motion_type.reference_graph_revision = revision
+    # 계산하는 동안 모범 동작이 바뀌었으면(data_revision 증가) 오래된 시계열을 저장하지 않음
+    MotionType.objects.filter(pk=motion_type.pk, data_revision=revision).update(
+        reference_graph_series=series,
+        reference_graph_revision=revision,
+    )
+    return series
+
+def make_graph_preview(series, points: int = None) -> dict:
+    """ 그래프 시계열을 LTTB로 줄인 미리보기 {"frames": 원래 길이, "index": [...], "values": [...]} """
+    if points is None:
+        points = getattr(settings, "AI_GRAPH_PREVIEW_POINTS", 500)
+    index, values = lttb_downsample(series, points)
+    return {"frames": len(series), "index": index.tolist(), "values": values.tolist()}
+
+def _downsample_graph_series(series, points: int = None):
+    """ 그래프 시계열을 points개 점으로 줄여서 (x 좌표 리스트, 값 리스트)로 반환. points가 None이면 (None, 원래 시계열) """
+    if points is None or not series:
+        return None, series
+    index, values = lttb_downsample(series, points)
+    return index.tolist(), values.tolist()
+
+def _user_graph_series(recording: UserRecording, points: int = None):
+    """
+    사용자 평가 기록의 그래프 시계열 (x 좌표 리스트 또는 None, 값 리스트)
+    points가 저장된 미리보기보다 작거나 같으면 전체 시계열(sensor_data_compressed)을 읽지 않고 미리보기를 줄여서 사용
+    """
+    preview = recording.graph_preview
+    if points is not None and preview and (points <= len(preview["values"]) or len(preview["values"]) == preview["frames"]):
+        index, values = lttb_downsample(preview["values"], points, preview["index"])
+        return index.tolist(), values.tolist()
+    return _downsample_graph_series(recording.sensor_data_json, points)
+
+def _projection_outdated(recording: UserRecording, reference_revision) -> bool:
+    """
+    사용자 시계열이 모범 동작 시계열과 다른 투영 축으로 만들어졌는지 여부
+    reference_revision: get_reference_graph_series()를 호출한 뒤의 motion_type.reference_graph_revision
+    (투영 축 버전이 없는 기록은 요청별 PCA 또는 예전 기록이므로 비교할 수 없는 것으로 봄)
+    """
+    return recording.projection_revision is None or recording.projection_revision != reference_revision
+
+def get_evaluation_graph_data(enrollment_id: int, points: int = None) -> dict:
+    """
+    특정 수강생의 최근 평가와 모범 동작을 그래프용 데이터로 가공하여 반환
+    points를 넘기면 두 시계열을 LTTB로 points개 점으로 줄이고, 각 점의 원래 프레임 번호(...GraphIndex)를 함께 반환
+    """
     try:
         enrollment = Enrollment.objects.select_related('employee', 'course__motion_type').get(id=enrollment_id)
     except Enrollment.DoesNotExist:
@@ -40,51 +162,161 @@ def get_evaluation_graph_data(enrollment_id: int) -> dict:
     if not motion_type:
         return {"error": "해당 교육 과정에 연결된 평가 동작이 없습니다."}
 
-    # 1. 사용자의 가장 최근 평가 기록 찾기
-    latest_user_recording = UserRecording.objects.filter(user=employee, motion_type=motion_type).order_by('-recorded_at').first()
-    if not latest_user_recording or not latest_user_recording.sensor_data_json:
+    # 1. 사용자의 가장 최근 평가 기록 찾기 (요약 테이블의 (user, motion_type) 유니크 인덱스 + 기록 PK로 찾음)
+    latest = LatestUserRecording.objects.select_related("recording").filter(user=employee, motion_type=motion_type)
+    if points is not None:
+        # 미리보기로 충분하면 전체 시계열은 읽지 않음 (필요하면 접근할 때 따로 조회됨)
+        latest = latest.defer("recording__sensor_data_compressed")
+    latest = latest.first()
+    latest_user_recording = latest.recording if latest else None
+    if not latest_user_recording:
         return {"error": "사용자의 평가 기록을 찾을 수 없습니다."}
 
-    # 2. 대표적인 모범 동작 기록 찾기
-    reference_recording = MotionRecording.objects.filter(motion_type=motion_type, score_category='reference').order_by('-recorded_at').first()
-    if not reference_recording or not reference_recording.sensor_data_json:
-        return {"error": "모범 동작 데이터를 찾을 수 없습니다."}
+    # 사용자 데이터는 이미 PCA 변환된 결과가 저장되어 있으므로 그대로(또는 줄여서) 사용
+    user_graph_index, user_graph_data = _user_graph_series(latest_user_recording, points)
+    if not user_graph_data:
+        return {"error": "사용자의 평가 기록을 찾을 수 없습니다."}
 
-    # 3. 데이터 가져오기 및 변환
-    # 사용자 데이터는 이미 PCA 변환된 결과가 저장되어 있으므로 그대로 사용
-    user_graph_data = latest_user_recording.sensor_data_json
-    # 모범 동작 데이터는 전처리된 2D 데이터이므로, PCA 변환을 수행
-    ref_graph_data = _run_pca_on_preprocessed_data(reference_recording.sensor_data_json)
+    # 2. 대표적인(가장 최근) 모범 동작의 그래프용 시계열 (MotionType에 저장된 값을 사용하고, 모범 동작이 바뀌었을 때만 다시 계산)
+    ref_graph_data = get_reference_graph_series(motion_type)
+    if not ref_graph_data:
+        return {"error": "모범 동작 데이터를 찾을 수 없습니다."}
+    ref_graph_index, ref_graph_data = _downsample_graph_series(ref_graph_data, points)
 
-    return {
+    graph_data = {
         "motionName": motion_type.motion_name,
         "userName": employee.name,
         "score": latest_user_recording.score,
         "userMotionGraphData": user_graph_data,
         "referenceMotionGraphData": ref_graph_data,
+        "projectionOutdated": _projection_outdated(latest_user_recording, motion_type.reference_graph_revision),
     }
+    if points is not None:
+        graph_data["userMotionGraphIndex"] = user_graph_index
+        graph_data["referenceMotionGraphIndex"] = ref_graph_index
+    return graph_data
 
 
-def run_evaluation(motion_name: str, employee: Employee, raw_sensor_data: list) -> dict:
-    """ 센서 데이터 리스트를 받아 평가하고, PCA결과를 저장하는 함수 """
+def get_evaluation_graph_data_batch(enrollments, points: int = None) -> dict:
+    """
+    여러 수강생(enrollments 쿼리셋)의 최근 평가를 한 번에 그래프용 데이터로 가공하여 반환
+    - 수강생별 가장 최근 UserRecording은 요약 테이블(LatestUserRecording) 서브쿼리 한 번으로 찾고, 기록 본문은 in_bulk 한 번으로 가져옴
+    - 모범 동작 시계열은 동작마다 한 번만 넣음 (referenceMotionGraphData: {동작 이름: 시계열})
+    - points를 넘기면 get_evaluation_graph_data와 같이 LTTB로 줄이고 ...GraphIndex를 함께 반환
+    """
+    latest_recording = LatestUserRecording.objects.filter(
+        user=OuterRef("employee"), motion_type=OuterRef("course__motion_type")
+    ).values("recording_id")[:1]
+    enrollments = list(
+        enrollments.select_related("employee", "course__motion_type")
+        .annotate(latest_recording_id=Subquery(latest_recording))
+        .order_by("employee__emp_no", "id")
+    )
+    # 미리보기로 충분하면 전체 시계열은 읽지 않음
+    user_recordings = UserRecording.objects.with_graph(series=points is None)
+    recordings = user_recordings.in_bulk(
+        [enrollment.latest_recording_id for enrollment in enrollments if enrollment.latest_recording_id]
+    )
+
+    # 동작 이름 -> (x 좌표 리스트 또는 None, 시계열 또는 None)
+    reference_series = {}
+    # 동작 이름 -> 모범 동작 시계열의 투영 축 버전 (수강생마다 motion_type 객체가 따로 있으므로 처음 계산한 객체의 값을 보관)
+    reference_revisions = {}
+    results = []
+    for enrollment in enrollments:
+        employee = enrollment.employee
+        motion_type = enrollment.course.motion_type
+        item = {"enrollmentId": enrollment.id, "empNo": employee.emp_no, "userName": employee.name}
+
+        recording = recordings.get(enrollment.latest_recording_id)
+        user_graph_index, user_graph_data = _user_graph_series(recording, points) if recording else (None, None)
+        if not motion_type:
+            item["error"] = "해당 교육 과정에 연결된 평가 동작이 없습니다."
+        elif not user_graph_data:
+            item["error"] = "사용자의 평가 기록을 찾을 수 없습니다."
+        else:
+            if motion_type.motion_name not in reference_series:
+                reference_series[motion_type.motion_name] = _downsample_graph_series(get_reference_graph_series(motion_type), points)
+                reference_revisions[motion_type.motion_name] = motion_type.reference_graph_revision
+            if not reference_series[motion_type.motion_name][1]:
+                item["error"] = "모범 동작 데이터를 찾을 수 없습니다."
+            else:
+                item.update({
+                    "motionName": motion_type.motion_name,
+                    "score": recording.score,
+                    "userMotionGraphData": user_graph_data,
+                    "projectionOutdated": _projection_outdated(recording, reference_revisions[motion_type.motion_name]),
+                })
+                if points is not None:
+                    item["userMotionGraphIndex"] = user_graph_index
+        results.append(item)
+
+    graph_data = {
+        "referenceMotionGraphData": {name: series for name, (_, series) in reference_series.items() if series},
+        "results": results,
+    }
+    if points is not None:
+        graph_data["referenceMotionGraphIndex"] = {name: index for name, (index, series) in reference_series.items() if series}
+    return graph_data
+
+
+def _score_sensor_data(evaluator, motion_type: MotionType, raw_sensor_data, channels: list = None, lap=None,
+                       get_projection=get_motion_projection):
+    """
+    전처리 -> DTW 평가 -> 그래프 투영까지 계산하는 함수 (배치 평가에서 여러 스레드가 동시에 호출함)
+    투영 축이 아직 없거나 오래되었으면 get_projection이 DB에서 다시 계산하므로,
+    여러 스레드에서 호출할 때는 미리 구한 축을 반환하는 get_projection을 넘겨서 DB에 접근하지 않도록 함
+    반환 값: (평가 결과, 그래프용 1차원 시계열, 시계열을 만든 투영 축 버전. 평가 결과에 error가 있으면 시계열과 버전은 None)
+    """
+    if lap is None:
+        lap = lambda stage: None
+
+    # 전처리는 한 번만 하고, 그 결과를 DTW 평가와 PCA에 같이 사용
+    preprocessed_data = evaluator.preprocess_user_data(raw_sensor_data, channels)
+    lap("preprocess")
+
+    result = evaluator.evaluate_preprocessed(preprocessed_data, motion_type.max_dtw_distance)
+    lap("dtw")
+    if "error" in result:
+        return result, None, None
+
+    # 전처리된 데이터를 동작의 투영 축(모범 동작으로 구한 PCA 제1주성분)에 투영하여 1차원 요약 데이터 생성
+    pca_result_data, projection_revision = _project_with_revision(motion_type, preprocessed_data, get_projection)
+    lap("pca")
+    return result, pca_result_data, projection_revision
+
+
+def run_evaluation(motion_name: str, employee: Employee, raw_sensor_data, channels: list = None) -> dict:
+    """
+    센서 데이터 리스트를 받아 평가하고, PCA결과를 저장하는 함수
+    raw_sensor_data가 (프레임 수, 채널 수) numpy 배열이면 channels에 채널 이름 목록을 함께 넘김
+    """
     try:
-        motion_type = MotionType.objects.get(motion_name=motion_name)
+        motion_type = MotionType.objects.with_graph(series=False).get(motion_name=motion_name)
     except MotionType.DoesNotExist:
         return {"error": f"'{motion_name}' 동작을 찾을 수 없습니다."}
 
+    timings = {}
+    started = time.perf_counter()
+
+    def lap(stage: str):
+        # 단계별 처리 시간을 응답용(timings_ms)과 지표(히스토그램, Server-Timing)에 함께 기록
+        nonlocal started
+        now = time.perf_counter()
+        record_span(stage, now - started)
+        timings[stage] = round((now - started) * 1000, 3)
+        started = now
+
     try:
-        evaluator = get_evaluator(motion_name)
-        result = evaluator.evaluator_user_motion(raw_sensor_data, motion_type.max_dtw_distance)
+        evaluator = get_evaluator(motion_name, version=motion_type.data_revision)
+        lap("evaluator")
+
+        result, pca_result_data, projection_revision = _score_sensor_data(evaluator, motion_type, raw_sensor_data, channels, lap=lap)
         
         if "error" in result:
             return result
 
         # PCA 결과 저장 로직
-        # 1. 평가에 사용된 데이터를 먼저 전처리
-        preprocessed_data = preprocess_sensor_data(raw_sensor_data)
-        
-        # 2. 전처리된 데이터에 PCA를 적용하여 1차원 요약 데이터 생성
-        pca_result_data = _run_pca_on_preprocessed_data(preprocessed_data.tolist())
 
         recording_data = {
             "user": employee.id,
@@ -95,10 +327,15 @@ def run_evaluation(motion_name: str, employee: Employee, raw_sensor_data: list)
         
         serializer = UserRecordingSerializer(data=recording_data)
         if serializer.is_valid():
-            serializer.save()
+            # 대시보드에서 전체 시계열을 읽지 않아도 되도록 줄인 미리보기를 함께 저장
+            serializer.save(graph_preview=make_graph_preview(pca_result_data), projection_revision=projection_revision)
         else:
             print(f"사용자 평가 기록 저장 실패: {serializer.errors}")
+        lap("save")
 
+        if getattr(settings, "AI_EVALUATION_TIMING", False):
+            timings["total"] = round(sum(timings.values()), 3)
+            result["timings_ms"] = timings
         return result
 
     except Exception as e:
@@ -106,32 +343,279 @@ def run_evaluation(motion_name: str, employee: Employee, raw_sensor_data: list)
         return {"error": f"평가 중 오류 발생: {str(e)}"}
 
 
-def update_max_dtw_for_motion(motion_type: MotionType):
-    """ 특정 MotionType에 대해 max_dtw_distance를 재계산하고 저장함. """
-    reference_recordings = MotionRecording.objects.filter(motion_type=motion_type, score_category="reference")
-    zero_score_recordings = MotionRecording.objects.filter(motion_type=motion_type, score_category="zero_score")
+async def run_evaluation_async(motion_name: str, employee: Employee, raw_sensor_data, channels: list = None, slot=None) -> dict:
+    """
+    run_evaluation의 비동기 버전 (AsyncEvaluationView에서 사용)
+    동작 조회와 결과 저장은 비동기 ORM으로 하고, 점수 계산(평가기/전처리/DTW/투영)은 evaluation_pool의 작업자에서 실행함
+    slot에 evaluation_pool.reserve()로 미리 잡은 자리를 넘기면 그 자리로 실행함
+    점수 계산 대기열이 가득 차면 EvaluationQueueFull, 작업자를 쓸 수 없으면 EvaluationPoolUnavailable이 그대로 올라감
+    """
+    try:
+        motion_type = await MotionType.objects.with_graph(series=False).aget(motion_name=motion_name)
+    except MotionType.DoesNotExist:
+        return {"error": f"'{motion_name}' 동작을 찾을 수 없습니다."}
+
+    timings = {}
+    started = time.perf_counter()
+    try:
+        run = slot.run if slot is not None else evaluation_pool.run
+        result, pca_result_data, projection_revision, graph_preview, worker_spans = await run(
+            score_in_worker, motion_type, raw_sensor_data, channels
+        )
+    except (EvaluationQueueFull, EvaluationPoolUnavailable):
+        raise
+    except Exception as e:
+        print(f"[Error] Evaluation failed for {motion_name}: {e}")
+        return {"error": f"평가 중 오류 발생: {str(e)}"}
+
+    # 작업자에서 잰 단계별 시간을 이 프로세스의 지표에 기록하고, 나머지(대기열 + 프로세스 간 전송)는 queue 단계로 기록
+    elapsed = time.perf_counter() - started
+    for stage, seconds in worker_spans:
+        record_span(stage, seconds)
+        timings[stage] = round(seconds * 1000, 3)
+    queued = max(0.0, elapsed - sum(seconds for _, seconds in worker_spans))
+    record_span("queue", queued)
+    timings["queue"] = round(queued * 1000, 3)
+
+    if "error" in result:
+        return result
+
+    started = time.perf_counter()
+    try:
+        await UserRecording.objects.acreate(
+            user=employee,
+            motion_type=motion_type,
+            score=result.get("score"),
+            sensor_data_json=pca_result_data,  # 원본 대신 PCA 결과를 저장
+            graph_preview=graph_preview,
+            projection_revision=projection_revision,
+        )
+    except Exception as e:
+        print(f"사용자 평가 기록 저장 실패: {e}")
+    seconds = time.perf_counter() - started
+    record_span("save", seconds)
+    timings["save"] = round(seconds * 1000, 3)
+
+    if getattr(settings, "AI_EVALUATION_TIMING", False):
+        timings["total"] = round(sum(timings.values()), 3)
+        result["timings_ms"] = timings
+    return result
+
+
+def run_evaluation_batch(company, items: list) -> list:
+    """
+    여러 평가 요청({motionName, empNo, sensorData, channels})을 한 번에 평가하고 항목별 결과 목록을 같은 순서로 반환
+    - 직원/동작은 각각 쿼리 한 번으로 조회하고, 평가기는 동작마다 한 번만 가져옴
+    - 점수 계산(전처리/DTW/투영)은 AI_BATCH_WORKERS개 스레드로 병렬 처리
+    - UserRecording은 bulk_create 한 번으로 저장 (시그널이 없으므로 최근 기록 요약 테이블은 직접 갱신)
+    """
+    results = [None] * len(items)
+    employees = {
+        employee.emp_no: employee
+        for employee in Employee.objects.filter(company=company, emp_no__in={item["empNo"] for item in items})
+    }
+    motion_types = MotionType.objects.with_graph(series=False).filter(motion_name__in={item["motionName"] for item in items}).in_bulk(field_name="motion_name")
+
+    # 동작별로 묶어서 평가기와 투영 축을 한 번씩만 준비 (스레드 안에서는 DB에 접근하지 않도록 미리 준비)
+    evaluators = {}
+    projections = {}
+    tasks = []
+    for index, item in enumerate(items):
+        motion_name, emp_no = item["motionName"], item["empNo"]
+        motion_type = motion_types.get(motion_name)
+        if motion_type is None:
+            results[index] = {"error": f"'{motion_name}' 동작을 찾을 수 없습니다."}
+            continue
+        if emp_no not in employees:
+            results[index] = {"error": f"회사({company.name})에 해당 사원번호({emp_no})가 존재하지 않습니다."}
+            continue
+        if motion_name not in evaluators:
+            try:
+                evaluators[motion_name] = get_evaluator(motion_name, version=motion_type.data_revision)
+                projections[motion_name] = get_motion_projection(motion_type)
+            except Exception as e:
+                print(f"[Error] Evaluation failed for {motion_name}: {e}")
+                evaluators[motion_name] = None
+        if evaluators[motion_name] is None:
+            results[index] = {"error": f"'{motion_name}' 평가기를 준비할 수 없습니다."}
+            continue
+        tasks.append((index, motion_type, item))
+
+    def prepared_projection(motion_type):
+        return projections[motion_type.motion_name]
+
+    def score(task):
+        index, motion_type, item = task
+        try:
+            return index, _score_sensor_data(
+                evaluators[motion_type.motion_name], motion_type, item["sensorData"], item.get("channels"),
+                get_projection=prepared_projection,
+            )
+        except Exception as e:
+            print(f"[Error] Evaluation failed for {motion_type.motion_name}: {e}")
+            return index, ({"error": f"평가 중 오류 발생: {str(e)}"}, None, None)
+
+    workers = max(1, getattr(settings, "AI_BATCH_WORKERS", 4))
+    # OpenMP 스레드 수 제한은 프로세스 전체 설정이므로 스레드 풀 밖에서 한 번만 걸어 둠
+    with span("batch_score"), dtw_thread_limits(getattr(settings, "AI_DTW_WORKERS", 1)):
+        if workers == 1 or len(tasks) <= 1:
+            scored = [score(task) for task in tasks]
+        else:
+            with ThreadPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+                scored = list(executor.map(score, tasks))
+
+    recordings = []
+    for (index, motion_type, item), (_, (result, pca_result_data, projection_revision)) in zip(tasks, scored):
+        results[index] = result
+        if "error" not in result:
+            recordings.append(UserRecording(
+                user=employees[item["empNo"]],
+                motion_type=motion_type,
+                score=result.get("score"),
+                sensor_data_json=pca_result_data,
+                graph_preview=make_graph_preview(pca_result_data),
+                projection_revision=projection_revision,
+            ))
+    with span("save"):
+        UserRecording.objects.bulk_create(recordings, batch_size=500)
+        LatestUserRecording.record(recordings)
 
-    if not reference_recordings.exists() or not zero_score_recordings.exists():
-        print(f"'{motion_type.motion_name}'의 max_dtw_distance 계산을 위한 데이터 부족")
-        return
+    return results
 
-    ref_motions = [rec.get_sensor_data_numpy() for rec in reference_recordings]
-    zero_motions = [rec.get_sensor_data_numpy() for rec in zero_score_recordings]
 
-    max_distances = []
+def _max_pairwise_dtw(ref_motions: list, zero_motions: list, initial_max: float = None, progress=None):
+    """
+    모범 동작 x 0점 동작 모든 쌍의 dtw 거리를 계산해서 최대값을 반환함. (쌍이 없으면 initial_max 그대로 반환)
+    progress가 주어지면 쌍 하나를 계산할 때마다 progress(계산한 쌍 수, 전체 쌍 수)를 호출함.
+    반환 값: (최대 거리 또는 None, {"pairs": 비교 대상 쌍 수, "ub_pruned": 0})
+    """
+    max_distance = initial_max
+    pairs = 0
+    total = len(ref_motions) * len(zero_motions)
     for ref_motion in ref_motions:
         for zero_motion in zero_motions:
             if ref_motion.size == 0 or zero_motion.size == 0:
                 continue
+            pairs += 1
+            if progress is not None:
+                progress(pairs, total)
             try:
-                distance = dtw_ndim.distance(ref_motion, zero_motion, window=10)
-                max_distances.append(distance)
+                distance = dtw_ndim.distance(ref_motion, zero_motion, window=DTW_WINDOW, use_c=True)
             except Exception as e:
                 print(f"DTW 거리 계산 중 오류 발생: {e}")
+                continue
+            if max_distance is None or distance > max_distance:
+                max_distance = distance
+
+    return max_distance, {"pairs": pairs, "ub_pruned": 0}
+
+
+def _max_pairwise_dtw_pruned(ref_motions: list, zero_motions: list, initial_max: float = None, progress=None):
+    """
+    모범 동작 x 0점 동작 쌍들의 최대 dtw 거리를 상한(upper bound) 가지치기로 계산함.
+    상한이 큰 쌍부터 실제 dtw를 계산하고, 상한이 현재 최대값(처음에는 initial_max) 이하인 쌍은 최대값을 바꿀 수 없으므로 건너뜀.
+    반환 값: (최대 거리 또는 None, {"pairs": 비교 대상 쌍 수, "ub_pruned": 건너뛴 쌍 수})
+    """
+    candidates = []
+    for ref_motion in ref_motions:
+        for zero_motion in zero_motions:
+            if ref_motion.size == 0 or zero_motion.size == 0:
+                continue
+            try:
+                candidates.append((dtw_upper_bound(ref_motion, zero_motion), ref_motion, zero_motion))
+            except Exception as e:
+                print(f"DTW 상한 계산 중 오류 발생: {e}")
+
+    candidates.sort(key=lambda candidate: candidate[0], reverse=True)
 
-    if max_distances:
-        new_max_dtw = max(max_distances) * 1.1
+    max_distance = initial_max
+    computed = 0
+    for upper_bound, ref_motion, zero_motion in candidates:
+        if max_distance is not None and upper_bound <= max_distance:
+            break
+        computed += 1
+        if progress is not None:
+            progress(computed, len(candidates))
+        try:
+            distance = dtw_ndim.distance(ref_motion, zero_motion, window=DTW_WINDOW, use_c=True)
+        except Exception as e:
+            print(f"DTW 거리 계산 중 오류 발생: {e}")
+            continue
+        if max_distance is None or distance > max_distance:
+            max_distance = distance
+
+    return max_distance, {"pairs": len(candidates), "ub_pruned": len(candidates) - computed}
+
+
+def update_max_dtw_for_motion(motion_type: MotionType, new_recording: MotionRecording = None, progress=None):
+    """
+    특정 MotionType에 대해 max_dtw_distance를 재계산하고 저장함.
+    new_recording을 넘기고 이전에 계산한 쌍별 최대 거리(max_pair_dtw_distance)가 있으면,
+    새 기록과 반대 범주(모범 <-> 0점) 기록 사이의 쌍만 계산해서 최대값을 갱신함.
+    그 외(처음 계산, 기록 삭제 후)에는 모든 쌍을 다시 계산함.
+    새로 저장한 max_dtw_distance를 반환하고, 계산할 수 없으면 None을 반환함.
+    """
+    motion_type.refresh_from_db(fields=["max_pair_dtw_distance", "data_revision"])
+    read_revision = motion_type.data_revision
+    pairwise_max = _max_pairwise_dtw_pruned if getattr(settings, "AI_DTW_PRUNING", False) else _max_pairwise_dtw
+    recordings = MotionRecording.objects.filter(motion_type=motion_type).defer("sensor_data_json")
+
+    if new_recording is not None and motion_type.max_pair_dtw_distance is not None:
+        # 증분 계산: 새 기록 1개 x 반대 범주 기록들
+        new_motion = [new_recording.get_sensor_data_to_numpy()]
+        if new_recording.score_category == "reference":
+            zero_score_recordings = recordings.filter(score_category="zero_score").exclude(pk=new_recording.pk)
+            ref_motions = new_motion
+            zero_motions = [rec.get_sensor_data_to_numpy() for rec in zero_score_recordings]
+        else:
+            reference_recordings = recordings.filter(score_category="reference").exclude(pk=new_recording.pk)
+            ref_motions = [rec.get_sensor_data_to_numpy() for rec in reference_recordings]
+            zero_motions = new_motion
+        max_distance, stats = pairwise_max(ref_motions, zero_motions, initial_max=motion_type.max_pair_dtw_distance, progress=progress)
+    else:
+        # 전체 계산: 모든 모범 동작 x 모든 0점 동작
+        reference_recordings = recordings.filter(score_category="reference")
+        zero_score_recordings = recordings.filter(score_category="zero_score")
+
+        if not reference_recordings.exists() or not zero_score_recordings.exists():
+            print(f"'{motion_type.motion_name}'의 max_dtw_distance 계산을 위한 데이터 부족")
+            return None
+
+        ref_motions = [rec.get_sensor_data_to_numpy() for rec in reference_recordings]
+        zero_motions = [rec.get_sensor_data_to_numpy() for rec in zero_score_recordings]
+        max_distance, stats = pairwise_max(ref_motions, zero_motions, progress=progress)
+
+    print(f"'{motion_type.motion_name}' max_dtw_distance 계산: {stats['pairs']}쌍 비교, {stats['ub_pruned']}쌍 생략")
+
+    if max_distance is not None:
+        # 계산하는 동안 다른 워커/요청이 값을 바꿨을 수 있으므로, 행을 잠근 뒤 현재 값과 합쳐서 저장 (잃어버린 갱신 방지)
+        with transaction.atomic():
+            current = (
+                MotionType.objects.select_for_update()
+                .filter(pk=motion_type.pk)
+                .values("max_pair_dtw_distance", "data_revision")
+                .first()
+            )
+            if current is None:
+                return None
+            current_max = current["max_pair_dtw_distance"]
+            if new_recording is not None and current_max is None:
+                # 증분 계산 중에 기록이 삭제되어 초기화됨: 삭제된 기록이 포함된 기준값이므로 버리고, 삭제 시 등록된 전체 재계산에 맡김
+                print(f"'{motion_type.motion_name}' 계산 중 기록이 삭제되어 증분 결과를 버림")
+                return None
+            if current_max is not None and (new_recording is not None or current["data_revision"] != read_revision):
+                # 그사이 다른 증분 계산이 더 큰 값을 저장했을 수 있음
+                max_distance = max(max_distance, current_max)
+            new_max_dtw = max_distance * 1.1
+            # data_revision은 시그널이 F()로 올리므로, 메모리의 오래된 값으로 덮어쓰지 않도록 필요한 필드만 저장
+            MotionType.objects.filter(pk=motion_type.pk).update(
+                max_dtw_distance=new_max_dtw, max_pair_dtw_distance=max_distance
+            )
+        motion_type.max_pair_dtw_distance = max_distance
         motion_type.max_dtw_distance = new_max_dtw
-        motion_type.save()
         print(f"'{motion_type.motion_name}'의 max_dtw_distance 업데이트: {new_max_dtw}")
-        clear_evaluator_cache(motion_type.motion_name)
+        # 평가기 캐시는 MotionRecording 저장 시그널이 올린 data_revision으로 모든 워커에서 무효화되고,
+        # max_dtw_distance는 평가할 때마다 DB에서 읽으므로 여기서 캐시를 따로 비울 필요 없음
+        return new_max_dtw
+
+    return None
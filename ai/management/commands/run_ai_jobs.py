@@ -0,0 +1,51 @@
+# ai/management/commands/run_ai_jobs.py
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ai.jobs import claim_next_job, requeue_stale_jobs, run_job
+from ai.streaming import expire_stale_sessions
+
+# 버려진 스트리밍 세션을 정리하는 간격(초)
+SESSION_SWEEP_INTERVAL = 60.0
+
+
+class Command(BaseCommand):
+    help = (
+        "DB 작업 큐(BackgroundJob)에 쌓인 작업(max_dtw_distance 재계산 등)을 처리하는 워커를 실행합니다. "
+        "주기적으로 AI_STREAM_SESSION_TTL 동안 청크가 없는 스트리밍 세션도 정리합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="대기 중인 작업을 모두 처리하면 종료")
+        parser.add_argument("--sleep", type=float, default=1.0, help="대기 작업이 없을 때 다시 확인하기까지 기다릴 시간(초)")
+        parser.add_argument("--stale-after", type=float, default=600.0, help="이 시간(초) 이상 heartbeat가 갱신되지 않은 '처리 중' 작업은 워커가 죽은 것으로 보고 다시 대기시킴")
+
+    def handle(self, *args, **options):
+        self.stdout.write("AI 작업 워커 시작")
+        requeue_stale_jobs(options["stale_after"])
+        last_swept = None
+        while True:
+            # 오래 실행되는 워커에서 끊어진 DB 연결을 정리
+            close_old_connections()
+            if last_swept is None or time.monotonic() - last_swept >= SESSION_SWEEP_INTERVAL:
+                last_swept = time.monotonic()
+                expired = expire_stale_sessions(getattr(settings, "AI_STREAM_SESSION_TTL", 3600.0))
+                if expired:
+                    self.stdout.write(f"오래된 스트리밍 세션 {expired}개를 삭제함")
+            job = claim_next_job()
+            if job is None:
+                if options["once"]:
+                    break
+                requeued = requeue_stale_jobs(options["stale_after"])
+                if requeued:
+                    self.stdout.write(f"오래된 작업 {requeued}개를 다시 대기시킴")
+                    continue
+                time.sleep(options["sleep"])
+                continue
+
+            job = run_job(job)
+            self.stdout.write(f"[{job.status}] {job.kind} {job.pk} {job.result or job.error}")
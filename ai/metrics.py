@@ -0,0 +1,153 @@
+# ai/metrics.py
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# 히스토그램 구간 경계(초). Prometheus 기본 구간보다 작은 쪽(ms 이하)을 촘촘하게 둠
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    단계(stage)별 처리 시간 분포를 프로세스 메모리에 누적하는 히스토그램.
+    값 하나를 기록할 때 잠금 + 이진 탐색만 하므로 수 마이크로초 안에 끝남.
+    (gunicorn 등 여러 워커 프로세스를 쓰면 프로세스마다 따로 집계됨)
+    """
+
+    def __init__(self, name: str, help_text: str, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # stage -> [구간별 개수(마지막은 +Inf), 합계, 개수]
+        self._series = {}
+
+    def observe(self, stage: str, seconds: float):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(stage)
+            if series is None:
+                series = self._series[stage] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> list:
+        """ Prometheus 텍스트 형식의 줄 목록 (구간 값은 누적 개수) """
+        with self._lock:
+            snapshot = {stage: (list(counts), total, count) for stage, (counts, total, count) in self._series.items()}
+
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for stage in sorted(snapshot):
+            counts, total, count = snapshot[stage]
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{stage="{stage}"}} {total}')
+            lines.append(f'{self.name}_count{{stage="{stage}"}} {count}')
+        return lines
+
+
+# 평가 요청의 단계별 처리 시간 (auth, validate, evaluator, preprocess, dtw, pca, save, total)
+evaluation_stage_seconds = Histogram("ai_evaluation_stage_seconds", "Evaluation request latency by stage in seconds.")
+
+# 현재 요청에서 기록된 단계 목록 [(stage, 초), ...]. collect_spans() 안에서만 설정됨
+_current_spans = ContextVar("ai_current_spans", default=None)
+
+
+def record_span(stage: str, seconds: float):
+    """ 이미 잰 처리 시간을 히스토그램과 현재 요청의 단계 목록에 기록 """
+    evaluation_stage_seconds.observe(stage, seconds)
+    spans = _current_spans.get()
+    if spans is not None:
+        spans.append((stage, seconds))
+
+
+@contextmanager
+def span(stage: str):
+    """ with 블록의 처리 시간(monotonic clock)을 stage 이름으로 기록 """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(stage, time.perf_counter() - started)
+
+
+@contextmanager
+def collect_spans():
+    """ with 블록 안(한 요청)에서 기록된 단계 목록을 모음 """
+    spans = []
+    token = _current_spans.set(spans)
+    try:
+        yield spans
+    finally:
+        _current_spans.reset(token)
+
+
+def server_timing_header(spans) -> str:
+    """ 단계 목록을 Server-Timing 헤더 값으로 변환 (dur는 ms). 같은 단계가 여러 번이면 합침 """
+    durations = {}
+    for stage, seconds in spans:
+        durations[stage] = durations.get(stage, 0.0) + seconds
+    return ", ".join(f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in durations.items())
+
+
+class StageTimingMixin:
+    """
+    APIView에 섞어 쓰는 믹스인. 요청 전체(권한 확인 포함)를 'total' 단계로 기록하고,
+    settings.AI_SERVER_TIMING이 켜져 있으면 단계별 처리 시간을 Server-Timing 응답 헤더로 내려줌
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with collect_spans() as spans:
+            with span("total"):
+                response = super().dispatch(request, *args, **kwargs)
+        if getattr(settings, "AI_SERVER_TIMING", False):
+            response["Server-Timing"] = server_timing_header(spans)
+        return response
+
+
+class AsyncStageTimingMixin:
+    """ StageTimingMixin의 비동기 뷰(django View, async def 핸들러)용 버전 """
+
+    async def dispatch(self, request, *args, **kwargs):
+        with collect_spans() as spans:
+            with span("total"):
+                response = await super().dispatch(request, *args, **kwargs)
+        if getattr(settings, "AI_SERVER_TIMING", False):
+            response["Server-Timing"] = server_timing_header(spans)
+        return response
+
+
+def render_metrics() -> str:
+    """ /api/ai/metrics/ 응답 본문 (Prometheus 텍스트 형식) """
+    from .api_key_cache import api_key_cache
+    from .evaluation_pool import evaluation_pool
+    from .evaluator_cache import evaluator_cache
+
+    lines = evaluation_stage_seconds.render()
+    cache_stats = evaluator_cache.stats()
+    for key in ("hits", "misses", "evictions", "stale"):
+        name = f"ai_evaluator_cache_{key}_total"
+        lines += [f"# TYPE {name} counter", f"{name} {cache_stats[key]}"]
+    lines += ["# TYPE ai_evaluator_cache_size gauge", f"ai_evaluator_cache_size {cache_stats['size']}"]
+
+    key_cache_stats = api_key_cache.stats()
+    for key in ("hits", "misses"):
+        name = f"ai_api_key_cache_{key}_total"
+        lines += [f"# TYPE {name} counter", f"{name} {key_cache_stats[key]}"]
+
+    pool_stats = evaluation_pool.stats()
+    lines += ["# TYPE ai_async_evaluation_pending gauge", f"ai_async_evaluation_pending {pool_stats['pending']}"]
+    lines += ["# TYPE ai_async_evaluation_rejected_total counter", f"ai_async_evaluation_rejected_total {pool_stats['rejected']}"]
+    lines += ["# TYPE ai_async_evaluation_broken_total counter", f"ai_async_evaluation_broken_total {pool_stats['broken']}"]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:52
+
+import io
+
+from django.db import migrations, models
+
+
+def backfill_sensor_data_npy(apps, schema_editor):
+    """ 기존 MotionRecording의 sensor_data_json으로부터 .npy 바이너리 캐시를 채움 """
+    import numpy as np
+
+    MotionRecording = apps.get_model("ai", "MotionRecording")
+    recordings = MotionRecording.objects.filter(sensor_data_npy__isnull=True).only("id", "sensor_data_json")
+    for recording in recordings.iterator(chunk_size=100):
+        if not recording.sensor_data_json:
+            continue
+        try:
+            array = np.array(recording.sensor_data_json, dtype=np.float64)
+        except (TypeError, ValueError):
+            # 프레임마다 길이가 다른 등 2차원 숫자 배열로 만들 수 없는 데이터는 캐시 없이 JSON을 그대로 사용
+            continue
+        buffer = io.BytesIO()
+        np.save(buffer, np.ascontiguousarray(array), allow_pickle=False)
+        MotionRecording.objects.filter(pk=recording.pk).update(sensor_data_npy=buffer.getvalue())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai", "0003_remove_userrecording_sensor_data_json_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="motionrecording",
+            name="sensor_data_npy",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="userrecording",
+            name="sensor_data_json",
+            field=models.JSONField(null=True),
+        ),
+        migrations.RunPython(backfill_sensor_data_npy, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai", "0004_motionrecording_sensor_data_npy_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="motiontype",
+            name="data_revision",
+            field=models.PositiveIntegerField(default=0, editable=False, help_text="동작 데이터 변경 버전"),
+        ),
+    ]
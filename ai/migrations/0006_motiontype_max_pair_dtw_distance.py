@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai", "0005_motiontype_data_revision"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="motiontype",
+            name="max_pair_dtw_distance",
+            field=models.FloatField(blank=True, editable=False, help_text="모범/0점 동작 쌍의 최대 DTW 거리", null=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:56
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai", "0006_motiontype_max_pair_dtw_distance"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BackgroundJob",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("kind", models.CharField(choices=[("calibrate_max_dtw", "max_dtw_distance 재계산")], max_length=40)),
+                ("status", models.CharField(choices=[("queued", "대기"), ("running", "처리 중"), ("succeeded", "완료"), ("failed", "실패")], db_index=True, default="queued", max_length=12)),
+                ("progress", models.FloatField(default=0)),
+                ("result", models.JSONField(blank=True, null=True)),
+                ("error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("motion_type", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="jobs", to="ai.motiontype")),
+                ("recording", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="+", to="ai.motionrecording")),
+            ],
+            options={
+                "ordering": ["created_at"],
+                "indexes": [models.Index(fields=["status", "created_at"], name="ai_backgrou_status_3078b1_idx")],
+            },
+        ),
+    ]
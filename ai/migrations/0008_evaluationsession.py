@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:58
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai", "0007_backgroundjob"),
+        ("organizations", "0004_alter_employee_emp_no_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EvaluationSession",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("channels", models.JSONField()),
+                ("frame_count", models.PositiveIntegerField(default=0)),
+                ("chunk_count", models.PositiveIntegerField(default=0)),
+                ("status", models.CharField(choices=[("open", "수신 중"), ("finalized", "평가 완료")], default="open", max_length=12)),
+                ("result", models.JSONField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("finalized_at", models.DateTimeField(blank=True, null=True)),
+                ("company", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="evaluation_sessions", to="organizations.company")),
+                ("employee", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="evaluation_sessions", to="organizations.employee")),
+                ("motion_type", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="evaluation_sessions", to="ai.motiontype")),
+            ],
+        ),
+        migrations.CreateModel(
+            name="EvaluationSessionChunk",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("seq", models.PositiveIntegerField()),
+                ("frame_count", models.PositiveIntegerField()),
+                ("data", models.BinaryField()),
+                ("session", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="chunks", to="ai.evaluationsession")),
+            ],
+            options={
+                "ordering": ["session", "seq"],
+                "constraints": [models.UniqueConstraint(fields=("session", "seq"), name="uq_ai_evaluation_session_chunk_seq")],
+            },
+        ),
+    ]
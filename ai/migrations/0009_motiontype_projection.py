@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai", "0008_evaluationsession"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="motiontype",
+            name="projection_axis",
+            field=models.JSONField(blank=True, editable=False, help_text="PCA 제1주성분 축", null=True),
+        ),
+        migrations.AddField(
+            model_name="motiontype",
+            name="projection_mean",
+            field=models.JSONField(blank=True, editable=False, help_text="투영 전 빼는 채널별 평균", null=True),
+        ),
+        migrations.AddField(
+            model_name="motiontype",
+            name="projection_revision",
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text="투영 축 계산에 사용된 data_revision", null=True),
+        ),
+    ]
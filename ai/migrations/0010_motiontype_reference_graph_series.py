@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai", "0009_motiontype_projection"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="motiontype",
+            name="reference_graph_revision",
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text="모범 동작 시계열 계산에 사용된 data_revision", null=True),
+        ),
+        migrations.AddField(
+            model_name="motiontype",
+            name="reference_graph_series",
+            field=models.JSONField(blank=True, editable=False, help_text="그래프용 모범 동작 1차원 시계열", null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai", "0010_motiontype_reference_graph_series"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userrecording",
+            name="graph_preview",
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
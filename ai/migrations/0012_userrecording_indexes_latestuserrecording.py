@@ -0,0 +1,74 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_latest_user_recordings(apps, schema_editor):
+    """ 기존 UserRecording에서 직원 x 동작별 가장 최근 기록을 찾아 요약 테이블을 채움 (새 복합 인덱스를 사용) """
+    UserRecording = apps.get_model("ai", "UserRecording")
+    LatestUserRecording = apps.get_model("ai", "LatestUserRecording")
+
+    latest_id = UserRecording.objects.filter(
+        user=OuterRef("user"), motion_type=OuterRef("motion_type")
+    ).order_by("-recorded_at", "-id").values("id")[:1]
+    rows = UserRecording.objects.filter(id=Subquery(latest_id)).values_list(
+        "id", "user_id", "motion_type_id", "score", "recorded_at"
+    )
+    batch = []
+    for recording_id, user_id, motion_type_id, score, recorded_at in rows.iterator(chunk_size=2000):
+        batch.append(LatestUserRecording(
+            user_id=user_id, motion_type_id=motion_type_id, recording_id=recording_id, score=score, recorded_at=recorded_at
+        ))
+        if len(batch) >= 2000:
+            LatestUserRecording.objects.bulk_create(batch)
+            batch = []
+    LatestUserRecording.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai", "0011_userrecording_graph_preview"),
+        ("organizations", "0004_alter_employee_emp_no_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LatestUserRecording",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("score", models.FloatField(null=True)),
+                ("recorded_at", models.DateTimeField(null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="motionrecording",
+            index=models.Index(fields=["motion_type", "score_category", "recorded_at"], name="ai_motionre_motion__e254cc_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="userrecording",
+            index=models.Index(fields=["user", "motion_type", "recorded_at"], name="ai_userreco_user_id_52d98e_idx"),
+        ),
+        migrations.AddField(
+            model_name="latestuserrecording",
+            name="motion_type",
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="ai.motiontype"),
+        ),
+        migrations.AddField(
+            model_name="latestuserrecording",
+            name="recording",
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="+", to="ai.userrecording"),
+        ),
+        migrations.AddField(
+            model_name="latestuserrecording",
+            name="user",
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="latest_motion_recordings", to="organizations.employee"),
+        ),
+        migrations.AddConstraint(
+            model_name="latestuserrecording",
+            constraint=models.UniqueConstraint(fields=("user", "motion_type"), name="uq_ai_latest_user_recording"),
+        ),
+        migrations.RunPython(backfill_latest_user_recordings, migrations.RunPython.noop),
+    ]
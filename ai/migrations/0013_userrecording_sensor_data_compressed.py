@@ -0,0 +1,71 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:45
+
+import json
+import zlib
+
+from django.db import migrations, models
+
+
+# 아래 _encode/_decode는 이 마이그레이션을 만들 때의 ai.models.encode_graph_series/decode_graph_series를 그대로 고정한 사본임
+# (마이그레이션은 나중에 바뀔 수 있는 앱 코드를 불러오지 않음). 두 형식이 같은지는 ai.tests.GraphSeriesEncodingTests에서 확인
+def _encode(values) -> bytes:
+    """ ai.models.encode_graph_series와 같은 형식 (float64 byte shuffle + zlib) """
+    import numpy as np
+
+    array = np.ascontiguousarray(values, dtype="<f8").reshape(-1)
+    return zlib.compress(np.ascontiguousarray(array.view(np.uint8).reshape(-1, 8).T).tobytes())
+
+
+def _decode(data) -> list:
+    import numpy as np
+
+    shuffled = np.frombuffer(zlib.decompress(data), dtype=np.uint8).reshape(8, -1)
+    return np.ascontiguousarray(shuffled.T).view("<f8").reshape(-1).tolist()
+
+
+def compress_sensor_data(apps, schema_editor):
+    """ 기존 UserRecording의 sensor_data_json(JSON)을 압축 바이너리 컬럼으로 옮김 """
+    UserRecording = apps.get_model("ai", "UserRecording")
+    recordings = UserRecording.objects.filter(sensor_data_json__isnull=False).only("id", "sensor_data_json")
+    batch = []
+    for recording in recordings.iterator(chunk_size=500):
+        values = recording.sensor_data_json
+        if isinstance(values, str):
+            values = json.loads(values)
+        recording.sensor_data_compressed = _encode(values)
+        batch.append(recording)
+        if len(batch) >= 500:
+            UserRecording.objects.bulk_update(batch, ["sensor_data_compressed"])
+            batch = []
+    UserRecording.objects.bulk_update(batch, ["sensor_data_compressed"])
+
+
+def decompress_sensor_data(apps, schema_editor):
+    """ 되돌릴 때: 압축 컬럼을 다시 sensor_data_json으로 풂 """
+    UserRecording = apps.get_model("ai", "UserRecording")
+    recordings = UserRecording.objects.filter(sensor_data_compressed__isnull=False).only("id", "sensor_data_compressed")
+    batch = []
+    for recording in recordings.iterator(chunk_size=500):
+        recording.sensor_data_json = _decode(recording.sensor_data_compressed)
+        batch.append(recording)
+        if len(batch) >= 500:
+            UserRecording.objects.bulk_update(batch, ["sensor_data_json"])
+            batch = []
+    UserRecording.objects.bulk_update(batch, ["sensor_data_json"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai", "0012_userrecording_indexes_latestuserrecording"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userrecording",
+            name="sensor_data_compressed",
+            field=models.BinaryField(null=True),
+        ),
+        # JSON 컬럼 삭제는 0014에서 따로 실행 (MySQL은 DDL이 트랜잭션에 묶이지 않으므로, 옮기다 실패해도 원본 컬럼이 남아 있도록 분리)
+        migrations.RunPython(compress_sensor_data, decompress_sensor_data),
+    ]
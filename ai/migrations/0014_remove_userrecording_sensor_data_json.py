@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:30
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai", "0013_userrecording_sensor_data_compressed"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="userrecording",
+            name="sensor_data_json",
+        ),
+    ]
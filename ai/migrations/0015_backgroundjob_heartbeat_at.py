@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai", "0014_remove_userrecording_sensor_data_json"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="backgroundjob",
+            name="heartbeat_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai", "0015_backgroundjob_heartbeat_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="evaluationsession",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai", "0016_evaluationsession_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userrecording",
+            name="projection_revision",
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text="그래프 시계열 투영에 사용된 축 버전", null=True),
+        ),
+    ]
@@ -1,6 +1,7 @@
 # ai/models.py
 
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import OuterRef, Q, Subquery
 import uuid
 import secrets
 from organizations.models import Company, Employee # organizations 앱에서 Company와 Employee 모델을 가져옴
@@ -39,6 +40,23 @@ class SensorDevice(models.Model):
         return secrets.token_hex(32)
 
 # --- 2. AI 평가 기준 데이터 모델 ---
+class MotionTypeQuerySet(models.QuerySet):
+    def with_graph(self, series: bool = True):
+        """
+        기본으로 미뤄 둔 그래프 데이터를 한 번에 읽음
+        series=False이면 투영 축(평가할 때 사용)만 읽고 모범 동작 시계열(그래프 API에서만 사용)은 계속 미룸
+        """
+        queryset = self.defer(None)
+        return queryset if series else queryset.defer("reference_graph_series")
+
+class MotionTypeManager(models.Manager.from_queryset(MotionTypeQuerySet)):
+    """
+    동작 목록/관리/이름 조회가 그래프용 JSON(모범 동작 시계열, 투영 축)을 함께 읽지 않도록 기본 쿼리셋에서 미뤄 둠
+    (접근하면 그때 따로 조회됨. 평가는 with_graph(series=False), 그래프 API는 with_graph()로 읽음)
+    """
+    def get_queryset(self):
+        return super().get_queryset().defer("projection_mean", "projection_axis", "reference_graph_series")
+
 class MotionType(models.Model):
     """
     '소화기 들기' 등 동작의 종류를 정의하고, 평가에 필요한 요약 정보를 저장.
@@ -47,10 +65,90 @@ class MotionType(models.Model):
     description = models.TextField(blank=True)
     # 개선 사항: 미리 계산된 max_dtw_distance 값을 저장할 필드
     max_dtw_distance = models.FloatField(default=1000.0, help_text="점수 정규화를 위한 최대 DTW 거리")
+    # max_dtw_distance 계산에 쓰인 (모범 x 0점) 쌍별 DTW 거리의 최대값. 새 기록이 추가될 때 증분 계산의 기준이 됨
+    max_pair_dtw_distance = models.FloatField(null=True, blank=True, editable=False, help_text="모범/0점 동작 쌍의 최대 DTW 거리")
+    # 모범/0점 동작 데이터가 추가/삭제될 때마다 1씩 증가하는 버전 (평가기 캐시가 오래되었는지 판단하는 데 사용)
+    data_revision = models.PositiveIntegerField(default=0, editable=False, help_text="동작 데이터 변경 버전")
+    # 그래프용 1차원 투영 축: 모범 동작 전체에서 한 번 구한 PCA 제1주성분(평균 벡터 + 축 벡터)
+    # projection_revision이 data_revision과 다르면(모범 동작이 바뀌면) 다시 계산함
+    projection_mean = models.JSONField(null=True, blank=True, editable=False, help_text="투영 전 빼는 채널별 평균")
+    projection_axis = models.JSONField(null=True, blank=True, editable=False, help_text="PCA 제1주성분 축")
+    projection_revision = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text="투영 축 계산에 사용된 data_revision")
+    # 대시보드 그래프용 모범 동작 1차원 시계열 (가장 최근 모범 동작을 투영 축에 투영한 결과)
+    # reference_graph_revision이 data_revision과 다르면(모범 동작이 바뀌면) 다시 계산함
+    reference_graph_series = models.JSONField(null=True, blank=True, editable=False, help_text="그래프용 모범 동작 1차원 시계열")
+    reference_graph_revision = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text="모범 동작 시계열 계산에 사용된 data_revision")
+
+    objects = MotionTypeManager()
 
     def __str__(self):
         return self.motion_name
 
+def encode_sensor_array(array) -> bytes:
+    """ numpy 배열을 .npy 형식(shape/dtype 헤더 + 원본 버퍼)의 바이트로 변환 """
+    import io
+    import numpy as np
+
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(array), allow_pickle=False)
+    return buffer.getvalue()
+
+def encode_sensor_json(values):
+    """
+    sensor_data_json(중첩 리스트)을 .npy 바이트로 변환
+    프레임마다 길이가 다르거나 숫자가 아닌 값이 있어서 2차원 숫자 배열로 만들 수 없으면 None (캐시 없이 JSON을 그대로 사용)
+    """
+    import numpy as np
+
+    try:
+        array = np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return None
+    return encode_sensor_array(array)
+
+def decode_sensor_array(data, copy: bool = True):
+    """
+    .npy 형식의 바이트를 파싱 없이(np.frombuffer) numpy 배열로 변환
+    copy=False이면 복사하지 않고 원본 바이트를 가리키는 읽기 전용 배열을 반환 (바로 다른 버퍼로 옮겨 담을 때 사용)
+    """
+    import io
+    import numpy as np
+
+    # DB 드라이버에 따라 bytes 또는 memoryview로 전달됨
+    # dtaidistance의 C 구현은 쓰기 가능한 버퍼를 요구하므로 bytearray로 한 번 복사(memcpy)한 뒤 그대로 사용
+    data = memoryview(bytearray(data)) if copy else memoryview(data)
+    header = io.BytesIO(data[:256].tobytes())
+    version = np.lib.format.read_magic(header)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(header)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(header)
+    offset = header.tell()
+    count = int(np.prod(shape)) if shape else 1
+    array = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+    return array.reshape(shape, order="F" if fortran_order else "C")
+
+def encode_graph_series(values) -> bytes:
+    """
+    1차원 그래프 시계열(float64)을 압축한 바이트로 변환 (무손실)
+    형식: 값들의 little-endian float64 버퍼를 바이트 자리별로 모은 뒤(byte shuffle) zlib으로 압축
+    (같은 자리의 지수/상위 바이트끼리 모이므로 그대로 압축할 때보다 작아짐)
+    """
+    import zlib
+    import numpy as np
+
+    array = np.ascontiguousarray(values, dtype="<f8").reshape(-1)
+    shuffled = array.view(np.uint8).reshape(-1, array.itemsize).T
+    return zlib.compress(np.ascontiguousarray(shuffled).tobytes())
+
+def decode_graph_series(data):
+    """ encode_graph_series()로 압축한 바이트를 float64 numpy 배열로 되돌림 """
+    import zlib
+    import numpy as np
+
+    shuffled = np.frombuffer(zlib.decompress(data), dtype=np.uint8).reshape(8, -1)
+    return np.ascontiguousarray(shuffled.T).view("<f8").reshape(-1)
+
 class MotionRecording(models.Model):
     """
     모범(reference) 또는 0점(zero_score) 동작의 실제 센서 데이터를 저장하는 데이터 원본 창고
@@ -60,15 +158,51 @@ class MotionRecording(models.Model):
     data_frames = models.IntegerField()
     score_category = models.CharField(max_length=20, choices=[("reference", "모범 동작"), ("zero_score", "0점 동작")])
     sensor_data_json = models.JSONField()
+    # 전처리된 센서 데이터를 .npy 바이트로 저장한 캐시 (평가기 로딩 시 JSON 파싱을 건너뛰기 위함)
+    sensor_data_npy = models.BinaryField(null=True, blank=True, editable=False)
+
+    class Meta:
+        # 동작별 모범/0점 기록 조회와 최신 모범 동작 찾기(order_by -recorded_at)용
+        indexes = [models.Index(fields=["motion_type", "score_category", "recorded_at"])]
+
+    def save(self, *args, **kwargs):
+        # JSON 원본이 저장될 때마다 바이너리 캐시를 다시 만들어 둘이 항상 같은 데이터를 가리키도록 함
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "sensor_data_json" in update_fields:
+            self.sensor_data_npy = encode_sensor_json(self.sensor_data_json) if self.sensor_data_json else None
+            if update_fields is not None:
+                kwargs["update_fields"] = set(update_fields) | {"sensor_data_npy"}
+        super().save(*args, **kwargs)
 
     # numpy 형태의 원본 센서 데이터(json 문자열)를 numpy 배열 형식의 데이터로 반환
-    def get_sensor_data_to_numpy(self):
+    # 바이너리 캐시가 있으면 JSON 대신 캐시를 사용함
+    # copy=False이면 바이너리 캐시를 복사하지 않은 읽기 전용 배열을 반환함
+    def get_sensor_data_to_numpy(self, copy: bool = True):
         import numpy as np
 
+        if self.sensor_data_npy:
+            return decode_sensor_array(self.sensor_data_npy, copy=copy)
         if self.sensor_data_json:
             return np.array(self.sensor_data_json)
         return np.array([])
 
+class UserRecordingQuerySet(models.QuerySet):
+    def with_graph(self, series: bool = True):
+        """
+        기본으로 미뤄 둔 그래프 데이터를 한 번에 읽음 (그래프 API에서만 사용)
+        series=False이면 미리보기(graph_preview)만 읽고 전체 시계열(sensor_data_compressed)은 계속 미룸
+        """
+        queryset = self.defer(None)
+        return queryset if series else queryset.defer("sensor_data_compressed")
+
+class UserRecordingManager(models.Manager.from_queryset(UserRecordingQuerySet)):
+    """
+    목록/관리/통계 조회가 기록마다 수 KB인 그래프 데이터를 함께 읽지 않도록
+    기본 쿼리셋에서 sensor_data_compressed, graph_preview를 미뤄 둠 (접근하면 그때 따로 조회됨)
+    """
+    def get_queryset(self):
+        return super().get_queryset().defer("sensor_data_compressed", "graph_preview")
+
 # 사용자 평가 결과 저장 모델
 class UserRecording(models.Model):
     """
@@ -77,9 +211,210 @@ class UserRecording(models.Model):
     user = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="motion_recordings")
     motion_type = models.ForeignKey(MotionType, on_delete=models.CASCADE)
     score = models.FloatField()
-    # 사용자가 평가받은 원본 센서 데이터 (그래프 재현 및 분석용)
-    sensor_data_json = models.JSONField(null=True) 
+    # 사용자가 평가받은 센서 데이터의 그래프용 시계열 (PCA 결과, encode_graph_series()로 압축). sensor_data_json으로 읽고 씀
+    sensor_data_compressed = models.BinaryField(null=True, editable=False)
+    # 대시보드용으로 미리 줄여 둔(LTTB) 그래프 시계열: {"index": [원래 프레임 번호, ...], "values": [...]}
+    graph_preview = models.JSONField(null=True, blank=True, editable=False)
+    # 그래프 시계열을 만든 투영 축의 버전(MotionType.projection_revision). 축 없이 요청별 PCA로 만들었거나 예전 기록이면 NULL
+    # 모범 동작이 바뀐 뒤에는 모범 동작 시계열과 다른 축이므로 그래프 API가 projectionOutdated로 알려줌
+    projection_revision = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text="그래프 시계열 투영에 사용된 축 버전")
     recorded_at = models.DateTimeField(auto_now_add=True)
 
+    objects = UserRecordingManager()
+
+    class Meta:
+        # 직원 x 동작별 기록 조회와 가장 최근 기록 찾기(order_by -recorded_at)용
+        indexes = [models.Index(fields=["user", "motion_type", "recorded_at"])]
+
+    def __str__(self):
+        return f"{self.user.name} - {self.motion_type.motion_name} ({self.score})"
+
+    # 예전 JSON 컬럼과 같은 이름/형태(list)로 시계열을 읽고 씀 (UserRecording(sensor_data_json=...)도 그대로 동작)
+    # 기본 쿼리셋으로 읽은 객체는 처음 접근할 때 압축 컬럼을 따로 조회함
+    @property
+    def sensor_data_json(self):
+        if self.sensor_data_compressed is None:
+            return None
+        return decode_graph_series(self.sensor_data_compressed).tolist()
+
+    @sensor_data_json.setter
+    def sensor_data_json(self, values):
+        self.sensor_data_compressed = encode_graph_series(values) if values is not None else None
+
+class LatestUserRecording(models.Model):
+    """
+    직원 x 동작별 가장 최근 평가 기록(UserRecording)을 가리키는 요약 테이블.
+    대시보드/그래프에서 최근 기록을 찾을 때 기록 전체를 정렬하지 않고 (user, motion_type) 유니크 인덱스로 바로 찾음
+    UserRecording이 저장/삭제될 때 signals에서 갱신하고, bulk_create처럼 시그널이 없는 경로는 record()를 직접 호출함
+    """
+    user = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="latest_motion_recordings")
+    motion_type = models.ForeignKey(MotionType, on_delete=models.CASCADE, related_name="+")
+    # 가리키는 기록이 삭제되면 NULL이 되고, post_delete 시그널에서 남은 기록 중 가장 최근 것으로 다시 채움
+    recording = models.ForeignKey(UserRecording, on_delete=models.SET_NULL, null=True, related_name="+")
+    score = models.FloatField(null=True)
+    recorded_at = models.DateTimeField(null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "motion_type"], name="uq_ai_latest_user_recording")
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.motion_type_id} ({self.score})"
+
+    @classmethod
+    def record(cls, recordings):
+        """
+        새로 저장된 UserRecording들을 반영. (user, motion_type)마다 가장 늦게 기록된 것만 반영하고,
+        이미 더 최근 기록을 가리키고 있으면(동시에 저장된 요청의 순서가 바뀐 경우) 그대로 둠
+        pk가 없는 기록(MySQL의 bulk_create)은 UserRecording에서 다시 찾음
+        """
+        latest = {}
+        for recording in recordings:
+            key = (recording.user_id, recording.motion_type_id)
+            if key not in latest or recording.recorded_at >= latest[key].recorded_at:
+                latest[key] = recording
+
+        for (user_id, motion_type_id), recording in latest.items():
+            if recording.pk is None:
+                cls.refresh(user_id, motion_type_id)
+                continue
+            values = {"recording": recording, "score": recording.score, "recorded_at": recording.recorded_at}
+            rows = cls.objects.filter(user_id=user_id, motion_type_id=motion_type_id).filter(
+                Q(recorded_at__lte=recording.recorded_at) | Q(recorded_at__isnull=True)
+            )
+            if rows.update(**values):
+                continue
+            try:
+                with transaction.atomic():
+                    cls.objects.create(user_id=user_id, motion_type_id=motion_type_id, **values)
+            except IntegrityError:
+                # 이미 행이 있음: 더 최근 기록을 가리키고 있거나, 다른 요청이 방금 만든 경우이므로 조건부 갱신을 한 번 더 시도
+                rows.update(**values)
+
+    @classmethod
+    def refresh(cls, user_id: int, motion_type_id: int):
+        """ UserRecording에서 (user, motion_type)의 가장 최근 기록을 다시 찾아 반영 (기록이 없으면 행을 삭제) """
+        recording = (
+            UserRecording.objects.filter(user_id=user_id, motion_type_id=motion_type_id)
+            .only("id", "score", "recorded_at")
+            .order_by("-recorded_at", "-id")
+            .first()
+        )
+        if recording is None:
+            cls.objects.filter(user_id=user_id, motion_type_id=motion_type_id).delete()
+            return None
+        latest, _ = cls.objects.update_or_create(
+            user_id=user_id,
+            motion_type_id=motion_type_id,
+            defaults={"recording": recording, "score": recording.score, "recorded_at": recording.recorded_at},
+        )
+        return latest
+
+    @classmethod
+    def rebuild(cls, batch_size: int = 2000) -> int:
+        """ UserRecording 전체에서 요약 테이블을 다시 만들고 행 수를 반환 (bulk_create/raw SQL로 기록을 넣은 뒤 맞출 때 사용) """
+        latest_id = UserRecording.objects.filter(
+            user=OuterRef("user"), motion_type=OuterRef("motion_type")
+        ).order_by("-recorded_at", "-id").values("id")[:1]
+        rows = UserRecording.objects.filter(id=Subquery(latest_id)).values_list(
+            "id", "user_id", "motion_type_id", "score", "recorded_at"
+        )
+
+        count = 0
+        with transaction.atomic():
+            cls.objects.all().delete()
+            batch = []
+            for recording_id, user_id, motion_type_id, score, recorded_at in rows.iterator(chunk_size=batch_size):
+                batch.append(cls(
+                    user_id=user_id, motion_type_id=motion_type_id, recording_id=recording_id, score=score, recorded_at=recorded_at
+                ))
+                if len(batch) >= batch_size:
+                    cls.objects.bulk_create(batch)
+                    count += len(batch)
+                    batch = []
+            cls.objects.bulk_create(batch)
+            count += len(batch)
+        return count
+
+# 백그라운드 작업 큐 모델
+class BackgroundJob(models.Model):
+    """
+    요청 스레드 밖에서 처리할 작업(예: max_dtw_distance 재계산)을 저장하는 DB 기반 작업 큐.
+    `python manage.py run_ai_jobs` 워커가 대기 중인 작업을 하나씩 가져가서 처리함.
+    """
+    class Status(models.TextChoices):
+        QUEUED = "queued", "대기"
+        RUNNING = "running", "처리 중"
+        SUCCEEDED = "succeeded", "완료"
+        FAILED = "failed", "실패"
+
+    class Kind(models.TextChoices):
+        CALIBRATE_MAX_DTW = "calibrate_max_dtw", "max_dtw_distance 재계산"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=40, choices=Kind.choices)
+    status = models.CharField(max_length=12, choices=Status.choices, default=Status.QUEUED, db_index=True)
+    motion_type = models.ForeignKey(MotionType, on_delete=models.CASCADE, related_name="jobs")
+    # 증분 계산의 기준이 되는 새 기록 (없으면 전체 재계산)
+    recording = models.ForeignKey(MotionRecording, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    # 진행률(0~100)
+    progress = models.FloatField(default=0)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # 처리 중인 워커가 살아 있다는 표시. 진행률을 저장할 때마다 갱신하고, 오래 갱신되지 않은 작업만 다시 대기시킴
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [models.Index(fields=["status", "created_at"])]
+
     def __str__(self):
-        return f"{self.user.name} - {self.motion_type.motion_name} ({self.score})"
\ No newline at end of file
+        return f"{self.get_kind_display()} [{self.motion_type.motion_name}] ({self.status})"
+
+
+# 스트리밍(청크) 평가 세션 모델
+class EvaluationSession(models.Model):
+    """
+    긴 평가 세션의 센서 데이터를 여러 청크로 나누어 받기 위한 세션.
+    세션 열기 -> 청크 추가(여러 번) -> 종료(평가) 순서로 사용함.
+    """
+    class Status(models.TextChoices):
+        OPEN = "open", "수신 중"
+        FINALIZED = "finalized", "평가 완료"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="evaluation_sessions")
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="evaluation_sessions")
+    motion_type = models.ForeignKey(MotionType, on_delete=models.CASCADE, related_name="evaluation_sessions")
+    # 프레임의 채널 이름 순서 (예: ["flex1", ..., "gyro_z"])
+    channels = models.JSONField()
+    frame_count = models.PositiveIntegerField(default=0)
+    chunk_count = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=12, choices=Status.choices, default=Status.OPEN)
+    result = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # 마지막으로 청크를 받은 시각 (오래 청크가 없는 열린 세션을 정리할 때 사용)
+    updated_at = models.DateTimeField(auto_now=True)
+    finalized_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.employee.name} - {self.motion_type.motion_name} ({self.status}, {self.frame_count} frames)"
+
+class EvaluationSessionChunk(models.Model):
+    """
+    세션에 추가된 센서 데이터 청크. (프레임 수, 채널 수) float64 little-endian 원본 버퍼로 저장함.
+    """
+    session = models.ForeignKey(EvaluationSession, on_delete=models.CASCADE, related_name="chunks")
+    seq = models.PositiveIntegerField()
+    frame_count = models.PositiveIntegerField()
+    data = models.BinaryField()
+
+    class Meta:
+        ordering = ["session", "seq"]
+        constraints = [
+            models.UniqueConstraint(fields=["session", "seq"], name="uq_ai_evaluation_session_chunk_seq")
+        ]
@@ -0,0 +1,43 @@
+# ai/parsers.py
+import json
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .streaming import ChunkFormatError, decode_columnar_frames
+
+
+class SensorFramesParser(BaseParser):
+    """
+    컬럼형 바이너리 센서 데이터 파서 (Content-Type: application/x-sensor-frames)
+    본문 형식: JSON 헤더 한 줄 + "\n" + little-endian 행렬(프레임 순서, channels 순서)
+      헤더 예: {"motionName": "fire_exit", "empNo": "EMP001", "channels": ["flex1", ..., "gyro_z"], "dtype": "<f4"}
+    헤더의 나머지 필드는 그대로 두고, sensorData에 SensorFrames(배열, 채널 목록)를 넣어서 반환함
+    """
+    media_type = "application/x-sensor-frames"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        body = stream.read() if stream is not None else b""
+        header_end = body.find(b"\n")
+        if header_end < 0:
+            raise ParseError("헤더(JSON 한 줄)와 센서 데이터 사이의 줄바꿈이 없습니다.")
+
+        try:
+            header = json.loads(body[:header_end])
+        except ValueError as e:
+            raise ParseError(f"헤더 JSON을 해석할 수 없습니다: {e}")
+        if not isinstance(header, dict):
+            raise ParseError("헤더는 JSON 객체여야 합니다.")
+
+        try:
+            frames = decode_columnar_frames(
+                body,
+                header.pop("channels", None),
+                header.pop("dtype", "<f4"),
+                offset=header_end + 1,
+            )
+        except ChunkFormatError as e:
+            raise ParseError(str(e))
+
+        header["sensorData"] = frames
+        return header
@@ -1,6 +1,7 @@
 # ai/permissions.py
 from rest_framework.permissions import BasePermission
-from .models import SensorDevice
+from .api_key_cache import get_active_device
+from .metrics import span
 
 class HasValidAPIKey(BasePermission):
     """
@@ -16,14 +17,13 @@ class HasValidAPIKey(BasePermission):
             return False
 
         # 해당 API 키를 가진 활성화된 SensorDevice가 존재하는지 확인
-        try:
-            # select_related: SensorDevice를 찾을 건데, 연결된 company 정보도 바로 쓸 거니까, 한 번에 두 테이블을 합쳐서 달라고 하는 것과 같음
-            # SensorDevice 객체에 접근하는 것은 O(1)이나, company(외래키)를 사용할 때는 O(N)만큼의 시간 복잡도가 발생함(조인)
-            device = SensorDevice.objects.select_related('company').get(api_key=api_key, is_active=True)
-            # view나 request 객체에 device와 company 정보를 추가해두면 다음 단계에서 유용하게 사용 가능
-            request.device = device
-            request.company = device.company
-        except SensorDevice.DoesNotExist:
+        # 같은 키로 반복해서 들어오는 요청은 짧은 TTL의 프로세스 내 캐시에서 바로 찾음 (ai/api_key_cache.py)
+        with span("auth"):
+            device = get_active_device(api_key)
+        if device is None:
             return False
-        
+
+        # view나 request 객체에 device와 company 정보를 추가해두면 다음 단계에서 유용하게 사용 가능
+        request.device = device
+        request.company = device.company
         return True
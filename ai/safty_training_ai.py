@@ -1,4 +1,8 @@
+import threading
+from contextlib import contextmanager
+
 import numpy as np
+from operator import itemgetter
 from .models import MotionRecording
 # df: pandas의 data frame 줄임말
 import pandas as pd
@@ -7,6 +11,39 @@ import matplotlib.pyplot as plt
 from dtaidistance import dtw_ndim
 # 잡음 제거 필터
 from scipy.signal import savgol_filter
+from scipy.ndimage import minimum_filter1d, maximum_filter1d
+# dtw 병렬 계산에 사용할 OpenMP 스레드 수 제한
+from threadpoolctl import threadpool_limits
+from django.conf import settings
+
+# dtw 계산 시 사용하는 Sakoe-Chiba 윈도우 크기
+DTW_WINDOW = 10
+
+# OpenMP 스레드 수 제한은 프로세스 전체 설정이므로, 여러 스레드가 동시에 걸고 풀면 서로의 설정을 덮어씀
+# 처음 들어온 스레드만 제한을 걸고 마지막으로 나가는 스레드가 복원하도록 들어온 수를 셈
+_dtw_thread_limits_lock = threading.Lock()
+_dtw_thread_limits_depth = 0
+_dtw_thread_limits = None
+
+@contextmanager
+def dtw_thread_limits(workers: int):
+    """
+    dtw 병렬 계산에 사용할 OpenMP 스레드 수를 workers로 제한하는 컨텍스트
+    여러 스레드에서 겹쳐 사용해도 제한은 한 번만 걸림 (배치 평가는 스레드 풀 밖에서 한 번 걸어 둠)
+    """
+    global _dtw_thread_limits_depth, _dtw_thread_limits
+    with _dtw_thread_limits_lock:
+        if _dtw_thread_limits_depth == 0:
+            _dtw_thread_limits = threadpool_limits(limits=workers, user_api="openmp")
+        _dtw_thread_limits_depth += 1
+    try:
+        yield
+    finally:
+        with _dtw_thread_limits_lock:
+            _dtw_thread_limits_depth -= 1
+            if _dtw_thread_limits_depth == 0:
+                _dtw_thread_limits.restore_original_limits()
+                _dtw_thread_limits = None
 
 # 각 센서의 값 변화를 그래프로 그려서 보여주는 함수
 def graph_sensor_data(data_df, title="Sensor Data", show_plot=True):
@@ -48,97 +85,439 @@ def graph_sensor_data(data_df, title="Sensor Data", show_plot=True):
     if show_plot:
         plt.show()
 
-# 센서 데이터 다듬기(전처리)
-# 클라이언트로부터 받은 센서 데이터(딕셔너리)를 전처리해서 numpy 배열(다차원 배열)로 반환하는 함수
-def preprocess_sensor_data(raw_data_dicts) -> np.ndarray:
-    # 처리할 데이터가 없으면 빈 배열 반환
+# 센서 종류(채널 이름에 들어있는 문자열)별 정규화에 사용할 (최소값, 최대값)
+# 아래 값들은 모두 가정 값들임. 실제 센서 값들의 범위를 쓸 것
+# 다른 센서가 있다면 여기에 추가하여 센서 추가!
+SENSOR_RANGES = (
+    ("flex", (0, 100)),  # flex 센서가 가지는 실제 데이터 범위
+    ("gyro", (-30, 30)),
+)
+
+# 채널 이름에 해당하는 (최소값, 최대값). 알 수 없는 채널이면 None
+def sensor_channel_range(channel):
+    for keyword, value_range in SENSOR_RANGES:
+        if keyword in channel:
+            return value_range
+    return None
+
+# 센서 채널 이름으로 정규화에 사용할 (최소값, 최대값) 벡터를 결정하는 함수
+def _sensor_min_max_vectors(columns):
+    mins = np.empty(len(columns), dtype=np.float64)
+    maxs = np.empty(len(columns), dtype=np.float64)
+    for i, col in enumerate(columns):
+        value_range = sensor_channel_range(col)
+        if value_range is None:
+            raise ValueError(f"알 수 없는 센서 채널입니다: {col}")
+        mins[i], maxs[i] = value_range
+    return mins, maxs
+
+# 클라이언트로부터 받은 센서 데이터(딕셔너리 리스트)를 (프레임 수, 채널 수) 형태의 numpy 배열로 한 번에 변환하는 함수
+# 채널 순서는 pandas.DataFrame(raw_data_dicts)와 동일하게 '처음 등장한 키 순서'를 따름
+def sensor_dicts_to_numpy(raw_data_dicts, dtype=np.float64):
     if not raw_data_dicts:
+        return np.empty((0, 0), dtype=dtype), []
+
+    columns = list(raw_data_dicts[0].keys())
+    try:
+        if len(columns) == 1:
+            key = columns[0]
+            rows = [(frame[key],) for frame in raw_data_dicts]
+        else:
+            getter = itemgetter(*columns)
+            rows = list(map(getter, raw_data_dicts))
+        # 첫 프레임의 키가 모두 있어도 뒤 프레임에만 있는 키가 있으면 그 키가 빠지므로, 키 수가 다른 프레임이 있으면 아래로 넘어감
+        if any(len(frame) != len(columns) for frame in raw_data_dicts):
+            raise KeyError
+    except KeyError:
+        # 프레임마다 키가 다른 경우: 모든 키를 등장 순서대로 모으고 빠진 값은 NaN으로 채움 (pandas와 동일)
+        columns = list(dict.fromkeys(key for frame in raw_data_dicts for key in frame))
+        rows = [tuple(frame.get(key, np.nan) for key in columns) for frame in raw_data_dicts]
+
+    # C-contiguous 2차원 배열로 한 번에 변환
+    return np.ascontiguousarray(np.array(rows, dtype=dtype)), columns
+
+# 이미 numpy 배열로 변환된 센서 데이터를 전처리(필터 + 정규화)하는 함수
+def preprocess_sensor_array(data: np.ndarray, columns) -> np.ndarray:
+    # 처리할 데이터가 없으면 빈 배열 반환
+    if data.size == 0:
         return np.array([])
-    
-    df = pd.DataFrame(raw_data_dicts)
+
+    # float32 등으로 받은 데이터도 JSON 경로와 같은 float64로 계산 (float64면 복사하지 않음)
+    data = np.asarray(data, dtype=np.float64)
+    num_frames = data.shape[0]
 
     # window_length: 데이터를 얼마나 넓게(몇 프레임) 보고 부드럽게 할지 결정 (홀수여야 함)
     # 데이터 길이가 필터 윈도우 길이보다 짧으면 오류가 나므로, 최소값을 보장
-    window_length = min(df.shape[0] - (df.shape[0] % 2 == 0), 11)
+    window_length = min(num_frames - (num_frames % 2 == 0), 11)
 
     if window_length < 3:
         window_length = 3
 
-    # 모든 센서에 대해서 잡음 제거 필터 적용
+    # 모든 센서(열)에 대해서 한 번에 잡음 제거 필터 적용 (axis=0: 시간 축)
     # 일반적으로 다항식 차수 3을 사용
-    smoothed_data = df.apply(lambda col: savgol_filter(col, window_length, 3))
+    smoothed_data = savgol_filter(data, window_length, 3, axis=0)
 
     # 값의 크기 통일(정규화): 0에서 1사이의 값으로 만들기
-    # 정규화된 데이터를 저장할 빈 DataFrame 만들기
-    normalized_data = pd.DataFrame(index=smoothed_data.index, columns=smoothed_data.columns)
-
-    # 각 센서 별로 예상되는 최소/최대 값을 정해서 정규화
-    for col in smoothed_data.columns:
-        # 아래 if문들은 모두 가정 값들임. 실제 센서 값들의 범위를 쓸 것
-        if "flex" in col:
-            # flex 센서가 가지는 실제 데이터 범위
-            s_min = 0
-            s_max = 100
-        elif "gyro" in col:
-            s_min = -30
-            s_max = 30
-        # 다른 센서가 있다면 elif나 else를 추가하여 센서 추가!
-    
-        range_sensor = s_max - s_min # 센서 값의 전체 범위
-        
-        # (현재 센서 값 - 센서의 최소 값) / 센서의 전체 범위
-        # 해당 과정을 거치면 모든 센서 값이 0에서 1사이로 맞추어짐
-        normalized_data[col] = (smoothed_data[col] - s_min) / range_sensor
-    
-    # dtw 라이브러리는 numpy 배열을 더 선호하므로, DataFrame을 numpy 배열로 변환하여 반환하기
-    return normalized_data.values
+    # (현재 센서 값 - 센서의 최소 값) / 센서의 전체 범위 를 채널별 벡터로 브로드캐스팅하여 계산
+    s_min, s_max = _sensor_min_max_vectors(columns)
+    range_sensor = s_max - s_min # 센서 값의 전체 범위
+    return (smoothed_data - s_min) / range_sensor
+
+# 센서 데이터 다듬기(전처리)
+# 클라이언트로부터 받은 센서 데이터(딕셔너리)를 전처리해서 numpy 배열(다차원 배열)로 반환하는 함수
+# dtw 라이브러리는 numpy 배열을 선호하므로 DataFrame을 거치지 않고 바로 numpy로 처리함
+# 이미 (프레임 수, 채널 수) numpy 배열로 받은 데이터(스트리밍 업로드 등)는 channels로 채널 이름을 함께 넘김
+def preprocess_sensor_data(raw_data_dicts, channels=None) -> np.ndarray:
+    if isinstance(raw_data_dicts, np.ndarray):
+        return preprocess_sensor_array(raw_data_dicts, channels)
+
+    # 처리할 데이터가 없으면 빈 배열 반환
+    if not raw_data_dicts:
+        return np.array([])
+
+    data, columns = sensor_dicts_to_numpy(raw_data_dicts)
+    return preprocess_sensor_array(data, columns)
+
+# --- dtw 가지치기(pruning)용 하한/상한 계산 ---
+
+# 모범 동작의 LB_Keogh 엔벨로프(각 프레임 주변 window 범위의 채널별 최소/최대값)를 계산하는 함수
+# dtaidistance의 window 정의에 맞춰 j 주변 |i - j| < window 범위를 사용함
+def dtw_envelope(series: np.ndarray, window: int = DTW_WINDOW):
+    size = 2 * window - 1
+    lower = minimum_filter1d(series, size=size, axis=0, mode="nearest")
+    upper = maximum_filter1d(series, size=size, axis=0, mode="nearest")
+    return lower, upper
+
+# 두 길이가 다를 때 dtaidistance는 길이 차이만큼 window 범위를 넓히므로, 엔벨로프도 그만큼 넓혀서 맞춰주는 함수
+def _align_envelope(envelope, query_length: int):
+    lower, upper = envelope
+    ref_length = lower.shape[0]
+    # 사용자 프레임 i가 매칭될 수 있는 모범 동작 프레임의 중심 범위: [i - a, i + b]
+    a = max(0, query_length - ref_length)
+    b = max(0, ref_length - query_length)
+    width = a + b + 1
+    if width == 1:
+        return lower[:query_length], upper[:query_length]
+
+    # 가장자리 값을 복제해서 패딩한 뒤, 길이 width의 구간 최소/최대를 구하고 i + b 위치를 사용
+    pad = width - 1
+    padded_lower = np.concatenate([np.repeat(lower[:1], pad, axis=0), lower, np.repeat(lower[-1:], pad, axis=0)])
+    padded_upper = np.concatenate([np.repeat(upper[:1], pad, axis=0), upper, np.repeat(upper[-1:], pad, axis=0)])
+    windowed_lower = np.lib.stride_tricks.sliding_window_view(padded_lower, width, axis=0).min(axis=-1)
+    windowed_upper = np.lib.stride_tricks.sliding_window_view(padded_upper, width, axis=0).max(axis=-1)
+    index = np.arange(query_length) + b
+    return windowed_lower[index], windowed_upper[index]
+
+# 사용자 데이터(query)와 모범 동작 엔벨로프 사이의 LB_Keogh 하한을 계산하는 함수
+# 반환 값은 항상 dtw_ndim.distance(query, reference, window=window) 이하임
+def lb_keogh(query: np.ndarray, envelope) -> float:
+    lower, upper = _align_envelope(envelope, query.shape[0])
+    above = np.maximum(query - upper, 0)
+    below = np.maximum(lower - query, 0)
+    return float(np.sqrt(np.sum(above ** 2) + np.sum(below ** 2)))
+
+# dtw 거리의 상한을 계산하는 함수
+# window=1(두 대각선 사이의 경로만 허용)은 window=DTW_WINDOW가 허용하는 경로의 부분집합이므로 항상 dtw 거리 이상임
+def dtw_upper_bound(s1: np.ndarray, s2: np.ndarray) -> float:
+    return dtw_ndim.distance(s1, s2, window=1, use_c=True)
+
+# --- 그래프용 1차원 투영 ---
+# 동작마다 모범 동작 전체로 PCA 제1주성분 축을 한 번만 구해 두고, 사용자/모범 데이터를 같은 축에 투영함
+# (요청마다 PCA를 새로 학습하면 곡선마다 축과 부호가 달라져서 서로 비교할 수 없음)
+def fit_projection_axis(arrays):
+    """ 전처리된 (프레임 수, 채널 수) 배열들을 이어 붙여 (평균 벡터, 제1주성분 축)을 반환. 데이터가 없으면 None """
+    arrays = [np.asarray(array, dtype=np.float64) for array in arrays if len(array) > 0]
+    if not arrays or len({array.shape[1] for array in arrays}) != 1:
+        return None
+
+    stacked = np.concatenate(arrays, axis=0)
+    mean = stacked.mean(axis=0)
+    # 채널 수 x 채널 수 공분산 행렬의 고유벡터 (채널 수가 작아서 SVD보다 저렴)
+    centered = stacked - mean
+    eigenvalues, eigenvectors = np.linalg.eigh(centered.T @ centered)
+    axis = eigenvectors[:, np.argmax(eigenvalues)]
+    # 부호를 고정: 절대값이 가장 큰 성분이 양수가 되도록 함
+    if axis[np.argmax(np.abs(axis))] < 0:
+        axis = -axis
+    return mean, axis
+
+def project_onto_axis(data, mean, axis) -> np.ndarray:
+    """ (프레임 수, 채널 수) 배열을 투영 축에 내린 1차원 배열 (행렬-벡터 곱 한 번) """
+    data = np.asarray(data, dtype=np.float64)
+    return (data - np.asarray(mean)) @ np.asarray(axis)
+
+def lttb_downsample(values, points: int, index=None):
+    """
+    1차원 시계열을 Largest-Triangle-Three-Buckets 방식으로 points개 점으로 줄임 (첫 점과 마지막 점은 항상 포함)
+    index에는 각 값의 x 좌표(원래 프레임 번호)를 넘기고, 생략하면 0, 1, 2, ...를 사용
+    반환 값: (선택된 점의 x 좌표 배열, 값 배열)
+    """
+    y = np.asarray(values, dtype=np.float64)
+    x = np.arange(len(y)) if index is None else np.asarray(index)
+    n = len(y)
+    points = max(int(points), 3)
+    if n <= points:
+        return x, y
+
+    # 첫 점과 마지막 점을 뺀 나머지를 points - 2개 구간으로 나눔
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    xf = x.astype(np.float64)
+    # 구간별 평균 점을 한 번에 계산. 마지막 구간의 '다음 구간'은 마지막 점
+    counts = np.diff(edges)
+    mean_x = np.append(np.add.reduceat(xf[1:n - 1], edges[:-1] - 1) / counts, xf[n - 1])
+    mean_y = np.append(np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts, y[n - 1])
+
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(points - 2):
+        start, end = edges[i], edges[i + 1]
+        ax, ay = xf[a], y[a]
+        # 이전에 선택한 점, 현재 구간의 후보 점, 다음 구간 평균 점이 이루는 삼각형 넓이(의 2배)가 가장 큰 점을 선택
+        areas = np.abs((ax - mean_x[i + 1]) * (y[start:end] - ay) - (ax - xf[start:end]) * (mean_y[i + 1] - ay))
+        a = start + int(areas.argmax())
+        selected[i + 1] = a
+
+    return x[selected], y[selected]
+
+# --- 모범 동작 배열 저장소 ---
+# 배열마다 시작 위치를 이 크기(바이트, 캐시 라인)의 배수로 맞춤
+ARENA_ALIGNMENT = 64
+
+class ReferenceArena:
+    """
+    모범 동작 배열 여러 개를 하나의 연속(C-contiguous) 1차원 버퍼와 배열별 (시작 위치, 모양) 목록으로 보관하는 저장소.
+    - 배열마다 따로 할당하지 않으므로 할당/객체 오버헤드가 없고, 평가기 하나의 모범 동작이 메모리에 붙어 있음
+    - dtype=np.float32로 만들면 메모리가 절반으로 줄어듦. dtaidistance C 구현은 float64만 받으므로
+      dtw 계산 때 실제로 비교하는 모범 동작만 하나씩 float64 임시 배열로 변환함 (가지치기로 건너뛴 모범 동작은 변환하지 않음)
+    - float32의 허용 오차: 값마다 상대 오차 2^-24(약 6e-8) 이하로 반올림되므로 dtw 거리의 상대 오차도 같은 수준이고,
+      점수(0~100점)는 float64와 0.0001점 이내로 같음 (bench_reference_memory로 확인)
+    """
+
+    def __init__(self, buffer: np.ndarray, offsets: list, shapes: list):
+        self.buffer = buffer
+        self.offsets = offsets
+        self.shapes = shapes
+        self.dtype = buffer.dtype
+
+    # 배열 목록을 하나의 버퍼로 모으는 메서드 (dtype 변환과 복사를 한 번에 함)
+    @classmethod
+    def pack(cls, arrays, dtype=np.float64):
+        dtype = np.dtype(dtype)
+        step = max(1, ARENA_ALIGNMENT // dtype.itemsize)
+        offsets, shapes, total = [], [], 0
+        for array in arrays:
+            offsets.append(total)
+            shapes.append(tuple(np.shape(array)))
+            total += -(-int(np.prod(np.shape(array))) // step) * step
+        buffer = np.empty(total, dtype=dtype)
+        for array, offset, shape in zip(arrays, offsets, shapes):
+            size = int(np.prod(shape))
+            buffer[offset:offset + size] = np.asarray(array).reshape(-1)
+        return cls(buffer, offsets, shapes)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    # 버퍼를 가리키는 배열 목록 (복사 없음). dtype이 버퍼와 다르면 버퍼 전체를 한 번 변환한 새 배열을 가리킴
+    def as_arrays(self, dtype=None) -> list:
+        buffer = self.buffer
+        if dtype is not None and np.dtype(dtype) != buffer.dtype:
+            buffer = buffer.astype(dtype)
+        return [
+            buffer[offset:offset + int(np.prod(shape))].reshape(shape)
+            for offset, shape in zip(self.offsets, self.shapes)
+        ]
+
+    @property
+    def nbytes(self) -> int:
+        return self.buffer.nbytes
 
 # 동작을 평가하는 실질적인 함수(해당 클래스가 처음 만들어질 때 실행되는 부분)
 class MotionEvaluator:
-    def __init__(self, reference_motion_name):
+    def __init__(self, reference_motion_name, dtw_workers: int = None, use_pruning: bool = None, references=None, reference_dtype=None):
         # 동작 이름
         self.reference_motion_name = reference_motion_name
+        # dtw 거리를 계산할 때 사용할 병렬 작업자(스레드) 수. 지정하지 않으면 settings.AI_DTW_WORKERS 사용
+        if dtw_workers is None:
+            dtw_workers = getattr(settings, "AI_DTW_WORKERS", 1)
+        self.dtw_workers = max(1, int(dtw_workers))
+        # LB_Keogh 하한과 조기 중단(max_dist)으로 dtw 계산을 줄일지 여부. 지정하지 않으면 settings.AI_DTW_PRUNING 사용
+        if use_pruning is None:
+            use_pruning = getattr(settings, "AI_DTW_PRUNING", False)
+        self.use_pruning = bool(use_pruning)
+        # 모범 동작 배열을 보관할 자료형 (float64 또는 float32). 지정하지 않으면 settings.AI_REFERENCE_DTYPE 사용
+        if reference_dtype is None:
+            reference_dtype = getattr(settings, "AI_REFERENCE_DTYPE", "float64")
+        self.reference_dtype = np.dtype(reference_dtype)
+        # 가지치기 통계: 비교한 쌍 수, 하한만으로 건너뛴 쌍 수, 계산 도중 중단된 쌍 수
+        # 평가기는 여러 스레드가 함께 쓰므로, 호출마다 따로 센 뒤 잠금을 잡고 합침
+        self.pruning_stats = {"pairs": 0, "lb_pruned": 0, "early_abandoned": 0}
+        self._pruning_stats_lock = threading.Lock()
         # 모델에서 모범 동작만 가져오도록 수정
-        self.reference_motion_preprocessed = self.load_reference_move(score_category="reference")
+        # references를 넘기면(이미 읽은 배열 목록 또는 ReferenceArena) DB를 읽지 않고 그대로 사용
+        if references is None:
+            references = ReferenceArena.pack(self.load_reference_move(score_category="reference"), self.reference_dtype)
+        # DB에서 읽은 모범 동작은 하나의 버퍼(ReferenceArena)에 보관하고, 배열 목록은 그 버퍼를 가리키기만 함
+        self.reference_arena = references if isinstance(references, ReferenceArena) else None
+        if self.reference_arena is not None:
+            self.reference_motion_preprocessed = self.reference_arena.as_arrays()
+        else:
+            self.reference_motion_preprocessed = list(references)
+        # 가지치기를 사용할 때는 모범 동작별 엔벨로프를 미리 계산해 둠 (모범 동작과 같은 자료형)
+        self.reference_envelopes = []
+        if self.use_pruning:
+            self.reference_envelopes = [dtw_envelope(ref_data) for ref_data in self.reference_motion_preprocessed]
     
     # db로부터 모범 동작 데이터를 불러와서 전처리된 numpy 배열 리스트로 반환하는 메서드
+    # 바로 ReferenceArena로 복사하므로 바이너리 캐시를 복사 없이(읽기 전용으로) 읽음
     def load_reference_move(self, score_category):
+        # 바이너리 캐시(sensor_data_npy)를 읽으므로 JSON 컬럼은 필요할 때만 불러오도록 미룸
         reference_records = MotionRecording.objects.filter(
             motion_type__motion_name=self.reference_motion_name,
             score_category=score_category
-        )
+        ).defer("sensor_data_json")
         preprocessed_motion = []
         for record in reference_records:
-            numpy_data = record.get_sensor_data_to_numpy()
+            numpy_data = record.get_sensor_data_to_numpy(copy=False)
             if numpy_data.size > 0:
                 preprocessed_motion.append(numpy_data)
         return preprocessed_motion
+
+    # dtw 계산에 넘길 idx번째 모범 동작 배열 (dtaidistance C 구현은 float64만 받음)
+    # float32로 보관 중이면 이 모범 동작만 float64로 변환한 임시 배열을 만듦 (float32 -> float64 변환은 값이 바뀌지 않음, float64면 복사 없음)
+    # 버퍼 전체를 변환해서 보관하면 float32로 줄인 메모리가 다시 늘어나므로, 비교할 때마다 필요한 만큼만 변환함
+    def _dtw_reference(self, idx: int) -> np.ndarray:
+        return np.asarray(self.reference_motion_preprocessed[idx], dtype=np.float64)
+
+    # 모든 모범 동작을 차례로 float64로 넘기는 이터레이터 (하나씩 변환하므로 임시 배열이 한꺼번에 남지 않는 순차 계산용)
+    def _dtw_references(self):
+        return (self._dtw_reference(idx) for idx in range(len(self.reference_motion_preprocessed)))
     
     # 사용자의 데이터를 전처리하는 메서드
-    def preprocess_user_data(self, user_raw_data):
-        return preprocess_sensor_data(user_raw_data)
+    def preprocess_user_data(self, user_raw_data, channels=None):
+        return preprocess_sensor_data(user_raw_data, channels)
 
-    # 사용자의 동작을 실제로 평가하는 메인 함수
-    def evaluator_user_motion(self, user_raw_data, max_dtw_distance: float):
-        # 사용자의 원본 데이터(user_raw_data_df) 전처리
-        preprocessed_user_data = self.preprocess_user_data(user_raw_data)
+    # 사용자 데이터와 모든 모범 동작 사이의 dtw 거리를 한 번의 C 호출(distance_matrix의 block)로 계산하는 메서드
+    # dtw_workers가 2 이상이면 OpenMP 스레드로 병렬 계산함
+    def compute_dtw_distances(self, preprocessed_user_data):
+        num_references = len(self.reference_motion_preprocessed)
+        if num_references == 0:
+            return []
 
-        if not self.reference_motion_preprocessed:
-            return {"error": "모범 동작 데이터가 없습니다ㅜㅠ"}
+        # 모든 모범 동작과 비교하므로 distance_matrix에 한 번에 넘기려면 모두 float64여야 함
+        series = [preprocessed_user_data, *self._dtw_references()]
+        try:
+            with dtw_thread_limits(self.dtw_workers):
+                # block=((0, 1), (1, n + 1)): 0번(사용자) 행과 나머지(모범 동작) 열 사이의 거리만 계산
+                distances = dtw_ndim.distance_matrix(
+                    series,
+                    window=DTW_WINDOW,
+                    block=((0, 1), (1, num_references + 1)),
+                    compact=True,
+                    use_c=True,
+                    parallel=self.dtw_workers > 1,
+                )
+            return [float(distance) for distance in distances]
+        except Exception as e:
+            # C 라이브러리를 쓸 수 없거나 채널 수가 다른 데이터가 섞여 있으면 모범 동작별로 하나씩 계산
+            print(f"dtw 거리 일괄 계산 실패, 순차 계산으로 전환: {e}")
+            return self.compute_dtw_distances_serial(preprocessed_user_data)
 
+    # 모범 동작마다 하나씩 dtw 거리를 계산하는 메서드 (오류가 난 모범 동작은 건너뜀)
+    def compute_dtw_distances_serial(self, preprocessed_user_data):
         dtw_distances = []
-        for ref_data in self.reference_motion_preprocessed:
+        for ref_data in self._dtw_references():
             try:
-                dtw_distance = dtw_ndim.distance(preprocessed_user_data, ref_data, window=10)
+                dtw_distance = dtw_ndim.distance(preprocessed_user_data, ref_data, window=DTW_WINDOW)
                 dtw_distances.append(dtw_distance)
             except Exception as e:
                 print(f"dtw 거리 계산 중 오류 발생: {e}")
                 continue
+        return dtw_distances
+
+    # 가지치기를 적용해서 dtw 거리를 계산하는 메서드
+    # 평균 거리가 max_dtw_distance 이상이면 점수는 어차피 0점이므로, 그 사실이 확정되는 순간 계산을 멈춤
+    # 반환 값: (거리 리스트, 0점 확정 여부). 0점이 확정되면 거리 리스트의 일부는 실제 거리 대신 하한 값임
+    def compute_dtw_distances_pruned(self, preprocessed_user_data, max_dtw_distance: float):
+        stats = {"pairs": 0, "lb_pruned": 0, "early_abandoned": 0}
+        try:
+            return self._compute_dtw_distances_pruned(preprocessed_user_data, max_dtw_distance, stats)
+        finally:
+            with self._pruning_stats_lock:
+                for key, value in stats.items():
+                    self.pruning_stats[key] += value
+
+    def _compute_dtw_distances_pruned(self, preprocessed_user_data, max_dtw_distance: float, stats: dict):
+        num_references = len(self.reference_motion_preprocessed)
+        stats["pairs"] += num_references
+
+        # 평균이 max_dtw_distance 이상이 되는 거리 합계
+        budget = max_dtw_distance * num_references
+        lower_bounds = [lb_keogh(preprocessed_user_data, envelope) for envelope in self.reference_envelopes]
+        remaining_lb = sum(lower_bounds)
+
+        # 1. 하한의 합만으로도 0점이 확정되면 dtw를 하나도 계산하지 않음
+        if remaining_lb >= budget:
+            stats["lb_pruned"] += num_references
+            return lower_bounds, True
+
+        # 2. 하한이 작은(가까울 가능성이 높은) 모범 동작부터 실제 dtw 계산
+        #    남은 예산을 max_dist로 넘겨서, 예산을 넘는 순간 dtaidistance가 계산을 중단(inf 반환)하도록 함
+        dtw_distances = []
+        total = 0.0
+        order = sorted(range(num_references), key=lambda idx: lower_bounds[idx])
+        for position, idx in enumerate(order):
+            remaining_lb -= lower_bounds[idx]
+            max_dist = budget - total - remaining_lb
+            distance = dtw_ndim.distance(
+                preprocessed_user_data,
+                self._dtw_reference(idx),
+                window=DTW_WINDOW,
+                max_dist=max_dist,
+                use_c=True,
+            )
+            if distance == float("inf"):
+                stats["early_abandoned"] += 1
+                stats["lb_pruned"] += num_references - position - 1
+                # 중단된 쌍과 남은 쌍은 하한 값으로 채워서 반환
+                rest = [lower_bounds[i] for i in order[position:]]
+                rest[0] = max(rest[0], max_dist)
+                return dtw_distances + rest, True
+            dtw_distances.append(distance)
+            total += distance
+
+        return dtw_distances, False
+
+    # 사용자의 동작을 실제로 평가하는 메인 함수
+    def evaluator_user_motion(self, user_raw_data, max_dtw_distance: float, channels=None):
+        # 사용자의 원본 데이터(user_raw_data_df) 전처리
+        preprocessed_user_data = self.preprocess_user_data(user_raw_data, channels)
+        return self.evaluate_preprocessed(preprocessed_user_data, max_dtw_distance)
+
+    # 이미 전처리된 사용자 데이터를 평가하는 메서드 (전처리 결과를 PCA 등 다른 곳에서도 쓰는 경우 전처리를 한 번만 하기 위함)
+    def evaluate_preprocessed(self, preprocessed_user_data, max_dtw_distance: float):
+        if not self.reference_motion_preprocessed:
+            return {"error": "모범 동작 데이터가 없습니다ㅜㅠ"}
+
+        pruned = False
+        if self.use_pruning and max_dtw_distance > 0:
+            try:
+                dtw_distances, pruned = self.compute_dtw_distances_pruned(preprocessed_user_data, max_dtw_distance)
+            except Exception as e:
+                print(f"dtw 가지치기 계산 실패, 전체 계산으로 전환: {e}")
+                dtw_distances = self.compute_dtw_distances(preprocessed_user_data)
+        else:
+            dtw_distances = self.compute_dtw_distances(preprocessed_user_data)
 
         if not dtw_distances:
             return {"error": "모든 모범 동작과 비교 중 오류가 발생하여 dtw 거리를 계산할 수 없습니다."}
 
         average_dtw_distance = sum(dtw_distances) / len(dtw_distances)
+        if pruned:
+            # 하한 값의 합으로 계산한 평균이 반올림 오차로 max_dtw_distance보다 작아지지 않도록 보정
+            average_dtw_distance = max(average_dtw_distance, max_dtw_distance)
 
         # 정규화 시, 외부에서 받은 max_dtw_distance 값을 사용
         if max_dtw_distance <= 0:
@@ -150,12 +529,16 @@ class MotionEvaluator:
         accuracy_percentage = max(0, (1 - normalized_distance)) * 100
         accuracy_percentage = min(100, accuracy_percentage)
 
-        return {
+        result = {
             "evaluator_motion_name": self.reference_motion_name,
             "score": accuracy_percentage,
             "avg_dtw_distance": average_dtw_distance, # 디버깅 및 분석을 위해 추가 정보 반환
             "normalized_distance": normalized_distance,
         }
+        if self.use_pruning:
+            # True이면 0점이 확정되어 계산을 중단했으므로 avg_dtw_distance는 실제 평균의 하한임
+            result["dtw_pruned"] = pruned
+        return result
         
 if __name__ == "__main__":
     print("센서 데이터 기반 평가 시스템 시작")
@@ -1,7 +1,8 @@
 # ai/serializers.py
 
 from rest_framework import serializers
-from .models import UserRecording, MotionRecording, MotionType, SensorDevice
+from .streaming import ChunkFormatError, SensorFrames, decode_base64_columnar, validate_channels
+from .models import UserRecording, MotionRecording, MotionType, SensorDevice, BackgroundJob
 
 class MotionTypeSerializer(serializers.ModelSerializer):
     """MotionType 모델 관리를 위한 serializer"""
@@ -23,17 +24,65 @@ class SensorDeviceSerializer(serializers.ModelSerializer):
 
 class UserRecordingSerializer(serializers.ModelSerializer):
     """UserRecording 모델 관리를 위한 serializer"""
+    # 모델 필드가 아니라 압축 컬럼(sensor_data_compressed)을 읽고 쓰는 속성이므로 직접 선언
+    sensor_data_json = serializers.JSONField(required=False, allow_null=True)
+
     class Meta:
         model = UserRecording
         fields = ["id", "user", "motion_type", "score", "sensor_data_json", "recorded_at"]
         read_only_fields = ["id", "recorded_at"]
 
+class SensorDataField(serializers.Field):
+    """
+    sensorData 필드. 아래 세 가지 형식을 받음
+    1. 프레임 딕셔너리 리스트: [{"flex1": 0.1, ...}, ...] -> 리스트 그대로 반환
+    2. base64 컬럼형: {"channels": [...], "dtype": "<f4", "data": "<base64>"} -> SensorFrames 반환
+    3. SensorFramesParser(application/x-sensor-frames)가 이미 변환한 SensorFrames -> 그대로 반환
+    """
+    def to_internal_value(self, data):
+        if isinstance(data, SensorFrames):
+            return data
+        if isinstance(data, dict):
+            try:
+                return decode_base64_columnar(data)
+            except ChunkFormatError as e:
+                raise serializers.ValidationError(str(e))
+        # sensorData가 '딕셔셔너리들의 리스트' 형태인지만 검증.
+        return serializers.ListField(child=serializers.DictField()).run_validation(data)
+
+    def to_representation(self, value):
+        return value
+
 class EvaluationRequestSerializer(serializers.Serializer):
     """Unity로부터 평가 요청을 받을 때의 전체 데이터 형식"""
     motionName = serializers.CharField()
     empNo = serializers.CharField()
-    # sensorData가 '딕셔셔너리들의 리스트' 형태인지만 검증.
-    sensorData = serializers.ListField(child=serializers.DictField())
+    sensorData = SensorDataField()
+
+class EvaluationBatchRequestSerializer(serializers.Serializer):
+    """ 여러 평가 요청을 한 번에 받을 때의 데이터 형식. 각 항목은 EvaluationRequestSerializer로 따로 검증함 """
+    items = serializers.ListField(child=serializers.DictField(), min_length=1)
+
+    def validate_items(self, value):
+        from django.conf import settings
+
+        max_items = getattr(settings, "AI_BATCH_MAX_ITEMS", 100)
+        if len(value) > max_items:
+            raise serializers.ValidationError(f"한 번에 최대 {max_items}개까지 평가할 수 있습니다.")
+        return value
+
+class EvaluationSessionCreateSerializer(serializers.Serializer):
+    """ 스트리밍(청크) 평가 세션을 열 때의 데이터 형식 """
+    motionName = serializers.CharField()
+    empNo = serializers.CharField()
+    # 청크의 각 프레임에 들어있는 채널 이름 순서
+    channels = serializers.ListField(child=serializers.CharField(), min_length=1)
+
+    def validate_channels(self, value):
+        try:
+            return validate_channels(value)
+        except ChunkFormatError as e:
+            raise serializers.ValidationError(str(e))
 
 class MotionSerializer(serializers.ModelSerializer):
     """ 모델 관리를 위한 serializer"""
@@ -47,7 +96,7 @@ class MotionSerializer(serializers.ModelSerializer):
         max_length=20,
     )
 
-    sensorData = serializers.JSONField(write_only=True)
+    sensorData = SensorDataField(write_only=True)
 
     class Meta:
         model = MotionRecording
@@ -60,11 +109,32 @@ class MotionSerializer(serializers.ModelSerializer):
             "recorded_at"
         ]
         read_only_fields = ["id", "data_frames", "recorded_at"]
+
+    def validate_sensorData(self, value):
+        # 모범/기준 동작은 모든 프레임이 같은 채널을 가져야 함 (빠진 채널을 NaN으로 채우면 dtw 거리가 NaN이 됨)
+        if isinstance(value, list) and value:
+            channels = value[0].keys()
+            for index, frame in enumerate(value):
+                if frame.keys() != channels:
+                    raise serializers.ValidationError(f"{index}번째 프레임의 채널이 첫 프레임과 다릅니다. 모든 프레임에 같은 채널이 있어야 합니다.")
+        return value
     
     def create(self, validated_data):
         from .safty_training_ai import preprocess_sensor_data
         raw_sensor_data = validated_data.pop("sensorData")
-        preprocessed_numpy = preprocess_sensor_data(raw_sensor_data)
+        if isinstance(raw_sensor_data, SensorFrames):
+            preprocessed_numpy = preprocess_sensor_data(raw_sensor_data.array, raw_sensor_data.channels)
+        else:
+            preprocessed_numpy = preprocess_sensor_data(raw_sensor_data)
         validated_data["sensor_data_json"] = preprocessed_numpy.tolist()
         validated_data["data_frames"] = preprocessed_numpy.shape[0]
         return super().create(validated_data)
+
+class BackgroundJobSerializer(serializers.ModelSerializer):
+    """ 백그라운드 작업(max_dtw_distance 재계산 등)의 상태 조회용 serializer """
+    motionName = serializers.CharField(source="motion_type.motion_name", read_only=True)
+
+    class Meta:
+        model = BackgroundJob
+        fields = ["id", "kind", "status", "progress", "motionName", "result", "error", "created_at", "started_at", "finished_at"]
+        read_only_fields = fields
@@ -0,0 +1,87 @@
+# ai/signals.py
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from organizations.models import Company
+from .api_key_cache import api_key_cache
+from .models import BackgroundJob, LatestUserRecording, MotionType, MotionRecording, SensorDevice, UserRecording
+
+
+@receiver(post_save, sender=MotionRecording)
+@receiver(post_delete, sender=MotionRecording)
+def bump_motion_data_revision(sender, instance, **kwargs):
+    """ 모범/0점 동작 데이터가 바뀌면 해당 MotionType의 data_revision을 올려서 캐시된 평가기를 무효화 """
+    MotionType.objects.filter(pk=instance.motion_type_id).update(data_revision=F("data_revision") + 1)
+
+
+@receiver(post_delete, sender=MotionRecording)
+def recalibrate_after_recording_delete(sender, instance, **kwargs):
+    """
+    기록이 삭제되면 저장된 쌍별 최대 거리가 더 이상 맞지 않으므로 지우고, 커밋 후 전체 재계산 작업을 큐에 넣음
+    (MotionType 자체가 삭제되는 경우는 건너뜀)
+    쿼리셋으로 여러 기록을 한 번에 지우면 기록마다 호출되므로, 삭제 이후에 만든 전체 재계산 작업이 이미 있으면 더 넣지 않음
+    """
+    MotionType.objects.filter(pk=instance.motion_type_id).update(max_pair_dtw_distance=None)
+    deleted_at = timezone.now()
+
+    def recalibrate():
+        from .jobs import enqueue_calibration_job
+
+        motion_type = MotionType.objects.filter(pk=instance.motion_type_id).first()
+        if motion_type is None:
+            return
+        already_enqueued = BackgroundJob.objects.filter(
+            kind=BackgroundJob.Kind.CALIBRATE_MAX_DTW,
+            motion_type=motion_type,
+            recording__isnull=True,
+            created_at__gte=deleted_at,
+        ).exists()
+        if not already_enqueued:
+            enqueue_calibration_job(motion_type)
+
+    transaction.on_commit(recalibrate)
+
+
+@receiver(post_save, sender=SensorDevice)
+@receiver(post_delete, sender=SensorDevice)
+def invalidate_device_api_key(sender, instance, **kwargs):
+    """
+    디바이스가 비활성화/삭제되거나 API 키가 바뀌면 API 키 캐시에서 제거
+    커밋 전에 지우면 그사이 다른 요청이 커밋 전 값을 다시 캐시할 수 있으므로 커밋 후에 지움
+    """
+    transaction.on_commit(lambda: api_key_cache.invalidate_device(instance))
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def invalidate_company_api_keys(sender, instance, **kwargs):
+    """ 회사 정보가 바뀌면 캐시된 디바이스에 붙은 회사 정보도 오래된 것이므로 제거 """
+    company_id = instance.pk
+    transaction.on_commit(lambda: api_key_cache.invalidate_company(company_id))
+
+
+@receiver(post_save, sender=UserRecording)
+def update_latest_user_recording(sender, instance, created, **kwargs):
+    """ 새 평가 기록이 저장되면 직원 x 동작별 최근 기록 요약 테이블을 갱신 (기존 기록을 고치면 점수만 맞춤) """
+    if created:
+        LatestUserRecording.record([instance])
+    else:
+        LatestUserRecording.objects.filter(recording_id=instance.pk).update(score=instance.score)
+
+
+@receiver(post_delete, sender=UserRecording)
+def refresh_latest_user_recording(sender, instance, origin=None, **kwargs):
+    """
+    최근 기록으로 가리키던 평가 기록이 삭제되면(recording이 NULL이 됨) 남은 기록 중 가장 최근 것으로 다시 채움
+    직원/동작/회사를 삭제하면서 함께 지워지는 경우는 요약 행도 함께 삭제되므로 건너뜀
+    """
+    if origin is not None and not isinstance(origin, UserRecording) and getattr(origin, "model", None) is not UserRecording:
+        return
+    stale = LatestUserRecording.objects.filter(
+        user_id=instance.user_id, motion_type_id=instance.motion_type_id, recording__isnull=True
+    )
+    if stale.exists():
+        LatestUserRecording.refresh(instance.user_id, instance.motion_type_id)
@@ -0,0 +1,177 @@
+# ai/streaming.py
+import base64
+import json
+from datetime import timedelta
+from typing import NamedTuple
+
+import numpy as np
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import EvaluationSession, EvaluationSessionChunk
+from .safty_training_ai import sensor_channel_range
+
+# 청크를 DB에 저장할 때의 자료형 (JSON 경로와 같은 float64, little-endian)
+CHUNK_DTYPE = np.dtype("<f8")
+# 바이너리 청크로 받을 때의 자료형 (float32, little-endian)
+BINARY_CHUNK_DTYPE = np.dtype("<f4")
+
+
+# 컬럼형 바이너리 형식에서 허용하는 자료형
+COLUMNAR_DTYPES = {"<f4": np.dtype("<f4"), "<f8": np.dtype("<f8")}
+
+
+class ChunkFormatError(ValueError):
+    """ 청크 본문을 센서 프레임으로 해석할 수 없을 때 발생 """
+
+
+class SessionNotOpenError(Exception):
+    """ 이미 종료(중)인 세션에 청크를 추가하려 할 때 발생 """
+
+
+class SessionFrameLimitError(Exception):
+    """ 청크를 추가하면 세션의 최대 프레임 수를 넘을 때 발생 """
+
+    def __init__(self, max_frames: int):
+        super().__init__(f"세션의 최대 프레임 수({max_frames})를 넘었습니다.")
+        self.max_frames = max_frames
+
+
+class SensorFrames(NamedTuple):
+    """ 컬럼형 바이너리 형식으로 받은 센서 데이터: (프레임 수, 채널 수) 배열 + 채널 이름 목록 """
+    array: np.ndarray
+    channels: list
+
+
+def _check_finite(data: np.ndarray) -> np.ndarray:
+    if not np.isfinite(data).all():
+        raise ChunkFormatError("청크에 NaN 또는 무한대 값이 들어있습니다.")
+    return data
+
+
+def validate_channels(channels) -> list:
+    """ 채널 이름 목록을 확인해서 그대로 반환. 비어 있거나, 이름이 겹치거나, 정규화 범위를 모르는 채널이 있으면 ChunkFormatError """
+    if not isinstance(channels, (list, tuple)) or not channels or not all(isinstance(channel, str) for channel in channels):
+        raise ChunkFormatError("channels는 채널 이름(문자열) 목록이어야 합니다.")
+    if len(set(channels)) != len(channels):
+        raise ChunkFormatError("channels에 같은 채널 이름이 여러 번 들어있습니다.")
+    unknown = [channel for channel in channels if sensor_channel_range(channel) is None]
+    if unknown:
+        raise ChunkFormatError(f"알 수 없는 센서 채널입니다: {', '.join(unknown)}")
+    return channels
+
+
+def parse_ndjson_chunk(body: bytes, channels: list) -> np.ndarray:
+    """
+    JSON lines 청크를 (프레임 수, 채널 수) 배열로 변환.
+    각 줄은 {"flex1": 0.1, ...} 형태의 딕셔너리 또는 channels 순서의 값 리스트 [0.1, ...]
+    (숫자 하나만 있는 줄은 모든 채널에 복사되므로 받지 않음)
+    """
+    lines = [line for line in body.splitlines() if line.strip()]
+    data = np.empty((len(lines), len(channels)), dtype=CHUNK_DTYPE)
+    for i, line in enumerate(lines):
+        try:
+            frame = json.loads(line)
+            if isinstance(frame, dict):
+                data[i] = [frame[channel] for channel in channels]
+            elif isinstance(frame, list):
+                data[i] = frame
+            else:
+                raise TypeError("프레임은 딕셔너리 또는 리스트여야 합니다.")
+        except (ValueError, KeyError, TypeError) as e:
+            raise ChunkFormatError(f"{i + 1}번째 줄을 해석할 수 없습니다: {e}")
+    return _check_finite(data)
+
+
+def parse_binary_chunk(body: bytes, channels: list) -> np.ndarray:
+    """ little-endian float32 행렬(프레임 순서, 채널 순서) 청크를 (프레임 수, 채널 수) 배열로 변환 """
+    row_bytes = BINARY_CHUNK_DTYPE.itemsize * len(channels)
+    if len(body) % row_bytes != 0:
+        raise ChunkFormatError(f"바이너리 청크 크기({len(body)} bytes)가 프레임 크기({row_bytes} bytes)의 배수가 아닙니다.")
+    return _check_finite(np.frombuffer(body, dtype=BINARY_CHUNK_DTYPE).reshape(-1, len(channels)))
+
+
+def append_chunk(session: EvaluationSession, frames: np.ndarray, max_frames: int = None) -> EvaluationSessionChunk:
+    """
+    청크를 세션 뒤에 이어 붙이고 세션의 프레임/청크 수를 늘림
+    세션이 열려 있지 않으면 SessionNotOpenError, max_frames를 넘으면 SessionFrameLimitError
+    """
+    with transaction.atomic():
+        # 같은 세션에 청크가 동시에 들어와도 seq가 겹치지 않도록 세션 행을 잠금
+        # 상태와 프레임 수도 잠근 뒤에 확인해야 동시에 들어온 청크들이 함께 한도를 넘거나 종료된 세션에 붙지 않음
+        locked = EvaluationSession.objects.select_for_update().get(pk=session.pk)
+        if locked.status != EvaluationSession.Status.OPEN:
+            raise SessionNotOpenError("이미 종료된 평가 세션입니다.")
+        if max_frames is not None and locked.frame_count + frames.shape[0] > max_frames:
+            raise SessionFrameLimitError(max_frames)
+        chunk = EvaluationSessionChunk.objects.create(
+            session=locked,
+            seq=locked.chunk_count,
+            frame_count=frames.shape[0],
+            data=np.ascontiguousarray(frames, dtype=CHUNK_DTYPE).tobytes(),
+        )
+        EvaluationSession.objects.filter(pk=session.pk).update(
+            chunk_count=F("chunk_count") + 1,
+            frame_count=F("frame_count") + frames.shape[0],
+            updated_at=timezone.now(),
+        )
+    session.refresh_from_db(fields=["chunk_count", "frame_count", "updated_at"])
+    return chunk
+
+
+def expire_stale_sessions(older_than_seconds: float) -> int:
+    """
+    older_than_seconds 동안 청크가 들어오지 않은 열린 세션과,
+    종료(평가) 도중 프로세스가 죽어서 결과 없이 남은 세션을 청크와 함께 삭제. 삭제한 세션 수 반환
+    """
+    threshold = timezone.now() - timedelta(seconds=older_than_seconds)
+    stale = EvaluationSession.objects.filter(
+        Q(status=EvaluationSession.Status.OPEN, updated_at__lt=threshold)
+        | Q(status=EvaluationSession.Status.FINALIZED, result__isnull=True, finalized_at__lt=threshold)
+    )
+    # 청크는 CASCADE로 함께 삭제됨
+    _, deleted = stale.delete()
+    return deleted.get(EvaluationSession._meta.label, 0)
+
+
+def assemble_session_frames(session: EvaluationSession) -> np.ndarray:
+    """ 세션의 모든 청크를 미리 할당한 하나의 (프레임 수, 채널 수) 배열에 순서대로 복사 """
+    num_channels = len(session.channels)
+    frames = np.empty((session.frame_count, num_channels), dtype=CHUNK_DTYPE)
+
+    offset = 0
+    chunks = EvaluationSessionChunk.objects.filter(session=session).order_by("seq").values_list("frame_count", "data")
+    for frame_count, data in chunks.iterator(chunk_size=20):
+        frames[offset:offset + frame_count] = np.frombuffer(data, dtype=CHUNK_DTYPE).reshape(frame_count, num_channels)
+        offset += frame_count
+
+    return frames[:offset]
+
+
+def decode_columnar_frames(buffer, channels: list, dtype: str = "<f4", offset: int = 0) -> SensorFrames:
+    """
+    채널 이름 목록 + little-endian 행렬(프레임 순서, channels 순서) 버퍼를 복사 없이(np.frombuffer) SensorFrames로 변환
+    """
+    # JSON에서 온 값이므로 문자열이 아닐 수 있음 (리스트 등은 dict 조회에서 TypeError가 나므로 먼저 확인)
+    if not isinstance(dtype, str) or dtype not in COLUMNAR_DTYPES:
+        raise ChunkFormatError(f"지원하지 않는 dtype입니다: {dtype} (가능한 값: {', '.join(COLUMNAR_DTYPES)})")
+    validate_channels(channels)
+
+    np_dtype = COLUMNAR_DTYPES[dtype]
+    row_bytes = np_dtype.itemsize * len(channels)
+    size = len(buffer) - offset
+    if size <= 0 or size % row_bytes != 0:
+        raise ChunkFormatError(f"센서 데이터 크기({size} bytes)가 프레임 크기({row_bytes} bytes)의 배수가 아닙니다.")
+
+    array = np.frombuffer(buffer, dtype=np_dtype, offset=offset).reshape(-1, len(channels))
+    return SensorFrames(_check_finite(array), list(channels))
+
+
+def decode_base64_columnar(payload: dict) -> SensorFrames:
+    """ JSON 안의 {"channels": [...], "dtype": "<f4", "data": "<base64>"} 형식을 SensorFrames로 변환 """
+    try:
+        buffer = base64.b64decode(payload["data"], validate=True)
+    except (KeyError, TypeError, ValueError) as e:
+        raise ChunkFormatError(f"data는 base64 문자열이어야 합니다: {e}")
+    return decode_columnar_frames(buffer, payload.get("channels"), payload.get("dtype", "<f4"))
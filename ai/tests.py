@@ -1,3 +1,1148 @@
-from django.test import TestCase
+import asyncio
+import base64
+import importlib
+import io
+import json
+import multiprocessing
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from dtaidistance import dtw_ndim
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import Max
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.test import APIClient
+
+from benchmarks.fixtures import make_synthetic_frames, preprocess_sensor_data_pandas
+from courses.models import Course
+from enrollments.models import Enrollment
+from organizations.models import Company, Employee
+
+from .api_key_cache import APIKeyCache, api_key_cache, get_active_device
+from .evaluation_pool import EvaluationPool, EvaluationPoolUnavailable, EvaluationQueueFull, _init_worker
+from .evaluator_cache import EvaluatorCache, evaluator_cache, get_evaluator, prefork_warm_up
+from .jobs import claim_next_job, enqueue_calibration_job, requeue_stale_jobs, run_job
+from .logic import (
+    _max_pairwise_dtw, _max_pairwise_dtw_pruned, get_evaluation_graph_data, get_motion_projection, run_evaluation_batch,
+    update_max_dtw_for_motion,
+)
+from .models import (
+    decode_graph_series, encode_graph_series,
+    BackgroundJob, EvaluationSession, EvaluationSessionChunk, LatestUserRecording, MotionRecording, MotionType, SensorDevice,
+    UserRecording,
+)
+from .safty_training_ai import (
+    MotionEvaluator, ReferenceArena, fit_projection_axis, lttb_downsample, preprocess_sensor_data, sensor_dicts_to_numpy,
+)
+from .parsers import SensorFramesParser
+from .serializers import EvaluationRequestSerializer, MotionSerializer
+from .views import parse_evaluation_body
+from .streaming import (
+    ChunkFormatError, SensorFrames, SessionFrameLimitError, SessionNotOpenError, append_chunk, expire_stale_sessions,
+    parse_ndjson_chunk,
+)
+
+
+def _create_job(motion_type, status=BackgroundJob.Status.QUEUED):
+    return BackgroundJob.objects.create(kind=BackgroundJob.Kind.CALIBRATE_MAX_DTW, motion_type=motion_type, status=status)
+
+
+class ClaimNextJobTests(TestCase):
+    def setUp(self):
+        self.busy = MotionType.objects.create(motion_name="busy")
+        self.idle = MotionType.objects.create(motion_name="idle")
+
+    def test_claims_oldest_queued_job(self):
+        first = _create_job(self.busy)
+        _create_job(self.idle)
+
+        job = claim_next_job()
+
+        self.assertEqual(job.pk, first.pk)
+        self.assertEqual(job.status, BackgroundJob.Status.RUNNING)
+        self.assertIsNotNone(job.started_at)
+
+    def test_skips_motion_with_running_job(self):
+        _create_job(self.busy, status=BackgroundJob.Status.RUNNING)
+        _create_job(self.busy)
+        other = _create_job(self.idle)
+
+        self.assertEqual(claim_next_job().pk, other.pk)
+        # 두 동작 모두 처리 중이므로 더 가져갈 작업이 없음
+        self.assertIsNone(claim_next_job())
+
+
+class RequeueStaleJobsTests(TestCase):
+    def setUp(self):
+        self.motion_type = MotionType.objects.create(motion_name="stale")
+
+    def test_keeps_long_running_job_with_recent_heartbeat(self):
+        now = timezone.now()
+        job = _create_job(self.motion_type, status=BackgroundJob.Status.RUNNING)
+        BackgroundJob.objects.filter(pk=job.pk).update(started_at=now - timedelta(hours=1), heartbeat_at=now)
+
+        self.assertEqual(requeue_stale_jobs(600), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.Status.RUNNING)
+
+    def test_requeues_job_without_recent_heartbeat(self):
+        old = timezone.now() - timedelta(hours=1)
+        job = _create_job(self.motion_type, status=BackgroundJob.Status.RUNNING)
+        BackgroundJob.objects.filter(pk=job.pk).update(started_at=old, heartbeat_at=old)
+
+        self.assertEqual(requeue_stale_jobs(600), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.Status.QUEUED)
+        self.assertIsNone(job.heartbeat_at)
+
+
+class RunJobTests(TestCase):
+    def setUp(self):
+        self.motion_type = MotionType.objects.create(motion_name="run_job")
+
+    def _run_claimed_job(self, handler):
+        _create_job(self.motion_type)
+        job = claim_next_job()
+        with mock.patch.dict("ai.jobs.JOB_HANDLERS", {BackgroundJob.Kind.CALIBRATE_MAX_DTW: handler}):
+            run_job(job)
+        return BackgroundJob.objects.get(pk=job.pk)
+
+    def test_saves_result_of_claimed_job(self):
+        job = self._run_claimed_job(lambda job, progress: {"updated": True})
+
+        self.assertEqual(job.status, BackgroundJob.Status.SUCCEEDED)
+        self.assertEqual(job.result, {"updated": True})
+        self.assertEqual(job.progress, 100)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_keeps_job_requeued_while_running(self):
+        def handler(job, progress):
+            # 실행하는 동안 heartbeat가 끊긴 것으로 보고 다른 워커가 다시 대기시킴
+            BackgroundJob.objects.filter(pk=job.pk).update(status=BackgroundJob.Status.QUEUED, started_at=None, heartbeat_at=None)
+            progress(1, 2)
+            return {"updated": True}
+
+        job = self._run_claimed_job(handler)
+        self.assertEqual(job.status, BackgroundJob.Status.QUEUED)
+        self.assertIsNone(job.result)
+        self.assertIsNone(job.heartbeat_at)
+
+    def test_keeps_job_reclaimed_by_other_worker(self):
+        def handler(job, progress):
+            BackgroundJob.objects.filter(pk=job.pk).update(started_at=job.started_at + timedelta(seconds=1))
+            raise RuntimeError("실패")
+
+        job = self._run_claimed_job(handler)
+        self.assertEqual(job.status, BackgroundJob.Status.RUNNING)
+        self.assertEqual(job.error, "")
+        self.assertIsNone(job.finished_at)
+
+    def test_calibration_runs_in_process_by_default(self):
+        handler = mock.Mock(return_value={"updated": False})
+        with mock.patch.dict("ai.jobs.JOB_HANDLERS", {BackgroundJob.Kind.CALIBRATE_MAX_DTW: handler}):
+            job = enqueue_calibration_job(self.motion_type)
+
+        handler.assert_called_once()
+        self.assertEqual(BackgroundJob.objects.get(pk=job.pk).status, BackgroundJob.Status.SUCCEEDED)
+
+
+def _create_recording(motion_type, score_category, value=0.0, frames=5, channels=3):
+    return MotionRecording.objects.create(
+        motion_type=motion_type,
+        data_frames=frames,
+        score_category=score_category,
+        sensor_data_json=[[value] * channels for _ in range(frames)],
+    )
+
+
+@override_settings(AI_DTW_PRUNING=False)
+class UpdateMaxDtwTests(TestCase):
+    def setUp(self):
+        self.motion_type = MotionType.objects.create(motion_name="dtw", max_pair_dtw_distance=1.0, max_dtw_distance=1.1)
+        _create_recording(self.motion_type, "zero_score", value=1.0)
+        self.new_recording = _create_recording(self.motion_type, "reference")
+
+    def _compute_while_other_worker_saves(self, other_value, result):
+        """ 계산하는 동안 다른 워커가 더 큰 값을 저장한 상황을 흉내 냄 """
+        def compute(*args, **kwargs):
+            MotionType.objects.filter(pk=self.motion_type.pk).update(max_pair_dtw_distance=other_value)
+            return result, {"pairs": 1, "ub_pruned": 0}
+        return mock.patch("ai.logic._max_pairwise_dtw", side_effect=compute)
+
+    def test_incremental_update_keeps_concurrent_larger_value(self):
+        with self._compute_while_other_worker_saves(other_value=5.0, result=2.0):
+            update_max_dtw_for_motion(self.motion_type, new_recording=self.new_recording)
+
+        self.motion_type.refresh_from_db()
+        self.assertEqual(self.motion_type.max_pair_dtw_distance, 5.0)
+        self.assertAlmostEqual(self.motion_type.max_dtw_distance, 5.5)
+
+    def test_incremental_result_discarded_after_concurrent_reset(self):
+        # 계산 중에 기록 삭제 시그널이 기준값을 지운 경우
+        with self._compute_while_other_worker_saves(other_value=None, result=2.0):
+            self.assertIsNone(update_max_dtw_for_motion(self.motion_type, new_recording=self.new_recording))
+
+        self.motion_type.refresh_from_db()
+        self.assertIsNone(self.motion_type.max_pair_dtw_distance)
+
+
+@override_settings(AI_CALIBRATION_ASYNC=True)
+class RecalibrateAfterDeleteTests(TestCase):
+    def test_bulk_delete_enqueues_one_job_per_motion(self):
+        motion_type = MotionType.objects.create(motion_name="bulk_delete")
+        for _ in range(3):
+            _create_recording(motion_type, "zero_score")
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            MotionRecording.objects.filter(motion_type=motion_type).delete()
+
+        self.assertEqual(len(callbacks), 3)
+        self.assertEqual(BackgroundJob.objects.filter(motion_type=motion_type, recording__isnull=True).count(), 1)
+
+
+class EvaluationSessionTestMixin:
+    channels = ["flex1", "flex2", "gyro_x"]
+
+    def setUp(self):
+        company = Company.objects.create(name="session", biz_no="1112233333")
+        self.device = SensorDevice.objects.create(company=company, device_uid="device-1")
+        self.employee = Employee.objects.create(company=company, emp_no="S1", name="session")
+        self.motion_type = MotionType.objects.create(motion_name="session")
+        self.session = EvaluationSession.objects.create(
+            company=company, employee=self.employee, motion_type=self.motion_type, channels=self.channels
+        )
+        self.client = APIClient(HTTP_X_API_KEY=self.device.api_key)
+
+    def _append(self, frames=4):
+        return append_chunk(self.session, np.zeros((frames, len(self.channels))))
+
+
+class EvaluationSessionFinalizeTests(EvaluationSessionTestMixin, TestCase):
+    def _finalize(self):
+        return self.client.post(reverse("evaluation-session-finalize", args=[self.session.pk]))
+
+    def test_concurrent_finalize_scores_once(self):
+        self._append()
+        inner_responses = []
+
+        def evaluate(**kwargs):
+            # 평가하는 동안 같은 세션에 종료 요청이 한 번 더 들어옴
+            inner_responses.append(self._finalize())
+            return {"score": 50.0}
+
+        with mock.patch("ai.views.run_evaluation", side_effect=evaluate) as run_evaluation:
+            response = self._finalize()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(run_evaluation.call_count, 1)
+        self.assertEqual(inner_responses[0].status_code, 409)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.status, EvaluationSession.Status.FINALIZED)
+        self.assertEqual(self.session.result, {"score": 50.0})
+
+    def test_failed_evaluation_reopens_session(self):
+        self._append()
+
+        with mock.patch("ai.views.run_evaluation", return_value={"error": "평가 실패"}):
+            response = self._finalize()
+
+        self.assertEqual(response.status_code, 500)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.status, EvaluationSession.Status.OPEN)
+        self.assertIsNone(self.session.finalized_at)
+
+
+class AppendChunkTests(EvaluationSessionTestMixin, TestCase):
+    def test_rejects_chunk_over_frame_limit(self):
+        self._append(frames=4)
+        # 호출한 쪽의 세션 객체가 오래된 값이어도 잠근 행의 프레임 수로 확인함
+        self.session.frame_count = 0
+
+        with self.assertRaises(SessionFrameLimitError):
+            append_chunk(self.session, np.zeros((3, len(self.channels))), max_frames=6)
+
+        self.session.refresh_from_db()
+        self.assertEqual((self.session.frame_count, self.session.chunk_count), (4, 1))
+
+    def test_rejects_chunk_after_finalize(self):
+        EvaluationSession.objects.filter(pk=self.session.pk).update(status=EvaluationSession.Status.FINALIZED)
+
+        with self.assertRaises(SessionNotOpenError):
+            self._append()
+
+    def test_chunk_view_returns_413_over_limit(self):
+        with override_settings(AI_STREAM_MAX_FRAMES=2):
+            response = self.client.post(
+                reverse("evaluation-session-chunk", args=[self.session.pk]),
+                data=b"[0, 0, 0]\n[0, 0, 0]\n[0, 0, 0]\n",
+                content_type="application/x-ndjson",
+            )
+        self.assertEqual(response.status_code, 413)
+
+
+class StreamingFormatTests(EvaluationSessionTestMixin, TestCase):
+    def test_ndjson_rejects_scalar_line(self):
+        with self.assertRaises(ChunkFormatError):
+            parse_ndjson_chunk(b"[1, 2, 3]\n5\n", self.channels)
+
+    def test_ndjson_accepts_dict_and_list_lines(self):
+        frames = parse_ndjson_chunk(b'{"flex1": 1, "flex2": 2, "gyro_x": 3}\n[4, 5, 6]\n', self.channels)
+        self.assertEqual(frames.tolist(), [[1, 2, 3], [4, 5, 6]])
+
+    def test_session_rejects_unknown_and_duplicate_channels(self):
+        url = reverse("evaluation-session")
+        for channels in (["flex1", "temperature"], ["flex1", "flex1"]):
+            response = self.client.post(
+                url, {"motionName": "session", "empNo": "S1", "channels": channels}, format="json"
+            )
+            self.assertEqual(response.status_code, 400, channels)
+            self.assertIn("channels", response.data)
+
+
+class ColumnarSensorDataTests(TestCase):
+    channels = ["flex1", "gyro_x"]
+
+    def setUp(self):
+        self.frames = np.array([[0.1, 0.2], [0.3, 0.4], [0.5, 0.6]], dtype="<f4")
+
+    def _body(self, header, frames=None):
+        frames = self.frames if frames is None else frames
+        return json.dumps(header).encode() + b"\n" + frames.tobytes()
+
+    def _parse(self, body):
+        return SensorFramesParser().parse(io.BytesIO(body))
+
+    def _base64(self, **overrides):
+        payload = {"channels": self.channels, "dtype": "<f4", "data": base64.b64encode(self.frames.tobytes()).decode()}
+        payload.update(overrides)
+        return payload
+
+    def _validate(self, sensor_data):
+        return EvaluationRequestSerializer(data={"motionName": "m", "empNo": "E1", "sensorData": sensor_data})
+
+    def test_parser_decodes_header_and_frames(self):
+        data = self._parse(self._body({"motionName": "m", "empNo": "E1", "channels": self.channels}))
+        self.assertEqual(data["motionName"], "m")
+        self.assertIsInstance(data["sensorData"], SensorFrames)
+        self.assertEqual(data["sensorData"].channels, self.channels)
+        np.testing.assert_array_equal(data["sensorData"].array, self.frames)
+
+    def test_parser_decodes_float64(self):
+        frames = self.frames.astype("<f8")
+        data = self._parse(self._body({"channels": self.channels, "dtype": "<f8"}, frames))
+        np.testing.assert_array_equal(data["sensorData"].array, frames)
+
+    def test_parser_rejects_malformed_headers(self):
+        bodies = [
+            b'{"channels": ["flex1"]}',
+            b"{not json\n" + self.frames.tobytes(),
+            b'["flex1"]\n' + self.frames.tobytes(),
+            self._body({"channels": self.channels, "dtype": ["<f4"]}),
+            self._body({"channels": self.channels, "dtype": "<i4"}),
+            self._body({"channels": "flex1"}),
+            self._body({"channels": 2}),
+            self._body({"channels": ["flex1", "gyro_x", "gyro_y", "gyro_z"]}),
+        ]
+        for body in bodies:
+            with self.assertRaises(ParseError, msg=body[:40]):
+                self._parse(body)
+
+    def test_base64_payload(self):
+        serializer = self._validate(self._base64())
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        np.testing.assert_array_equal(serializer.validated_data["sensorData"].array, self.frames)
+
+    def test_base64_payload_rejects_bad_values(self):
+        for overrides in ({"data": "not base64!"}, {"data": 5}, {"dtype": ["<f4"]}, {"dtype": {"a": 1}}, {"channels": None}):
+            serializer = self._validate(self._base64(**overrides))
+            self.assertFalse(serializer.is_valid(), overrides)
+            self.assertIn("sensorData", serializer.errors)
+
+    def test_non_string_dtype_returns_400(self):
+        company = Company.objects.create(name="columnar", biz_no="1112255555")
+        device = SensorDevice.objects.create(company=company, device_uid="device-columnar")
+        client = APIClient(HTTP_X_API_KEY=device.api_key)
+        body = {"motionName": "m", "empNo": "E1", "sensorData": self._base64(dtype=["<f4"])}
+        self.assertEqual(client.post(reverse("unified-evaluation"), body, format="json").status_code, 400)
+        response = client.post(
+            reverse("unified-evaluation"), self._body({"motionName": "m", "empNo": "E1", "channels": self.channels, "dtype": [1]}),
+            content_type=SensorFramesParser.media_type,
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_view_passes_array_and_channels(self):
+        company = Company.objects.create(name="columnar batch", biz_no="1112244444")
+        device = SensorDevice.objects.create(company=company, device_uid="device-columnar-batch")
+        client = APIClient(HTTP_X_API_KEY=device.api_key)
+        dict_frames = [{"flex1": 0.1, "gyro_x": 0.2}] * 3
+        body = {"items": [
+            {"motionName": "m", "empNo": "E1", "sensorData": self._base64()},
+            {"motionName": "m", "empNo": "E2", "sensorData": dict_frames},
+        ]}
+
+        with mock.patch("ai.views.run_evaluation_batch", return_value=[{"score": 1.0}, {"score": 2.0}]) as run_batch:
+            response = client.post(reverse("evaluation-batch"), body, format="json")
+
+        self.assertEqual(response.status_code, 200, response.content)
+        columnar, dicts = run_batch.call_args.args[1]
+        np.testing.assert_array_equal(columnar["sensorData"], self.frames)
+        self.assertEqual(columnar["channels"], self.channels)
+        self.assertEqual(dicts["sensorData"], dict_frames)
+        self.assertNotIn("channels", dicts)
+
+
+class ExpireStaleSessionsTests(EvaluationSessionTestMixin, TestCase):
+    def test_deletes_abandoned_open_session_with_chunks(self):
+        self._append()
+        EvaluationSession.objects.filter(pk=self.session.pk).update(updated_at=timezone.now() - timedelta(hours=2))
+
+        self.assertEqual(expire_stale_sessions(3600), 1)
+        self.assertFalse(EvaluationSession.objects.filter(pk=self.session.pk).exists())
+        self.assertFalse(EvaluationSessionChunk.objects.filter(session_id=self.session.pk).exists())
+
+    def test_keeps_active_and_finalized_sessions(self):
+        self._append()
+        finalized = EvaluationSession.objects.create(
+            company=self.session.company, employee=self.employee, motion_type=self.motion_type, channels=self.channels,
+            status=EvaluationSession.Status.FINALIZED, result={"score": 1.0}, finalized_at=timezone.now() - timedelta(hours=2),
+        )
+        EvaluationSession.objects.filter(pk=finalized.pk).update(updated_at=timezone.now() - timedelta(hours=2))
+
+        self.assertEqual(expire_stale_sessions(3600), 0)
+        self.assertEqual(EvaluationSession.objects.count(), 2)
+
+
+class APIKeyCacheTests(TestCase):
+    def setUp(self):
+        company = Company.objects.create(name="cache", biz_no="2223344444")
+        self.device = SensorDevice.objects.create(company=company, device_uid="device-1")
+
+    def test_discards_load_started_before_invalidation(self):
+        cache = APIKeyCache()
+
+        def load(key):
+            # DB에서 읽는 동안 다른 요청이 디바이스를 비활성화하고 캐시를 비움
+            cache.invalidate_device(self.device)
+            return self.device
+
+        self.assertEqual(cache.get(self.device.api_key, load), self.device)
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_invalidates_after_commit(self):
+        api_key_cache.clear()
+        self.addCleanup(api_key_cache.clear)
+        self.assertIsNotNone(get_active_device(self.device.api_key))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.device.is_active = False
+            self.device.save()
+            # 커밋 전에는 아직 캐시에 남아 있음
+            self.assertEqual(api_key_cache.stats()["size"], 1)
+
+        self.assertIsNone(get_active_device(self.device.api_key))
+
+
+def _add_reference_in_other_process(motion_type_id):
+    """ 다른 워커 프로세스에서 모범 동작을 추가 (저장 시그널이 data_revision을 올림) """
+    motion_type = MotionType.objects.get(pk=motion_type_id)
+    _create_recording(motion_type, "reference", value=0.5)
+    return MotionType.objects.get(pk=motion_type_id).data_revision
+
+
+def _get_evaluator_in_other_process(motion_name):
+    """ 다른 워커 프로세스의 평가기 캐시에서 평가기를 가져옴: (프로세스 id, 평가기 id, 모범 동작 수) """
+    evaluator = get_evaluator(motion_name)
+    return os.getpid(), id(evaluator), len(evaluator.reference_motion_preprocessed)
+
+
+def _use_file_database(testcase):
+    """
+    SQLite 메모리 테스트 DB는 다른 프로세스에서 볼 수 없으므로, 테스트 동안 같은 내용의 임시 파일 DB로 바꿈
+    (MySQL 등 파일/서버 DB는 그대로 사용)
+    """
+    if connection.vendor != "sqlite" or not connection.is_in_memory_db():
+        return
+    fd, path = tempfile.mkstemp(suffix=".sqlite3")
+    os.close(fd)
+    connection.ensure_connection()
+    target = sqlite3.connect(path)
+    connection.connection.backup(target)
+    target.close()
+
+    original = connections[DEFAULT_DB_ALIAS]
+    file_connection = original.__class__({**original.settings_dict, "NAME": path}, alias=DEFAULT_DB_ALIAS)
+    connections[DEFAULT_DB_ALIAS] = file_connection
+
+    def restore():
+        file_connection.close()
+        connections[DEFAULT_DB_ALIAS] = original
+        os.remove(path)
+
+    testcase.addCleanup(restore)
+
+
+class EvaluatorCacheMultiProcessTests(TransactionTestCase):
+    def setUp(self):
+        _use_file_database(self)
+        self.motion_type = MotionType.objects.create(motion_name="multi_process")
+        _create_recording(self.motion_type, "reference")
+        _create_recording(self.motion_type, "zero_score", value=1.0)
+        evaluator_cache.clear(self.motion_type.motion_name)
+        self.addCleanup(evaluator_cache.clear, self.motion_type.motion_name)
+
+    def _worker(self):
+        database_names = {alias: connections[alias].settings_dict["NAME"] for alias in connections}
+        executor = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker, initargs=(database_names,)
+        )
+        self.addCleanup(executor.shutdown)
+        return executor
+
+    def test_rebuilds_evaluator_after_other_process_changes_data(self):
+        motion_name = self.motion_type.motion_name
+        evaluator = get_evaluator(motion_name)
+        self.assertIs(get_evaluator(motion_name), evaluator)
+
+        # 작업자 두 개 (서로 다른 프로세스): reader는 평가기를 캐시해 두고, writer가 모범 동작을 추가함
+        reader, writer = self._worker(), self._worker()
+        reader_pid, reader_evaluator, reader_count = reader.submit(_get_evaluator_in_other_process, motion_name).result(timeout=120)
+        self.assertEqual(reader.submit(_get_evaluator_in_other_process, motion_name).result(timeout=60)[1], reader_evaluator)
+
+        revision = writer.submit(_add_reference_in_other_process, self.motion_type.pk).result(timeout=120)
+        self.assertNotEqual(writer.submit(os.getpid).result(timeout=60), reader_pid)
+
+        # 값을 바꾸지 않은 두 프로세스(이 프로세스와 reader) 모두 다음 조회에서 평가기를 다시 만듦
+        self.motion_type.refresh_from_db()
+        self.assertEqual(self.motion_type.data_revision, revision)
+        rebuilt = get_evaluator(motion_name)
+        self.assertIsNot(rebuilt, evaluator)
+        self.assertEqual(len(rebuilt.reference_motion_preprocessed), len(evaluator.reference_motion_preprocessed) + 1)
+
+        # 예전 평가기가 해제된 뒤 새 평가기가 같은 id()를 받을 수 있으므로, 다시 만들었는지는 모범 동작 수로 확인
+        pid, _, count = reader.submit(_get_evaluator_in_other_process, motion_name).result(timeout=60)
+        self.assertEqual(pid, reader_pid)
+        self.assertEqual(count, reader_count + 1)
+
+
+@override_settings(AI_BATCH_WORKERS=4)
+class EvaluationBatchThreadingTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="batch", biz_no="4445566666")
+        Employee.objects.create(company=self.company, emp_no="B1", name="batch")
+        self.motion_type = MotionType.objects.create(motion_name="batch", max_dtw_distance=10.0)
+        _create_recording(self.motion_type, "reference", value=0.2)
+        _create_recording(self.motion_type, "reference", value=0.4)
+        _create_recording(self.motion_type, "zero_score", value=1.0)
+
+    def test_projection_resolved_before_fan_out(self):
+        frames = [{"flex1": 10.0 * i, "flex2": 20.0, "gyro_x": 0.0} for i in range(5)]
+        items = [{"motionName": "batch", "empNo": "B1", "sensorData": frames} for _ in range(6)]
+        threads = []
+
+        def record_thread(motion_type):
+            threads.append(threading.current_thread())
+            return get_motion_projection(motion_type)
+
+        with mock.patch("ai.logic.get_motion_projection", side_effect=record_thread):
+            results = run_evaluation_batch(self.company, items)
+
+        self.assertTrue(all("score" in result for result in results), results)
+        # 투영 축은 동작마다 한 번, 스레드 풀에 넘기기 전에 호출한 스레드에서만 구함
+        self.assertEqual(threads, [threading.current_thread()])
+
+    def test_pruning_stats_add_up_across_threads(self):
+        evaluator = MotionEvaluator("batch", use_pruning=True)
+        data = np.full((5, 3), 0.3)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda _: evaluator.compute_dtw_distances_pruned(data, 10.0), range(200)))
+
+        self.assertEqual(evaluator.pruning_stats["pairs"], 200 * 2)
+
+
+class MetricsViewTests(TestCase):
+    url = "/api/ai/metrics/"
+
+    @override_settings(AI_METRICS_TOKEN="")
+    def test_denied_without_configured_token(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    @override_settings(AI_METRICS_TOKEN="secret-token")
+    def test_requires_matching_bearer_token(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION="Bearer wrong").status_code, 401)
+        response = self.client.get(self.url, HTTP_AUTHORIZATION="Bearer secret-token")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"ai_evaluation_stage_seconds", response.content)
+
+
+class MotionTypeDeferredGraphTests(TestCase):
+    def setUp(self):
+        MotionType.objects.create(
+            motion_name="deferred", projection_mean=[0.0], projection_axis=[1.0],
+            reference_graph_series=[0.1] * 1000, reference_graph_revision=0,
+        )
+
+    def test_default_queryset_defers_graph_json(self):
+        deferred = MotionType.objects.get(motion_name="deferred").get_deferred_fields()
+        self.assertEqual(deferred, {"projection_mean", "projection_axis", "reference_graph_series"})
+
+    def test_with_graph(self):
+        self.assertEqual(MotionType.objects.with_graph().get(motion_name="deferred").get_deferred_fields(), set())
+        motion_type = MotionType.objects.with_graph(series=False).get(motion_name="deferred")
+        self.assertEqual(motion_type.get_deferred_fields(), {"reference_graph_series"})
+        # 미뤄 둔 필드도 접근하면 읽힘
+        self.assertEqual(len(motion_type.reference_graph_series), 1000)
+
+
+class PreforkWarmUpTests(TestCase):
+    def setUp(self):
+        self.motion_type = MotionType.objects.create(motion_name="prewarm")
+        _create_recording(self.motion_type, "reference")
+        evaluator_cache.clear()
+        self.addCleanup(evaluator_cache.clear)
+
+    @override_settings(AI_PREWARM_EVALUATORS=False)
+    def test_disabled_by_default(self):
+        self.assertIsNone(prefork_warm_up())
+        self.assertEqual(evaluator_cache.stats()["size"], 0)
+
+    @override_settings(AI_PREWARM_EVALUATORS=True)
+    def test_builds_evaluators_before_fork(self):
+        self.assertEqual(list(prefork_warm_up()), ["prewarm"])
+        misses = evaluator_cache.stats()["misses"]
+        get_evaluator("prewarm")
+        self.assertEqual(evaluator_cache.stats()["misses"], misses)
+
+
+class EvaluationPoolTests(TestCase):
+    def test_reserve_counts_rejections(self):
+        pool = EvaluationPool(max_pending=1, use_processes=False)
+        with pool.reserve():
+            with self.assertRaises(EvaluationQueueFull):
+                pool.reserve()
+            self.assertEqual(pool.stats()["rejected"], 1)
+        self.assertEqual(pool.stats()["pending"], 0)
+
+    def test_broken_pool_backs_off_before_rebuilding(self):
+        pool = EvaluationPool(use_processes=False)
+        executor = mock.Mock()
+        executor.submit.side_effect = BrokenProcessPool()
+        pool._executor = executor
+
+        with self.assertRaises(EvaluationPoolUnavailable):
+            asyncio.run(pool.run(sum, [1]))
+        self.assertEqual(pool.stats()["broken"], 1)
+        self.assertEqual(pool.stats()["pending"], 0)
+
+        # 대기 시간 안에는 풀을 새로 만들지 않고 바로 거절
+        with mock.patch("ai.evaluation_pool.ThreadPoolExecutor") as thread_pool:
+            with self.assertRaises(EvaluationPoolUnavailable) as raised:
+                asyncio.run(pool.run(sum, [1]))
+        thread_pool.assert_not_called()
+        self.assertGreater(raised.exception.retry_after, 0)
+        self.assertEqual(pool.stats()["pending"], 0)
+
+
+class AsyncEvaluationViewTests(TestCase):
+    url = "/api/ai/evaluate/async/"
+
+    def setUp(self):
+        company = Company.objects.create(name="async", biz_no="1112244444")
+        self.device = SensorDevice.objects.create(company=company, device_uid="device-async")
+        Employee.objects.create(company=company, emp_no="A1", name="async")
+        self.client = APIClient(HTTP_X_API_KEY=self.device.api_key)
+        self.body = {"motionName": "async", "empNo": "A1", "sensorData": [{"flex1": 0.1}] * 4}
+
+    def test_queue_full_rejected_before_parsing(self):
+        with mock.patch("ai.views.evaluation_pool", EvaluationPool(max_pending=1, use_processes=False)) as pool:
+            with pool.reserve():
+                with mock.patch("ai.views.parse_in_worker") as parse:
+                    response = self.client.post(self.url, self.body, format="json")
+        self.assertEqual(response.status_code, 429)
+        parse.assert_not_called()
+        self.assertEqual(pool.stats()["rejected"], 1)
+
+    def test_invalid_body_returns_slot(self):
+        with mock.patch("ai.views.evaluation_pool", EvaluationPool(max_pending=1, use_processes=False)) as pool:
+            response = self.client.post(self.url, {"motionName": "async"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(pool.stats()["pending"], 0)
+
+    def test_pool_unavailable_returns_503(self):
+        with mock.patch("ai.views.evaluation_pool", EvaluationPool(use_processes=False)), \
+                mock.patch("ai.views.run_evaluation_async", side_effect=EvaluationPoolUnavailable(2.5)):
+            response = self.client.post(self.url, self.body, format="json")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "3")
+
+    def test_body_parsed_in_worker(self):
+        validated_data, error = parse_evaluation_body("application/json", json.dumps(self.body).encode())
+        self.assertIsNone(error)
+        self.assertIsInstance(validated_data["sensorData"], SensorFrames)
+        self.assertEqual(validated_data["sensorData"].channels, ["flex1"])
+
+        _, error = parse_evaluation_body("application/json", b'{"motionName": "async"}')
+        self.assertEqual(error[1], 400)
+        self.assertIn("sensorData", error[0])
+        # 작업자 프로세스에서 웹 프로세스로 보낼 수 있어야 함
+        self.assertEqual(pickle.loads(pickle.dumps(error)), error)
+        self.assertEqual(parse_evaluation_body("text/plain", b"")[1][1], 415)
+
+
+class Float32ReferenceTests(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.references = [rng.random((20, 3)) for _ in range(6)]
+
+    def _evaluator(self, dtype):
+        return MotionEvaluator(
+            "float32", use_pruning=True, references=ReferenceArena.pack(self.references, dtype), reference_dtype=dtype
+        )
+
+    def test_pruned_path_upcasts_only_compared_references(self):
+        evaluator = self._evaluator(np.float32)
+        user_data = self.references[0] + 0.5
+        with mock.patch.object(ReferenceArena, "as_arrays") as as_arrays, \
+                mock.patch.object(evaluator, "_dtw_reference", wraps=evaluator._dtw_reference) as dtw_reference:
+            _, pruned = evaluator.compute_dtw_distances_pruned(user_data, 1.0)
+        as_arrays.assert_not_called()
+        self.assertTrue(pruned)
+        stats = evaluator.pruning_stats
+        self.assertEqual(dtw_reference.call_count, stats["pairs"] - stats["lb_pruned"])
+        self.assertLess(dtw_reference.call_count, len(self.references))
+
+    def test_float32_distances_match_float64(self):
+        user_data = self.references[0] + 0.01
+        np.testing.assert_allclose(
+            self._evaluator(np.float32).compute_dtw_distances(user_data),
+            self._evaluator(np.float64).compute_dtw_distances(user_data),
+            rtol=1e-6,
+        )
+
+
+class MotionRecordingRaggedDataTests(TestCase):
+    def setUp(self):
+        self.motion_type = MotionType.objects.create(motion_name="ragged")
+
+    def test_ragged_json_saved_without_binary_cache(self):
+        recording = MotionRecording.objects.create(
+            motion_type=self.motion_type, score_category="reference", sensor_data_json=[[0.1, 0.2], [0.3]], data_frames=2
+        )
+        self.assertIsNone(recording.sensor_data_npy)
+
+        recording.sensor_data_json = [[0.1, 0.2], [0.3, 0.4]]
+        recording.save(update_fields=["sensor_data_json"])
+        recording.refresh_from_db()
+        np.testing.assert_array_equal(recording.get_sensor_data_to_numpy(), [[0.1, 0.2], [0.3, 0.4]])
+
+    def test_serializer_rejects_frames_with_different_channels(self):
+        serializer = MotionSerializer(data={
+            "motionName": "ragged", "scoreCategory": "reference",
+            "sensorData": [{"flex1": 0.1, "gyro_x": 0.2}, {"flex1": 0.3}],
+        })
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("sensorData", serializer.errors)
+
+
+class SensorDictsToNumpyTests(TestCase):
+    def test_same_keys(self):
+        array, columns = sensor_dicts_to_numpy([{"flex1": 0.1, "gyro_x": 0.2}, {"gyro_x": 0.4, "flex1": 0.3}])
+        self.assertEqual(columns, ["flex1", "gyro_x"])
+        np.testing.assert_array_equal(array, [[0.1, 0.2], [0.3, 0.4]])
+
+    def test_key_first_seen_in_later_frame_is_kept(self):
+        array, columns = sensor_dicts_to_numpy([{"flex1": 0.1}, {"flex1": 0.3, "gyro_x": 0.4}])
+        self.assertEqual(columns, ["flex1", "gyro_x"])
+        np.testing.assert_array_equal(array, [[0.1, np.nan], [0.3, 0.4]])
+
+    def test_key_missing_from_later_frame(self):
+        array, columns = sensor_dicts_to_numpy([{"flex1": 0.1, "gyro_x": 0.2}, {"flex1": 0.3}])
+        self.assertEqual(columns, ["flex1", "gyro_x"])
+        np.testing.assert_array_equal(array, [[0.1, 0.2], [0.3, np.nan]])
+
+
+class BatchedDtwTests(TestCase):
+    def test_batched_distances_match_serial(self):
+        rng = np.random.default_rng(1)
+        references = [rng.random((length, 4)) for length in (30, 45, 38, 60, 30)]
+        evaluator = MotionEvaluator("batched", use_pruning=False, references=references)
+        for length in (30, 52):
+            user_data = rng.random((length, 4))
+            serial = evaluator.compute_dtw_distances_serial(user_data)
+            # 일괄 계산이 실패해서 순차 계산으로 넘어가면 같은 값끼리 비교하게 되므로 넘어가지 않는지도 확인
+            with mock.patch.object(evaluator, "compute_dtw_distances_serial", side_effect=AssertionError("fallback")):
+                batched = evaluator.compute_dtw_distances(user_data)
+            self.assertEqual(len(batched), len(references))
+            np.testing.assert_allclose(batched, serial, rtol=1e-12, atol=1e-12)
+
+
+class DtwPruningEquivalenceTests(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.references = [rng.random((40, 3)) + offset for offset in (1.0, 0.8, 0.6, 0.4, 0.0)]
+        # 마지막 모범 동작이 가장 가까움
+        self.user_data = self.references[-1] + rng.normal(0, 0.02, (40, 3))
+
+    def _scores(self, max_dtw_distance):
+        pruned = MotionEvaluator("pruning", use_pruning=True, references=self.references)
+        full = MotionEvaluator("pruning", use_pruning=False, references=self.references)
+        return (
+            pruned.evaluate_preprocessed(self.user_data, max_dtw_distance),
+            full.evaluate_preprocessed(self.user_data, max_dtw_distance),
+        )
+
+    def test_scores_match_unpruned(self):
+        average = np.mean(MotionEvaluator("pruning", use_pruning=False, references=self.references).compute_dtw_distances(self.user_data))
+        pruned_flags = set()
+        for max_dtw_distance in (average * 0.1, average * 0.99, average * 1.01, average * 3):
+            pruned, full = self._scores(max_dtw_distance)
+            self.assertAlmostEqual(pruned["score"], full["score"], places=9, msg=max_dtw_distance)
+            if not pruned["dtw_pruned"]:
+                self.assertAlmostEqual(pruned["avg_dtw_distance"], full["avg_dtw_distance"], places=9)
+            pruned_flags.add(pruned["dtw_pruned"])
+        # 0점이 확정되어 중단한 경우와 끝까지 계산한 경우를 모두 확인
+        self.assertEqual(pruned_flags, {True, False})
+
+    def test_closest_reference_last_is_compared_first(self):
+        evaluator = MotionEvaluator("pruning", use_pruning=True, references=self.references)
+        with mock.patch("ai.safty_training_ai.dtw_ndim.distance", wraps=dtw_ndim.distance) as distance:
+            evaluator.compute_dtw_distances_pruned(self.user_data, 1e9)
+        self.assertIs(distance.call_args_list[0].args[1], evaluator.reference_motion_preprocessed[-1])
+
+    def test_calibrated_max_matches_unpruned(self):
+        rng = np.random.default_rng(3)
+        ref_motions = [rng.random((length, 3)) for length in (30, 42, 35)]
+        zero_motions = [rng.random((length, 3)) * 2 for length in (33, 50, 30, 28)]
+        expected, _ = _max_pairwise_dtw(ref_motions, zero_motions)
+        _, stats = _max_pairwise_dtw_pruned(ref_motions, zero_motions)
+        self.assertEqual(stats["pairs"], len(ref_motions) * len(zero_motions))
+        self.assertGreater(stats["ub_pruned"], 0)
+        for initial_max in (None, 0.0, expected * 0.5, expected * 2):
+            full, _ = _max_pairwise_dtw(ref_motions, zero_motions, initial_max=initial_max)
+            pruned, _ = _max_pairwise_dtw_pruned(ref_motions, zero_motions, initial_max=initial_max)
+            self.assertAlmostEqual(pruned, full, places=9, msg=initial_max)
+
+
+class EvaluatorCacheTests(TestCase):
+    def setUp(self):
+        self.built = []
+
+    def _factory(self, motion_name, references=None):
+        self.built.append(motion_name)
+        return object()
+
+    def test_concurrent_get_builds_once(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_factory(motion_name, references=None):
+            started.set()
+            release.wait(5)
+            return self._factory(motion_name)
+
+        cache = EvaluatorCache(factory=slow_factory)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [executor.submit(cache.get, "motion", 1) for _ in range(8)]
+            started.wait(5)
+            # 모든 스레드가 생성 잠금을 기다릴 때까지 생성을 멈춰 둠
+            deadline = timezone.now() + timedelta(seconds=5)
+            while cache._build_locks["motion"][1] < 8 and timezone.now() < deadline:
+                release.wait(0.01)
+            self.assertEqual(cache._build_locks["motion"][1], 8)
+            release.set()
+            evaluators = {id(future.result()) for future in futures}
+
+        self.assertEqual(self.built, ["motion"])
+        self.assertEqual(len(evaluators), 1)
+        # 생성이 끝나면 동작별 생성 잠금도 지움
+        self.assertEqual(cache._build_locks, {})
+
+    def test_evicts_least_recently_used(self):
+        cache = EvaluatorCache(max_size=2, factory=self._factory)
+        first = cache.get("a", 1)
+        cache.get("b", 1)
+        self.assertIs(cache.get("a", 1), first)
+        cache.get("c", 1)
+
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertIs(cache.get("a", 1), first)
+        cache.get("b", 1)
+        self.assertEqual(self.built, ["a", "b", "c", "b"])
+
+    def test_expired_entry_is_rebuilt(self):
+        cache = EvaluatorCache(ttl=10, factory=self._factory)
+        with mock.patch("ai.evaluator_cache.time.monotonic", return_value=100.0):
+            first = cache.get("motion", 1)
+        with mock.patch("ai.evaluator_cache.time.monotonic", return_value=105.0):
+            self.assertIs(cache.get("motion", 1), first)
+        with mock.patch("ai.evaluator_cache.time.monotonic", return_value=111.0):
+            self.assertIsNot(cache.get("motion", 1), first)
+        self.assertEqual(self.built, ["motion", "motion"])
+        self.assertEqual(cache.stats()["stale"], 1)
+
+    def test_new_version_is_rebuilt(self):
+        cache = EvaluatorCache(factory=self._factory)
+        first = cache.get("motion", 1)
+        self.assertIsNot(cache.get("motion", 2), first)
+        self.assertEqual(cache._build_locks, {})
+
+
+class LatestUserRecordingTests(TestCase):
+    def setUp(self):
+        company = Company.objects.create(name="latest", biz_no="1112266666")
+        self.employees = [Employee.objects.create(company=company, emp_no=f"L{i}", name=f"latest {i}") for i in range(2)]
+        self.motion_types = [MotionType.objects.create(motion_name=f"latest_{i}") for i in range(2)]
+        self.started = timezone.now() - timedelta(days=1)
+
+    def _record(self, employee, motion_type, minutes, score=50.0):
+        recording = UserRecording.objects.create(user=employee, motion_type=motion_type, score=score)
+        # recorded_at은 auto_now_add라 저장 후에 시각을 맞추고, 요약 테이블도 그 시각으로 다시 반영
+        recorded_at = self.started + timedelta(minutes=minutes)
+        UserRecording.objects.filter(pk=recording.pk).update(recorded_at=recorded_at)
+        recording.recorded_at = recorded_at
+        LatestUserRecording.objects.filter(recording=recording).update(recorded_at=recorded_at)
+        return recording
+
+    def _latest(self, employee, motion_type):
+        return LatestUserRecording.objects.filter(user=employee, motion_type=motion_type).first()
+
+    def test_tracks_newest_recording(self):
+        employee, motion_type = self.employees[0], self.motion_types[0]
+        self._record(employee, motion_type, 1, score=10.0)
+        newest = self._record(employee, motion_type, 2, score=20.0)
+
+        latest = self._latest(employee, motion_type)
+        self.assertEqual(latest.recording_id, newest.pk)
+        self.assertEqual(latest.score, 20.0)
+
+        # 기존 기록의 점수를 고치면 요약 행의 점수도 맞춤
+        newest.score = 25.0
+        newest.save()
+        self.assertEqual(self._latest(employee, motion_type).score, 25.0)
+
+    def test_falls_back_to_previous_recording_on_delete(self):
+        employee, motion_type = self.employees[0], self.motion_types[0]
+        previous = self._record(employee, motion_type, 1, score=10.0)
+        newest = self._record(employee, motion_type, 2, score=20.0)
+
+        newest.delete()
+        latest = self._latest(employee, motion_type)
+        self.assertEqual(latest.recording_id, previous.pk)
+        self.assertEqual(latest.score, 10.0)
+
+        previous.delete()
+        self.assertIsNone(self._latest(employee, motion_type))
+
+    def test_rebuild_matches_max_recorded_at(self):
+        minutes = 0
+        for employee in self.employees:
+            for motion_type in self.motion_types:
+                for _ in range(3):
+                    minutes += 7
+                    self._record(employee, motion_type, minutes % 23)
+        LatestUserRecording.objects.all().delete()
+
+        self.assertEqual(LatestUserRecording.rebuild(batch_size=2), 4)
+        expected = {
+            (row["user"], row["motion_type"]): row["latest"]
+            for row in UserRecording.objects.values("user", "motion_type").annotate(latest=Max("recorded_at"))
+        }
+        actual = {
+            (row.user_id, row.motion_type_id): row.recorded_at for row in LatestUserRecording.objects.select_related("recording")
+        }
+        self.assertEqual(actual, expected)
+        for row in LatestUserRecording.objects.select_related("recording"):
+            self.assertEqual(row.recording.recorded_at, row.recorded_at)
+
+
+class GraphSeriesEncodingTests(TestCase):
+    migration = importlib.import_module("ai.migrations.0013_userrecording_sensor_data_compressed")
+
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        self.series = [[], [0.0], [1.5, -2.25, 3e-300, -0.0], rng.normal(size=1000).tolist()]
+
+    def test_round_trip(self):
+        for values in self.series:
+            decoded = decode_graph_series(encode_graph_series(values))
+            self.assertEqual(decoded.dtype, np.float64)
+            self.assertEqual(decoded.tolist(), values)
+
+    def test_property_keeps_none_and_empty(self):
+        recording = UserRecording(sensor_data_json=None)
+        self.assertIsNone(recording.sensor_data_compressed)
+        self.assertIsNone(recording.sensor_data_json)
+        recording.sensor_data_json = []
+        self.assertEqual(recording.sensor_data_json, [])
+
+    def test_migration_snapshot_matches_models(self):
+        for values in self.series:
+            encoded = encode_graph_series(values)
+            self.assertEqual(self.migration._encode(values), encoded)
+            self.assertEqual(self.migration._decode(encoded), values)
+
+
+class MotionProjectionTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="projection", biz_no="1113377777")
+        self.employee = Employee.objects.create(company=self.company, emp_no="P1", name="projection")
+        self.motion_type = MotionType.objects.create(motion_name="projection", max_dtw_distance=10.0)
+        self._add_reference([[0.1 * i, -0.2 * i, 0.0] for i in range(5)])
+        _create_recording(self.motion_type, "zero_score", value=1.0)
+
+    def _add_reference(self, frames):
+        return MotionRecording.objects.create(
+            motion_type=self.motion_type, data_frames=len(frames), score_category="reference", sensor_data_json=frames,
+        )
+
+    def _reload(self):
+        return MotionType.objects.with_graph().get(pk=self.motion_type.pk)
+
+    def test_axis_sign_convention(self):
+        rng = np.random.default_rng(12)
+        direction = np.array([0.3, -0.9, 0.1])
+        data = rng.normal(size=(200, 1)) * direction + rng.normal(scale=0.01, size=(200, 3))
+
+        _, axis = fit_projection_axis([data])
+        _, flipped_axis = fit_projection_axis([-data])
+
+        # 절대값이 가장 큰 성분이 양수가 되도록 부호를 고정하므로, 데이터 부호를 뒤집어도 같은 축
+        self.assertGreater(axis[np.argmax(np.abs(axis))], 0)
+        np.testing.assert_allclose(axis, -direction / np.linalg.norm(direction), atol=1e-3)
+        np.testing.assert_allclose(flipped_axis, axis)
+
+    def test_reuses_stored_axis(self):
+        mean, axis = get_motion_projection(self._reload())
+
+        motion_type = self._reload()
+        self.assertEqual(motion_type.projection_revision, motion_type.data_revision)
+        with self.assertNumQueries(0):
+            stored_mean, stored_axis = get_motion_projection(motion_type)
+        np.testing.assert_allclose(stored_mean, mean)
+        np.testing.assert_allclose(stored_axis, axis)
+
+    def test_recomputes_after_data_revision_changes(self):
+        _, axis = get_motion_projection(self._reload())
+        self._add_reference([[0.0, 0.0, 0.5 * i] for i in range(20)])
+
+        motion_type = self._reload()
+        self.assertNotEqual(motion_type.projection_revision, motion_type.data_revision)
+        _, new_axis = get_motion_projection(motion_type)
+
+        self.assertFalse(np.allclose(new_axis, axis))
+        motion_type = self._reload()
+        self.assertEqual(motion_type.projection_revision, motion_type.data_revision)
+        np.testing.assert_allclose(motion_type.projection_axis, new_axis)
+
+    def test_graph_flags_recording_from_earlier_projection(self):
+        course = Course.objects.create(code="PROJ", title="projection", motion_type=self.motion_type)
+        enrollment = Enrollment.objects.create(employee=self.employee, course=course)
+        frames = [{"flex1": 0.1 * i, "flex2": 0.0, "gyro_x": 0.0} for i in range(5)]
+        run_evaluation_batch(self.company, [{"motionName": "projection", "empNo": "P1", "sensorData": frames}])
+
+        recording = UserRecording.objects.get(user=self.employee)
+        self.assertEqual(recording.projection_revision, self._reload().data_revision)
+        self.assertFalse(get_evaluation_graph_data(enrollment.id)["projectionOutdated"])
+
+        # 모범 동작이 바뀌면 모범 동작 시계열은 새 축으로 다시 계산되므로 예전 기록은 비교할 수 없다고 알려줌
+        self._add_reference([[0.0, 0.0, 0.5 * i] for i in range(20)])
+        self.assertTrue(get_evaluation_graph_data(enrollment.id)["projectionOutdated"])
+
+
+def _lttb_reference(values, points):
+    """ 구간별 반복문으로 그대로 옮긴 LTTB (벡터화한 lttb_downsample과 비교용) """
+    n = len(values)
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    selected = [0]
+    for i in range(points - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            mean_x = sum(range(next_start, next_end)) / (next_end - next_start)
+            mean_y = sum(values[next_start:next_end]) / (next_end - next_start)
+        else:
+            mean_x, mean_y = n - 1, values[n - 1]
+        a = selected[-1]
+        areas = [abs((a - mean_x) * (values[j] - values[a]) - (a - j) * (mean_y - values[a])) for j in range(start, end)]
+        selected.append(start + int(np.argmax(areas)))
+    selected.append(n - 1)
+    return selected
+
+
+class LttbDownsampleTests(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(15)
+        self.values = np.cumsum(rng.normal(size=997))
+
+    def test_keeps_endpoints_and_length(self):
+        for points in (3, 4, 10, 100, 996):
+            index, values = lttb_downsample(self.values, points)
+            self.assertEqual(len(index), points)
+            self.assertEqual(len(values), points)
+            self.assertEqual((index[0], index[-1]), (0, len(self.values) - 1))
+            self.assertEqual((values[0], values[-1]), (self.values[0], self.values[-1]))
+            self.assertTrue(np.all(np.diff(index) > 0))
+            np.testing.assert_array_equal(values, self.values[index])
+
+    def test_matches_loop_implementation(self):
+        for points in (3, 17, 250):
+            index, _ = lttb_downsample(self.values, points)
+            self.assertEqual(index.tolist(), _lttb_reference(self.values.tolist(), points))
+
+    def test_no_downsampling_when_points_cover_series(self):
+        for points in (len(self.values), len(self.values) + 1, 5000):
+            index, values = lttb_downsample(self.values, points)
+            np.testing.assert_array_equal(index, np.arange(len(self.values)))
+            np.testing.assert_array_equal(values, self.values)
+
+    def test_keeps_given_index(self):
+        # 미리보기(이미 줄인 시계열)를 다시 줄일 때는 원래 프레임 번호를 그대로 돌려줌
+        preview_index = np.arange(0, 2 * len(self.values), 2)
+        index, values = lttb_downsample(self.values, 10, preview_index)
+        positions, _ = lttb_downsample(self.values, 10)
+        np.testing.assert_array_equal(index, preview_index[positions])
+        np.testing.assert_array_equal(values, self.values[positions])
+
+
+class PreprocessPandasEquivalenceTests(TestCase):
+    """ numpy 전처리 경로가 이전 pandas 경로(benchmarks.fixtures.preprocess_sensor_data_pandas)와 같은 결과인지 확인 """
+
+    def assert_same_as_pandas(self, frames):
+        expected = preprocess_sensor_data_pandas(frames).astype(np.float64)
+        actual = preprocess_sensor_data(frames)
+        self.assertEqual(actual.shape, expected.shape)
+        # 가장자리 프레임의 다항식 적합이 채널 단위/행렬 단위로 계산되어 부동소수점 반올림 정도의 차이만 허용
+        np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-12, equal_nan=True)
+
+    def test_same_channels_in_every_frame(self):
+        for num_frames in (5, 6, 11, 12, 100, 1000):
+            self.assert_same_as_pandas(make_synthetic_frames(num_frames, seed=num_frames))
+
+    def test_channel_first_seen_after_frame_zero(self):
+        frames = make_synthetic_frames(40, seed=1)
+        for frame in frames[:5]:
+            del frame["gyro_z"]
+        for frame in frames[:12]:
+            del frame["flex3"]
+        self.assert_same_as_pandas(frames)
+        # pandas처럼 처음 보이는 순서대로 열을 붙이고, 빠진 값이 있는 채널은 필터를 거치며 NaN이 됨
+        self.assertTrue(np.isnan(preprocess_sensor_data(frames)[:, -1]).any())
+
+    def test_channel_missing_from_later_frames_and_key_order(self):
+        frames = make_synthetic_frames(30, seed=2)
+        for frame in frames[20:]:
+            del frame["gyro_x"]
+        frames[7] = dict(reversed(list(frames[7].items())))
+        self.assert_same_as_pandas(frames)
@@ -3,7 +3,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 # MotionTypeViewSet을 추가로 임포트
-from .views import MotionRecordingView, UnifiedEvaluationView, SensorDeviceViewSet, MotionTypeViewSet
+from .views import (
+    MotionRecordingView, UnifiedEvaluationView, SensorDeviceViewSet, MotionTypeViewSet, BackgroundJobStatusView,
+    EvaluationSessionView, EvaluationSessionChunkView, EvaluationSessionFinalizeView, MetricsView,
+    EvaluationBatchView, AsyncEvaluationView,
+)
 
 # 라우터 생성
 router = DefaultRouter()
@@ -16,6 +20,18 @@ urlpatterns = [
     # 기존 URL
     path('recordings/', MotionRecordingView.as_view(), name='motion-recording'),
     path('evaluate/', UnifiedEvaluationView.as_view(), name='unified-evaluation'),
+    # 같은 평가의 비동기(ASGI) 버전: 점수 계산을 별도 프로세스에서 실행하고, 대기열이 가득 차면 429 반환
+    path('evaluate/async/', AsyncEvaluationView.as_view(), name='async-evaluation'),
+    # 오프라인/재생 평가 여러 개를 한 번에 처리
+    path('evaluate/batch/', EvaluationBatchView.as_view(), name='evaluation-batch'),
+    # 긴 평가 세션용 스트리밍(청크) 업로드: 세션 열기 -> 청크 추가 -> 종료(평가)
+    path('evaluate/sessions/', EvaluationSessionView.as_view(), name='evaluation-session'),
+    path('evaluate/sessions/<uuid:session_id>/chunks/', EvaluationSessionChunkView.as_view(), name='evaluation-session-chunk'),
+    path('evaluate/sessions/<uuid:session_id>/finalize/', EvaluationSessionFinalizeView.as_view(), name='evaluation-session-finalize'),
+    # 백그라운드 작업(max_dtw_distance 재계산) 상태 조회
+    path('jobs/<uuid:job_id>/', BackgroundJobStatusView.as_view(), name='background-job-status'),
+    # 평가 단계별 처리 시간 등 지표 (Prometheus 수집용)
+    path('metrics/', MetricsView.as_view(), name='ai-metrics'),
     
     # 라우터에 등록된 URL들을 포함 (/api/ai/devices/, /api/ai/motion-types/ 등)
     path('', include(router.urls)),
@@ -1,24 +1,44 @@
 # ai/views.py
 
+import io
+import json
+import math
+import secrets
+
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.response import Response
+from rest_framework.parsers import JSONParser, FormParser, MultiPartParser
 from rest_framework import status
+from rest_framework.exceptions import ParseError
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from django.utils import timezone
 
 # --- Permissions ---
 from .permissions import HasValidAPIKey
+from .api_key_cache import aget_active_device
 # 웹 대시보드용 권한 클래스는 organizations 앱에서 가져와 재사용
 from organizations.views import IsCompanySession
 
 # --- Models ---
 from organizations.models import Employee, Company
-from .models import MotionType, SensorDevice
+from .models import MotionType, SensorDevice, BackgroundJob, EvaluationSession
 
 # --- Serializers ---
-from .serializers import EvaluationRequestSerializer, MotionSerializer, SensorDeviceSerializer, MotionTypeSerializer
+from .serializers import EvaluationRequestSerializer, EvaluationBatchRequestSerializer, MotionSerializer, SensorDeviceSerializer, MotionTypeSerializer, BackgroundJobSerializer, EvaluationSessionCreateSerializer
 
 # --- Logic ---
-from .logic import run_evaluation, update_max_dtw_for_motion
+from .logic import run_evaluation, run_evaluation_async, run_evaluation_batch
+from .evaluation_pool import EvaluationPoolUnavailable, EvaluationQueueFull, evaluation_pool, parse_in_worker
+from .jobs import enqueue_calibration_job
+from .parsers import SensorFramesParser
+from .safty_training_ai import sensor_dicts_to_numpy
+from .metrics import AsyncStageTimingMixin, StageTimingMixin, span, render_metrics
+from .streaming import SensorFrames, ChunkFormatError, SessionFrameLimitError, SessionNotOpenError, parse_ndjson_chunk, parse_binary_chunk, append_chunk, assemble_session_frames
 
 
 # --- ViewSets & Views ---
@@ -56,26 +76,53 @@ class MotionTypeViewSet(ModelViewSet):
 class MotionRecordingView(APIView):
     """
     모범 동작(reference) 또는 0점 동작(zero_score) 데이터를 받아
-    전처리 후 DB에 저장하고, max_dtw_distance를 업데이트합니다.
+    전처리 후 DB에 저장하고, max_dtw_distance 재계산 작업을 큐에 넣습니다.
+    재계산은 `python manage.py run_ai_jobs` 워커가 처리하므로 202와 작업 id를 바로 반환합니다.
+    진행 상황은 GET /api/ai/jobs/{jobId}/ 로 확인합니다.
     """
     # 이 API는 관리자/개발자용이므로, 추후 IsAdminUser 같은 권한을 추가하는 것이 좋음
     permission_classes = [IsCompanySession]
+    # JSON 외에 컬럼형 바이너리(application/x-sensor-frames) 본문도 받음
+    parser_classes = [JSONParser, SensorFramesParser, FormParser, MultiPartParser]
     def post(self, request, *args, **kwargs):
         serializer = MotionSerializer(data=request.data)
         if serializer.is_valid():
             motion_recording = serializer.save()
-            update_max_dtw_for_motion(motion_recording.motion_type)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            job = enqueue_calibration_job(motion_recording.motion_type, recording=motion_recording)
+
+            response_data = dict(serializer.data)
+            response_data["job"] = BackgroundJobSerializer(job).data
+            # 동기 처리 설정(AI_CALIBRATION_ASYNC=False)이면 이미 계산이 끝났으므로 201 반환
+            if job.status == BackgroundJob.Status.QUEUED:
+                return Response(response_data, status=status.HTTP_202_ACCEPTED)
+            return Response(response_data, status=status.HTTP_201_CREATED)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UnifiedEvaluationView(APIView):
+class BackgroundJobStatusView(APIView):
+    """
+    백그라운드 작업의 상태/진행률/결과(새 max_dtw_distance)를 조회하는 API
+    GET /api/ai/jobs/{id}/
+    """
+    permission_classes = [IsCompanySession]
+
+    def get(self, request, job_id, *args, **kwargs):
+        try:
+            job = BackgroundJob.objects.select_related("motion_type").get(id=job_id)
+        except BackgroundJob.DoesNotExist:
+            return Response({"detail": "해당 작업을 찾을 수 없습니다."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(BackgroundJobSerializer(job).data)
+
+
+class UnifiedEvaluationView(StageTimingMixin, APIView):
     """
     Unity로부터 센서 데이터를 받아 즉시 평가하고 결과를 반환하는 API
     POST /api/ai/evaluate/
     """
     permission_classes = [HasValidAPIKey]  # 커스텀 권한 클래스로 교체
+    # JSON 외에 컬럼형 바이너리(application/x-sensor-frames) 본문도 받음
+    parser_classes = [JSONParser, SensorFramesParser, FormParser, MultiPartParser]
 
     def _try_get_employee(self, emp_no: str, company: Company):
         try:
@@ -85,15 +132,21 @@ class UnifiedEvaluationView(APIView):
 
     def post(self, request, *args, **kwargs):
         company = request.company
-        serializer = EvaluationRequestSerializer(data=request.data)
+        with span("validate"):
+            serializer = EvaluationRequestSerializer(data=request.data)
+            is_valid = serializer.is_valid()
         
-        if not serializer.is_valid():
+        if not is_valid:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         validated_data = serializer.validated_data
         motion_name = validated_data['motionName']
         emp_no = validated_data['empNo']
         readings = validated_data['sensorData']
+        channels = None
+        # 컬럼형 바이너리 형식이면 (배열, 채널 목록)으로 넘김
+        if isinstance(readings, SensorFrames):
+            readings, channels = readings.array, readings.channels
 
         employee = self._try_get_employee(emp_no, company)
         
@@ -103,15 +156,353 @@ class UnifiedEvaluationView(APIView):
         evaluation_result = run_evaluation(
             motion_name=motion_name,
             employee=employee,
-            raw_sensor_data=readings
+            raw_sensor_data=readings,
+            channels=channels,
+        )
+
+        if "error" in evaluation_result:
+            return Response(evaluation_result, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        response_data = {
+            "ok": True,
+            "detail": "평가가 완료되었습니다.",
+            "evaluation": evaluation_result
+        }
+        return Response(response_data, status=status.HTTP_200_OK)
+
+
+def parse_evaluation_body(content_type: str, body: bytes):
+    """
+    비동기 평가 요청 본문을 해석/검증해서 (검증된 데이터, None) 또는 (None, (오류 본문, 상태 코드))를 반환
+    DRF 파서/시리얼라이저를 그대로 쓰며, 점수 계산 작업자(evaluation_pool.parse_in_worker)에서 호출하므로 결과는 pickle할 수 있는 값만 담음
+    """
+    content_type = content_type or ""
+    try:
+        if content_type == SensorFramesParser.media_type:
+            data = SensorFramesParser().parse(io.BytesIO(body))
+        elif content_type == "application/json":
+            data = json.loads(body or b"{}")
+        else:
+            return None, ({"detail": f'요청의 미디어 타입 "{content_type}"은(는) 지원하지 않습니다.'}, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+    except (ParseError, ValueError) as e:
+        return None, ({"detail": f"요청 본문을 해석할 수 없습니다: {e}"}, status.HTTP_400_BAD_REQUEST)
+
+    serializer = EvaluationRequestSerializer(data=data)
+    if not serializer.is_valid():
+        # ErrorDetail 등 DRF 객체 대신 JSON과 같은 기본 자료형으로 바꿔서 반환
+        return None, (json.loads(json.dumps(serializer.errors)), status.HTTP_400_BAD_REQUEST)
+    validated_data = dict(serializer.validated_data)
+    # 프레임 딕셔너리 리스트는 여기서 배열로 바꿔 둠: 결과를 웹 프로세스로 보낼 때 딕셔너리 수천 개 대신 배열 버퍼 하나만 pickle함
+    readings = validated_data["sensorData"]
+    if isinstance(readings, list) and readings:
+        try:
+            array, channels = sensor_dicts_to_numpy(readings)
+        except (TypeError, ValueError):
+            # 숫자로 바꿀 수 없는 값은 그대로 넘겨서 기존과 같이 점수 계산 단계에서 오류로 처리
+            return validated_data, None
+        validated_data["sensorData"] = SensorFrames(array, channels)
+    return validated_data, None
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncEvaluationView(AsyncStageTimingMixin, View):
+    """
+    UnifiedEvaluationView의 비동기(ASGI) 버전. 요청/응답 형식은 POST /api/ai/evaluate/와 같음
+    POST /api/ai/evaluate/async/
+    - DB 조회/저장은 비동기 ORM, 점수 계산은 evaluation_pool의 작업자 프로세스에서 실행하므로
+      평가가 몰려도 같은 워커의 대시보드 요청이 평가가 끝나기를 기다리지 않음
+    - 점수 계산 대기열(AI_ASYNC_EVAL_MAX_PENDING)이 가득 차면 429와 Retry-After 헤더를 반환
+      (본문을 해석하기 전에 자리를 잡으므로, 거절될 요청은 본문을 해석하지 않음)
+    - 본문 해석/검증도 같은 자리로 작업자에서 실행하므로, 웹 프로세스는 평가 요청 때문에 GIL을 오래 잡지 않음
+    - 작업자 프로세스가 비정상 종료되어 점수 계산을 할 수 없으면 503과 Retry-After 헤더를 반환
+    ASGI 서버(uvicorn, daphne 등)로 실행할 때 효과가 있음 (WSGI에서도 동작은 함)
+    """
+
+    def _json(self, data, status_code):
+        return JsonResponse(data, status=status_code, json_dumps_params={"ensure_ascii": False})
+
+    def _queue_full(self):
+        response = self._json({"detail": "평가 요청이 많아 잠시 후 다시 시도해 주세요."}, status.HTTP_429_TOO_MANY_REQUESTS)
+        response["Retry-After"] = str(getattr(settings, "AI_ASYNC_EVAL_RETRY_AFTER", 1))
+        return response
+
+    def _pool_unavailable(self, error):
+        response = self._json({"detail": str(error)}, status.HTTP_503_SERVICE_UNAVAILABLE)
+        response["Retry-After"] = str(max(1, math.ceil(error.retry_after)))
+        return response
+
+    async def post(self, request, *args, **kwargs):
+        # HasValidAPIKey와 같은 검사 (같은 API 키 캐시 사용)
+        api_key = request.headers.get("X-API-Key")
+        if not api_key:
+            return self._json({"detail": "X-API-Key 헤더가 필요합니다."}, status.HTTP_403_FORBIDDEN)
+        with span("auth"):
+            device = await aget_active_device(api_key)
+        if device is None:
+            return self._json({"detail": HasValidAPIKey.message}, status.HTTP_403_FORBIDDEN)
+        company = device.company
+
+        # 본문을 해석하기 전에 먼저 대기열 자리를 잡아서, 가득 찼으면 바로 거절
+        # (잡은 자리는 점수 계산을 넘기기 전에 끝나면 with 블록을 빠져나올 때 돌려줌)
+        try:
+            slot = evaluation_pool.reserve()
+        except EvaluationQueueFull:
+            return self._queue_full()
+        with slot:
+            return await self._evaluate(request, company, slot)
+
+    async def _evaluate(self, request, company, slot):
+        # 본문 해석/검증도 잡아 둔 자리로 작업자에서 실행 (웹 프로세스에서는 GIL을 오래 잡는 작업을 하지 않음)
+        with span("validate"):
+            try:
+                validated_data, error = await slot.run(parse_in_worker, request.content_type, request.body)
+            except EvaluationPoolUnavailable as e:
+                return self._pool_unavailable(e)
+        if error is not None:
+            return self._json(*error)
+
+        motion_name = validated_data['motionName']
+        emp_no = validated_data['empNo']
+        readings = validated_data['sensorData']
+        channels = None
+        # 컬럼형 바이너리 형식이면 (배열, 채널 목록)으로 넘김
+        if isinstance(readings, SensorFrames):
+            readings, channels = readings.array, readings.channels
+
+        try:
+            employee = await Employee.objects.aget(emp_no=emp_no, company=company)
+        except Employee.DoesNotExist:
+            return self._json({"detail": f"회사({company.name})에 해당 사원번호({emp_no})가 존재하지 않습니다."}, status.HTTP_404_NOT_FOUND)
+
+        try:
+            evaluation_result = await run_evaluation_async(
+                motion_name=motion_name,
+                employee=employee,
+                raw_sensor_data=readings,
+                channels=channels,
+                slot=slot,
+            )
+        except EvaluationQueueFull:
+            return self._queue_full()
+        except EvaluationPoolUnavailable as e:
+            return self._pool_unavailable(e)
+
+        if "error" in evaluation_result:
+            return self._json(evaluation_result, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        response_data = {
+            "ok": True,
+            "detail": "평가가 완료되었습니다.",
+            "evaluation": evaluation_result
+        }
+        return self._json(response_data, status.HTTP_200_OK)
+
+
+class EvaluationBatchView(StageTimingMixin, APIView):
+    """
+    오프라인으로 쌓인 평가나 재생(replay)한 평가 여러 개를 한 번에 처리하는 API
+    POST /api/ai/evaluate/batch/
+    {"items": [{"motionName": "fire_exit", "empNo": "EMP001", "sensorData": [...]}, ...]}
+    항목마다 결과를 같은 순서로 반환하며, 일부 항목이 실패해도 나머지는 평가/저장함
+    """
+    permission_classes = [HasValidAPIKey]
+
+    def post(self, request, *args, **kwargs):
+        serializer = EvaluationBatchRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        items = serializer.validated_data["items"]
+        results = [None] * len(items)
+        valid_indexes, valid_items = [], []
+        with span("validate"):
+            for index, item in enumerate(items):
+                item_serializer = EvaluationRequestSerializer(data=item)
+                if not item_serializer.is_valid():
+                    results[index] = {"index": index, "ok": False, "errors": item_serializer.errors}
+                    continue
+                validated_item = dict(item_serializer.validated_data)
+                # 컬럼형 바이너리 형식이면 (배열, 채널 목록)으로 넘김
+                readings = validated_item["sensorData"]
+                if isinstance(readings, SensorFrames):
+                    validated_item["sensorData"], validated_item["channels"] = readings.array, readings.channels
+                valid_indexes.append(index)
+                valid_items.append(validated_item)
+
+        evaluations = run_evaluation_batch(request.company, valid_items) if valid_items else []
+        for index, evaluation in zip(valid_indexes, evaluations):
+            if "error" in evaluation:
+                results[index] = {"index": index, "ok": False, "error": evaluation["error"]}
+            else:
+                results[index] = {"index": index, "ok": True, "evaluation": evaluation}
+
+        succeeded = sum(1 for result in results if result["ok"])
+        response_data = {
+            "ok": True,
+            "detail": f"{len(results)}개 중 {succeeded}개 평가가 완료되었습니다.",
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "results": results,
+        }
+        return Response(response_data, status=status.HTTP_200_OK)
+
+
+class EvaluationSessionView(APIView):
+    """
+    긴 평가 세션을 위한 스트리밍(청크) 업로드 세션을 여는 API
+    POST /api/ai/evaluate/sessions/
+    {"motionName": "fire_exit", "empNo": "EMP001", "channels": ["flex1", ..., "gyro_z"]}
+    """
+    permission_classes = [HasValidAPIKey]
+
+    def post(self, request, *args, **kwargs):
+        company = request.company
+        serializer = EvaluationSessionCreateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        validated_data = serializer.validated_data
+        emp_no = validated_data['empNo']
+        employee = Employee.objects.filter(emp_no=emp_no, company=company).first()
+        if not employee:
+            return Response({"detail": f"회사({company.name})에 해당 사원번호({emp_no})가 존재하지 않습니다."}, status=status.HTTP_404_NOT_FOUND)
+
+        motion_type = MotionType.objects.filter(motion_name=validated_data['motionName']).first()
+        if not motion_type:
+            return Response({"detail": f"'{validated_data['motionName']}' 동작을 찾을 수 없습니다."}, status=status.HTTP_404_NOT_FOUND)
+
+        session = EvaluationSession.objects.create(
+            company=company,
+            employee=employee,
+            motion_type=motion_type,
+            channels=validated_data['channels'],
         )
+        return Response({"ok": True, "sessionId": session.id, "channels": session.channels}, status=status.HTTP_201_CREATED)
+
+
+class _OpenEvaluationSessionMixin:
+    """ 요청한 장비의 회사에 속한, 아직 종료되지 않은 세션을 찾는 공통 메서드 """
+
+    def _get_open_session(self, request, session_id):
+        session = EvaluationSession.objects.filter(id=session_id, company=request.company).select_related("employee", "motion_type").first()
+        if session is None:
+            return None, Response({"detail": "해당 평가 세션을 찾을 수 없습니다."}, status=status.HTTP_404_NOT_FOUND)
+        if session.status != EvaluationSession.Status.OPEN:
+            return None, Response({"detail": "이미 종료된 평가 세션입니다."}, status=status.HTTP_409_CONFLICT)
+        return session, None
+
+
+class EvaluationSessionChunkView(_OpenEvaluationSessionMixin, APIView):
+    """
+    세션에 센서 프레임 청크를 이어 붙이는 API
+    POST /api/ai/evaluate/sessions/{sessionId}/chunks/
+    - Content-Type: application/x-ndjson -> 한 줄에 프레임 하나 (딕셔너리 또는 channels 순서의 값 리스트)
+    - Content-Type: application/octet-stream -> little-endian float32 행렬 (프레임 순서, channels 순서)
+    """
+    permission_classes = [HasValidAPIKey]
+
+    def post(self, request, session_id, *args, **kwargs):
+        session, error_response = self._get_open_session(request, session_id)
+        if error_response:
+            return error_response
+
+        # request.data를 거치지 않고 본문을 그대로 읽어서 청크 크기만큼만 파싱
+        body = request.body
+        content_type = (request.content_type or "").split(";")[0].strip()
+        try:
+            if content_type == "application/octet-stream":
+                frames = parse_binary_chunk(body, session.channels)
+            else:
+                frames = parse_ndjson_chunk(body, session.channels)
+        except ChunkFormatError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if frames.shape[0] == 0:
+            return Response({"detail": "청크에 프레임이 없습니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            chunk = append_chunk(session, frames, max_frames=getattr(settings, "AI_STREAM_MAX_FRAMES", 200000))
+        except SessionNotOpenError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_409_CONFLICT)
+        except SessionFrameLimitError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        return Response({"ok": True, "seq": chunk.seq, "frames": chunk.frame_count, "totalFrames": session.frame_count})
+
+
+class EvaluationSessionFinalizeView(StageTimingMixin, _OpenEvaluationSessionMixin, APIView):
+    """
+    세션을 종료하고, 지금까지 받은 모든 프레임으로 평가를 실행하는 API
+    POST /api/ai/evaluate/sessions/{sessionId}/finalize/
+    """
+    permission_classes = [HasValidAPIKey]
+
+    def post(self, request, session_id, *args, **kwargs):
+        session, error_response = self._get_open_session(request, session_id)
+        if error_response:
+            return error_response
+
+        if session.frame_count == 0:
+            return Response({"detail": "평가할 프레임이 없습니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 같은 세션에 종료 요청이 동시에 들어와도 한 번만 평가하도록, 아직 열려 있는 경우에만 종료 상태로 바꾼 요청이 평가함
+        # (종료 상태로 바뀐 뒤에는 청크 추가도 거절되므로 이후 frame_count는 바뀌지 않음)
+        claimed = EvaluationSession.objects.filter(pk=session.pk, status=EvaluationSession.Status.OPEN).update(
+            status=EvaluationSession.Status.FINALIZED, finalized_at=timezone.now()
+        )
+        if not claimed:
+            return Response({"detail": "이미 종료된 평가 세션입니다."}, status=status.HTTP_409_CONFLICT)
+        session.refresh_from_db(fields=["status", "frame_count", "finalized_at"])
+
+        try:
+            frames = assemble_session_frames(session)
+            evaluation_result = run_evaluation(
+                motion_name=session.motion_type.motion_name,
+                employee=session.employee,
+                raw_sensor_data=frames,
+                channels=session.channels,
+            )
+        except Exception:
+            self._reopen(session)
+            raise
 
         if "error" in evaluation_result:
+            # 평가에 실패하면 다시 열어서 같은 세션으로 재시도할 수 있게 함
+            self._reopen(session)
             return Response(evaluation_result, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+        # 평가가 끝난 세션의 청크는 더 이상 필요 없으므로 삭제
+        session.result = evaluation_result
+        session.save(update_fields=["result"])
+        session.chunks.all().delete()
+
         response_data = {
             "ok": True,
             "detail": "평가가 완료되었습니다.",
             "evaluation": evaluation_result
         }
         return Response(response_data, status=status.HTTP_200_OK)
+
+    def _reopen(self, session):
+        EvaluationSession.objects.filter(pk=session.pk, status=EvaluationSession.Status.FINALIZED, result__isnull=True).update(
+            status=EvaluationSession.Status.OPEN, finalized_at=None
+        )
+
+
+class MetricsView(APIView):
+    """
+    평가 단계별 처리 시간 히스토그램과 평가기 캐시 지표를 Prometheus 텍스트 형식으로 반환 (프로세스 단위)
+    GET /api/ai/metrics/
+    'Authorization: Bearer <settings.AI_METRICS_TOKEN>' 헤더가 필요함 (토큰이 설정되지 않았으면 항상 거부)
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request, *args, **kwargs):
+        token = getattr(settings, "AI_METRICS_TOKEN", "")
+        if not token:
+            return Response({"detail": "지표 API가 비활성화되어 있습니다. (AI_METRICS_TOKEN 미설정)"}, status=status.HTTP_403_FORBIDDEN)
+        # 일치하는 앞부분 길이에 따라 비교 시간이 달라지지 않도록 상수 시간 비교
+        authorization = request.headers.get("Authorization", "")
+        if not secrets.compare_digest(authorization.encode(), f"Bearer {token}".encode()):
+            return Response({"detail": "유효하지 않은 토큰입니다."}, status=status.HTTP_401_UNAUTHORIZED)
+        return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -61,6 +61,10 @@ INSTALLED_APPS = [
     "ai"
 ]
 
+# 개발용 성능 측정 명령(bench_*)을 모아 둔 앱. 기본은 DEBUG일 때만 설치하고, 운영 설정에서 측정하려면 BENCHMARKS=True
+if env.bool("BENCHMARKS", default=DEBUG):
+    INSTALLED_APPS.append("benchmarks")
+
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
@@ -165,4 +169,66 @@ CORS_ALLOWED_ORIGINS = [
 # 데이터 변경 요청시 허용하는 출처 목록
 CSRF_TRUSTED_ORIGINS = [
     "http://localhost:5173",
-]
\ No newline at end of file
+]
+
+# AI 동작 평가 설정
+
+# DTW 거리 계산에 사용할 병렬 작업자(스레드) 수. 1이면 단일 스레드로 계산
+AI_DTW_WORKERS = env.int("AI_DTW_WORKERS", default=1)
+
+# LB_Keogh 하한 / 조기 중단으로 DTW 계산을 건너뛸지 여부 (점수와 max_dtw_distance 결과는 동일)
+AI_DTW_PRUNING = env.bool("AI_DTW_PRUNING", default=False)
+
+# 프로세스마다 메모리에 보관할 MotionEvaluator의 최대 개수(LRU)와 유효 시간(초, 미설정 시 무제한)
+AI_EVALUATOR_CACHE_SIZE = env.int("AI_EVALUATOR_CACHE_SIZE", default=32)
+AI_EVALUATOR_CACHE_TTL = env.float("AI_EVALUATOR_CACHE_TTL", default=None)
+
+# True이면 max_dtw_distance 재계산을 DB 작업 큐에 넣고 `python manage.py run_ai_jobs` 워커가 처리함
+# False(기본)이면 업로드 요청 안에서 바로 계산함. 워커 없이 True로 두면 재계산이 큐에 쌓이기만 하므로, 워커를 띄운 배포에서만 켬
+AI_CALIBRATION_ASYNC = env.bool("AI_CALIBRATION_ASYNC", default=False)
+
+# 스트리밍(청크) 평가 세션 하나가 받을 수 있는 최대 프레임 수
+AI_STREAM_MAX_FRAMES = env.int("AI_STREAM_MAX_FRAMES", default=200000)
+# 이 시간(초) 동안 청크가 들어오지 않은 열린 세션은 버려진 것으로 보고 run_ai_jobs 워커가 청크와 함께 삭제함
+AI_STREAM_SESSION_TTL = env.float("AI_STREAM_SESSION_TTL", default=3600.0)
+
+# True이면 평가 응답(evaluation.timings_ms)에 단계별 처리 시간(ms)을 포함함
+AI_EVALUATION_TIMING = env.bool("AI_EVALUATION_TIMING", default=DEBUG)
+
+# 평가할 때 UserRecording에 미리 저장해 두는 대시보드용 그래프 미리보기의 점 개수 (LTTB)
+AI_GRAPH_PREVIEW_POINTS = env.int("AI_GRAPH_PREVIEW_POINTS", default=500)
+
+# True이면 평가 응답에 단계별 처리 시간을 Server-Timing 헤더로 포함함 (브라우저 개발자 도구 등에서 확인)
+AI_SERVER_TIMING = env.bool("AI_SERVER_TIMING", default=False)
+
+# /api/ai/metrics/ 접근 토큰. 'Authorization: Bearer <토큰>' 헤더가 필요함 (빈 값이면 지표 API를 막음)
+AI_METRICS_TOKEN = env.str("AI_METRICS_TOKEN", default="")
+
+# 배치 평가(/api/ai/evaluate/batch/) 한 번에 받을 수 있는 최대 항목 수와 점수 계산 스레드 수
+# (스레드마다 DTW 계산에 AI_DTW_WORKERS개 스레드를 쓰므로 둘의 곱이 CPU 코어 수를 넘지 않게 설정)
+AI_BATCH_MAX_ITEMS = env.int("AI_BATCH_MAX_ITEMS", default=100)
+AI_BATCH_WORKERS = env.int("AI_BATCH_WORKERS", default=4)
+
+# API 키 -> 디바이스 조회 결과를 프로세스 메모리에 보관하는 개수와 유효 시간(초, 0이면 캐시 사용 안 함)
+# 디바이스 비활성화/키 변경은 시그널로 바로 반영되고, 다른 워커 프로세스에는 TTL 안에 반영됨
+AI_API_KEY_CACHE_SIZE = env.int("AI_API_KEY_CACHE_SIZE", default=1024)
+AI_API_KEY_CACHE_TTL = env.float("AI_API_KEY_CACHE_TTL", default=60.0)
+# 없는 API 키 조회 결과를 보관할 시간(초)
+AI_API_KEY_NEGATIVE_TTL = env.float("AI_API_KEY_NEGATIVE_TTL", default=5.0)
+
+# 비동기 평가(/api/ai/evaluate/async/)의 점수 계산 작업자 수와, 처리 중 + 대기 중인 작업의 최대 개수(넘으면 429)
+# AI_ASYNC_EVAL_PROCESSES가 False이면 프로세스 대신 스레드로 계산함 (프로세스를 만들 수 없는 환경용)
+AI_ASYNC_EVAL_WORKERS = env.int("AI_ASYNC_EVAL_WORKERS", default=2)
+AI_ASYNC_EVAL_MAX_PENDING = env.int("AI_ASYNC_EVAL_MAX_PENDING", default=8)
+AI_ASYNC_EVAL_PROCESSES = env.bool("AI_ASYNC_EVAL_PROCESSES", default=True)
+# 429 응답의 Retry-After 헤더 값(초)
+AI_ASYNC_EVAL_RETRY_AFTER = env.int("AI_ASYNC_EVAL_RETRY_AFTER", default=1)
+# 점수 계산 작업자 프로세스의 nice 값 (CPU를 웹 요청과 나눠 쓸 때 대시보드 등 웹 요청이 먼저 스케줄되도록 낮은 우선순위로 실행)
+AI_ASYNC_EVAL_NICE = env.int("AI_ASYNC_EVAL_NICE", default=10)
+
+# True이면 서버 시작 시(워커 fork 전, gunicorn --preload) 모든 동작의 평가기를 미리 만들어 첫 요청부터 바로 평가함
+AI_PREWARM_EVALUATORS = env.bool("AI_PREWARM_EVALUATORS", default=False)
+
+# 평가기가 모범 동작 배열을 보관하는 자료형: "float64"(기본) 또는 "float32"(메모리 절반)
+# float32이면 점수가 float64와 조금 다를 수 있음 (허용 오차와 메모리 비교: python manage.py bench_reference_memory)
+AI_REFERENCE_DTYPE = env.str("AI_REFERENCE_DTYPE", default="float64")
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+# AI_PREWARM_EVALUATORS가 켜져 있으면 워커를 fork하기 전에 평가기를 미리 만듦 (gunicorn --preload)
+from ai.evaluator_cache import prefork_warm_up  # noqa: E402
+
+prefork_warm_up()
@@ -0,0 +1,7 @@
+# benchmarks/apps.py
+from django.apps import AppConfig
+
+class BenchmarksConfig(AppConfig):
+    """ 개발용 성능 측정 명령(bench_*)만 모아 둔 앱. 모델이 없고, 운영 환경에는 설치하지 않음 """
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "benchmarks"
@@ -0,0 +1,128 @@
+# benchmarks/fixtures.py
+"""
+bench_* 명령이 함께 쓰는 측정용 데이터와 임시 DB
+(앱 코드는 이 모듈을 불러오지 않음. 테스트에서는 비교용 구현/합성 데이터를 가져다 쓸 수 있음)
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from scipy.signal import savgol_filter
+
+from ai.logic import update_max_dtw_for_motion
+from ai.models import MotionRecording, MotionType, SensorDevice
+from ai.safty_training_ai import preprocess_sensor_data
+from organizations.models import Company, Employee
+
+# sensor_exam.txt 기준 8채널 스키마
+SENSOR_CHANNELS = ["flex1", "flex2", "flex3", "flex4", "flex5", "gyro_x", "gyro_y", "gyro_z"]
+
+BENCH_BIZ_NO = "0000000000"
+
+
+def make_synthetic_frames(num_frames: int, seed: int = 0) -> list:
+    """ 벤치마크용 가짜 센서 프레임(딕셔너리 리스트)을 만드는 함수 """
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0, 4 * np.pi, num_frames)
+    frames = []
+    for i in range(num_frames):
+        frame = {}
+        for c, name in enumerate(SENSOR_CHANNELS):
+            if "flex" in name:
+                frame[name] = float(50 + 40 * np.sin(t[i] + c) + rng.normal(0, 2))
+            else:
+                frame[name] = float(25 * np.cos(t[i] * 0.5 + c) + rng.normal(0, 1))
+        frames.append(frame)
+    return frames
+
+
+def preprocess_sensor_data_pandas(raw_data_dicts) -> np.ndarray:
+    """ 비교용: numpy 경로로 바꾸기 전의 pandas 기반 전처리 구현 """
+    if not raw_data_dicts:
+        return np.array([])
+
+    df = pd.DataFrame(raw_data_dicts)
+    window_length = min(df.shape[0] - (df.shape[0] % 2 == 0), 11)
+    if window_length < 3:
+        window_length = 3
+
+    smoothed_data = df.apply(lambda col: savgol_filter(col, window_length, 3))
+    normalized_data = pd.DataFrame(index=smoothed_data.index, columns=smoothed_data.columns)
+    for col in smoothed_data.columns:
+        if "flex" in col:
+            s_min, s_max = 0, 100
+        elif "gyro" in col:
+            s_min, s_max = -30, 30
+        normalized_data[col] = (smoothed_data[col] - s_min) / (s_max - s_min)
+    return normalized_data.values
+
+
+@contextmanager
+def bench_database(sqlite_file: str = None):
+    """
+    실제 DB를 건드리지 않도록 임시 테스트 DB(SQLite면 메모리 DB)를 만들고, 블록이 끝나면 지움
+    sqlite_file: 다른 프로세스도 같은 DB를 봐야 할 때 메모리 DB 대신 사용할 임시 파일 이름
+    """
+    test_settings = connection.settings_dict.setdefault("TEST", {})
+    if sqlite_file and connection.vendor == "sqlite" and not test_settings.get("NAME"):
+        test_settings["NAME"] = os.path.join(tempfile.gettempdir(), sqlite_file)
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def create_bench_company(password: str = None):
+    """ 측정용 회사. password를 넘기면 대시보드 로그인용 비밀번호를 설정 """
+    company = Company.objects.create(name="bench", biz_no=BENCH_BIZ_NO)
+    if password:
+        company.set_password(password)
+        company.save()
+    return company
+
+
+def create_bench_employees(company, count: int) -> list:
+    """ 측정용 직원 count명을 한 번에 만들고 id 목록을 반환 """
+    Employee.objects.bulk_create([
+        Employee(company=company, emp_no=f"BENCH{e:06d}", name=f"bench {e}") for e in range(count)
+    ])
+    return list(Employee.objects.filter(company=company).values_list("id", flat=True))
+
+
+def create_bench_account(password: str = None):
+    """ 평가 요청용 (회사, 직원, 장비) """
+    company = create_bench_company(password)
+    employee = Employee.objects.create(company=company, emp_no="BENCH001", name="bench")
+    device = SensorDevice.objects.create(company=company, device_uid="bench")
+    return company, employee, device
+
+
+def create_motion(name: str, num_references: int, num_zero: int, reference_frames: int) -> MotionType:
+    """ 합성 모범/0점 동작으로 평가용 동작을 만들고 max_dtw_distance까지 계산 """
+    motion_type = MotionType.objects.create(motion_name=name)
+    recordings = [("reference", seed) for seed in range(num_references)]
+    recordings += [("zero_score", 1000 + seed) for seed in range(num_zero)]
+    for score_category, seed in recordings:
+        preprocessed = preprocess_sensor_data(make_synthetic_frames(reference_frames, seed=seed))
+        if score_category == "zero_score":
+            # 0점 동작은 모범 동작과 충분히 다르도록 뒤집어서 사용
+            preprocessed = preprocessed[::-1]
+        MotionRecording.objects.create(
+            motion_type=motion_type,
+            score_category=score_category,
+            data_frames=preprocessed.shape[0],
+            sensor_data_json=preprocessed.tolist(),
+        )
+    motion_type.refresh_from_db()
+    update_max_dtw_for_motion(motion_type)
+    motion_type.refresh_from_db()
+    return motion_type
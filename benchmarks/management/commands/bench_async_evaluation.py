@@ -0,0 +1,114 @@
+# benchmarks/management/commands/bench_async_evaluation.py
+
+import asyncio
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient
+
+from ai.evaluation_pool import evaluation_pool
+from ai.logic import get_motion_projection, get_reference_graph_series
+from benchmarks.fixtures import bench_database, create_bench_account, create_motion, make_synthetic_frames
+
+# 평가가 몰리는 동안 지연 시간을 재는 대시보드 API
+DASHBOARD_PATH = "/api/ai/motion-types/"
+
+
+def _percentile(samples: list, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = (
+        "평가 요청이 한꺼번에 몰릴 때 대시보드 API의 지연 시간(p50/p99)을 동기 평가(/api/ai/evaluate/)와 "
+        "비동기 평가(/api/ai/evaluate/async/)로 비교합니다. ASGI 핸들러(AsyncClient)로 한 프로세스 안에서 측정하며, 임시 테스트 DB를 사용합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--burst", type=int, default=8, help="동시에 보내는 평가 요청 수")
+        parser.add_argument("--frames", type=int, default=1000, help="평가 요청 한 번의 프레임 수")
+        parser.add_argument("--references", type=int, default=5, help="동작의 모범 동작 기록 수")
+        parser.add_argument("--reference-frames", type=int, default=300, help="모범/0점 동작 기록 하나의 프레임 수")
+        parser.add_argument("--dashboard-interval", type=float, default=0.01, help="대시보드 요청 사이 간격(초)")
+
+    def handle(self, *args, **options):
+        # 점수 계산 프로세스도 같은 DB를 봐야 하므로 SQLite는 메모리 DB 대신 임시 파일 DB를 사용
+        with bench_database(sqlite_file="bench_async_evaluation.sqlite3"):
+            try:
+                self._run(options)
+            finally:
+                evaluation_pool.shutdown()
+
+    def _run(self, options):
+        company, employee, device = create_bench_account(password="bench-password")
+        motion_type = create_motion("bench_async", options["references"], 2, options["reference_frames"])
+        # 작업자 프로세스가 투영 축/그래프를 다시 계산해서 저장하지 않도록 미리 계산
+        get_motion_projection(motion_type)
+        get_reference_graph_series(motion_type)
+
+        body = json.dumps({
+            "motionName": motion_type.motion_name,
+            "empNo": employee.emp_no,
+            "sensorData": make_synthetic_frames(options["frames"], seed=1),
+        })
+        self.stdout.write(
+            f"burst={options['burst']} frames={options['frames']} references={options['references']} "
+            f"workers={evaluation_pool.workers} max_pending={evaluation_pool.max_pending}"
+        )
+        self.stdout.write(
+            f"{'scenario':<14} {'dash reqs':>9} {'p50(ms)':>9} {'p99(ms)':>9} {'max(ms)':>9} "
+            f"{'burst(s)':>9} {'200':>5} {'429':>5}"
+        )
+        asyncio.run(self._scenarios(company, device, body, options))
+
+    async def _scenarios(self, company, device, body, options):
+        dashboard = AsyncClient()
+        response = await dashboard.post("/api/auth/login", {"biz_no": company.biz_no, "password": "bench-password"}, content_type="application/json")
+        assert response.status_code == 200, response.content
+        evaluator_client = AsyncClient()
+
+        async def evaluate(path):
+            response = await evaluator_client.post(path, body, content_type="application/json", headers={"X-API-Key": device.api_key})
+            return response.status_code
+
+        # 평가기 생성, 작업자 프로세스 시작 등 첫 요청 비용은 측정에서 제외
+        for path in ("/api/ai/evaluate/", "/api/ai/evaluate/async/"):
+            await asyncio.gather(*[evaluate(path) for _ in range(evaluation_pool.workers * 2)])
+
+        for name, path in (("idle", None), ("sync burst", "/api/ai/evaluate/"), ("async burst", "/api/ai/evaluate/async/")):
+            await self._scenario(name, path, dashboard, evaluate, options)
+
+    async def _scenario(self, name, path, dashboard, evaluate, options):
+        latencies = []
+        done = asyncio.Event()
+
+        async def poll_dashboard():
+            # 평가가 끝날 때까지(없으면 50번) 대시보드 API를 계속 호출
+            while not done.is_set() or len(latencies) < 50:
+                started = time.perf_counter()
+                response = await dashboard.get(DASHBOARD_PATH)
+                latencies.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200, response.content
+                if path is None and len(latencies) >= 50:
+                    break
+                await asyncio.sleep(options["dashboard_interval"])
+
+        async def burst():
+            if path is None:
+                return []
+            try:
+                return await asyncio.gather(*[evaluate(path) for _ in range(options["burst"])])
+            finally:
+                done.set()
+
+        started = time.perf_counter()
+        statuses, _ = await asyncio.gather(burst(), poll_dashboard())
+        elapsed = time.perf_counter() - started if path else 0.0
+
+        self.stdout.write(
+            f"{name:<14} {len(latencies):>9} {statistics.median(latencies):>9.1f} {_percentile(latencies, 0.99):>9.1f} "
+            f"{max(latencies):>9.1f} {elapsed:>9.2f} {statuses.count(200):>5} {statuses.count(429):>5}"
+        )
@@ -0,0 +1,106 @@
+# benchmarks/management/commands/bench_employee_bulk.py
+
+import csv
+import io
+import time
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from benchmarks.fixtures import bench_database
+from organizations.bulk import iter_employee_rows_from_csv, upsert_employees
+from organizations.models import Company, Employee
+
+
+def make_employee_rows(num_rows: int, suffix: str = "") -> list:
+    """ 벤치마크용 가짜 직원 행 """
+    return [
+        {
+            "emp_no": f"E{i:06d}",
+            "name": f"직원{i}{suffix}",
+            "dept": f"부서{i % 50}",
+            "phone": f"010-{i % 10000:04d}-{i // 10000:04d}",
+            "email": f"e{i}@example.com",
+        }
+        for i in range(num_rows)
+    ]
+
+
+def upsert_employees_legacy(company_id, rows: list) -> dict:
+    """ 비교용: 행마다 update_or_create를 호출하던 기존 구현 """
+    created, updated = 0, 0
+    for r in rows:
+        emp_no = (r.get("emp_no") or "").strip()
+        if not emp_no:
+            continue
+        defaults = {field: r.get(field, "") or "" for field in ("name", "dept", "phone", "email")}
+        _, was_created = Employee.objects.update_or_create(company_id=company_id, emp_no=emp_no, defaults=defaults)
+        created += 1 if was_created else 0
+        updated += 0 if was_created else 1
+    return {"created": created, "updated": updated, "count": len(rows)}
+
+
+def _csv_upload(rows: list) -> SimpleUploadedFile:
+    text = io.StringIO()
+    writer = csv.DictWriter(text, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    return SimpleUploadedFile("employees.csv", text.getvalue().encode("utf-8"), content_type="text/csv")
+
+
+class _QueryCounter:
+    """ 실행된 SQL 문장 수를 세는 execute_wrapper (쿼리 내용은 저장하지 않음) """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = "직원 대량 업로드(EmployeeViewSet.bulk)의 기존 구현(행마다 update_or_create)과 묶음 upsert 구현을 비교합니다. (임시 테스트 DB 사용)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+        parser.add_argument("--legacy-max", type=int, default=10000, help="이 행 수보다 많으면 기존 구현은 건너뜀 (너무 오래 걸림)")
+
+    def handle(self, *args, **options):
+        # 실제 DB를 건드리지 않도록 임시 테스트 DB(SQLite면 메모리 DB)에서 측정
+        with bench_database():
+            self._run(options)
+
+    def _measure(self, func):
+        counter = _QueryCounter()
+        with connection.execute_wrapper(counter):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+        return elapsed, counter.count, result
+
+    def _run(self, options):
+        self.stdout.write(f"{'rows':>8} {'path':<18} {'import':<9} {'time(s)':>9} {'rows/s':>10} {'queries':>8} {'created':>8} {'updated':>8}")
+        for num_rows in options["rows"]:
+            rows = make_employee_rows(num_rows)
+            changed_rows = make_employee_rows(num_rows, suffix="-변경")
+
+            paths = [
+                ("bulk upsert", lambda cid, data: upsert_employees(cid, data)),
+                ("bulk upsert (csv)", lambda cid, data: upsert_employees(cid, iter_employee_rows_from_csv(_csv_upload(data)))),
+            ]
+            if num_rows <= options["legacy_max"]:
+                # 기존 구현도 요청 하나(트랜잭션 하나) 안에서 실행한 것으로 측정
+                paths.insert(0, ("legacy", lambda cid, data: transaction.atomic()(upsert_employees_legacy)(cid, data)))
+
+            for index, (name, func) in enumerate(paths):
+                company = Company.objects.create(name=f"bench{num_rows}-{index}", biz_no=f"{num_rows % 10**6:06d}{index:04d}")
+                # 처음 업로드(모두 생성) -> 같은 사번으로 다시 업로드(모두 수정)
+                for label, data in (("new", rows), ("re-import", changed_rows)):
+                    elapsed, queries, result = self._measure(lambda: func(company.id, data))
+                    self.stdout.write(
+                        f"{num_rows:>8} {name:<18} {label:<9} {elapsed:>9.3f} {num_rows / elapsed:>10.0f} "
+                        f"{queries:>8} {result['created']:>8} {result['updated']:>8}"
+                    )
+                Employee.objects.filter(company=company).delete()
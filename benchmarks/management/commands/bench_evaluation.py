@@ -0,0 +1,145 @@
+# benchmarks/management/commands/bench_evaluation.py
+
+import json
+import platform
+import statistics
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+
+from ai.evaluator_cache import get_evaluator
+from ai.logic import project_for_graph
+from ai.safty_training_ai import preprocess_sensor_data
+from ai.serializers import EvaluationRequestSerializer
+from benchmarks.fixtures import SENSOR_CHANNELS, bench_database, create_bench_account, create_motion, make_synthetic_frames
+
+# 결과 JSON 형식이 바뀌면 올림 (이전 결과와 비교할 때 확인용)
+RESULT_SCHEMA_VERSION = 1
+
+# 측정하는 단계 (순서대로 출력)
+STAGES = ["preprocess", "dtw", "pca", "serializer", "view"]
+
+
+def _timings(func, repeat: int) -> list:
+    """ func를 한 번 실행해서 준비(캐시 등)를 마친 뒤, repeat번 실행한 시간(ms) 목록 """
+    func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+class Command(BaseCommand):
+    help = (
+        "평가 경로(/api/ai/evaluate/)의 단계별 처리 시간을 측정합니다. "
+        "임시 테스트 DB를 만들어 합성 8채널 데이터로 측정하고, 결과를 JSON으로 저장/비교할 수 있습니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--frames", type=int, nargs="+", default=[100, 500, 2000], help="평가 요청 한 번의 프레임 수")
+        parser.add_argument("--references", type=int, nargs="+", default=[1, 5, 20], help="동작의 모범 동작 기록 수")
+        parser.add_argument("--zero", type=int, default=2, help="동작의 0점 동작 기록 수")
+        parser.add_argument("--reference-frames", type=int, default=300, help="모범/0점 동작 기록 하나의 프레임 수")
+        parser.add_argument("--repeat", type=int, default=10)
+        parser.add_argument("--output", help="결과를 JSON 파일로 저장")
+        parser.add_argument("--compare", help="이전에 저장한 결과 JSON과 중앙값(median) 비교")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as f:
+                baseline = json.load(f)
+            if baseline.get("schema") != RESULT_SCHEMA_VERSION:
+                raise CommandError(f"비교할 결과 파일의 형식 버전이 다릅니다: {baseline.get('schema')}")
+
+        # 실제 DB를 건드리지 않도록 임시 테스트 DB(SQLite면 메모리 DB)에서 측정
+        with bench_database():
+            results = self._run(options)
+
+        report = {
+            "schema": RESULT_SCHEMA_VERSION,
+            "meta": {
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "db_vendor": connection.vendor,
+                "repeat": options["repeat"],
+                "reference_frames": options["reference_frames"],
+                "zero_recordings": options["zero"],
+                "AI_DTW_WORKERS": getattr(settings, "AI_DTW_WORKERS", 1),
+                "AI_DTW_PRUNING": getattr(settings, "AI_DTW_PRUNING", False),
+            },
+            "results": results,
+        }
+        self._print_table(results, baseline)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            self.stdout.write(f"결과 저장: {options['output']}")
+
+    def _run(self, options) -> list:
+        _, employee, device = create_bench_account()
+        client = Client()
+
+        results = []
+        for num_references in options["references"]:
+            motion_type = create_motion(f"bench_{num_references}", num_references, options["zero"], options["reference_frames"])
+            evaluator = get_evaluator(motion_type.motion_name, version=motion_type.data_revision)
+
+            for num_frames in options["frames"]:
+                frames = make_synthetic_frames(num_frames, seed=num_frames)
+                preprocessed = preprocess_sensor_data(frames)
+                payload = {"motionName": motion_type.motion_name, "empNo": employee.emp_no, "sensorData": frames}
+                body = json.dumps(payload)
+
+                def post_view():
+                    response = client.post("/api/ai/evaluate/", body, content_type="application/json", HTTP_X_API_KEY=device.api_key)
+                    if response.status_code != 200:
+                        raise CommandError(f"평가 요청 실패 ({response.status_code}): {response.content[:200]}")
+
+                stages = {
+                    "preprocess": lambda: preprocess_sensor_data(frames),
+                    "dtw": lambda: evaluator.evaluate_preprocessed(preprocessed, motion_type.max_dtw_distance),
+                    "pca": lambda: project_for_graph(motion_type, preprocessed),
+                    "serializer": lambda: EvaluationRequestSerializer(data=payload).is_valid(raise_exception=True),
+                    "view": post_view,
+                }
+                for stage in STAGES:
+                    samples = _timings(stages[stage], options["repeat"])
+                    results.append({
+                        "frames": num_frames,
+                        "references": num_references,
+                        "channels": len(SENSOR_CHANNELS),
+                        "stage": stage,
+                        "min_ms": round(min(samples), 4),
+                        "median_ms": round(statistics.median(samples), 4),
+                        "mean_ms": round(statistics.fmean(samples), 4),
+                    })
+        return results
+
+    def _print_table(self, results: list, baseline: dict = None):
+        baseline_medians = {}
+        if baseline:
+            baseline_medians = {
+                (row["frames"], row["references"], row["stage"]): row["median_ms"] for row in baseline["results"]
+            }
+
+        header = f"{'frames':>7} {'refs':>5} {'stage':<11} {'min(ms)':>10} {'median(ms)':>11} {'mean(ms)':>10}"
+        if baseline:
+            header += f" {'baseline':>10} {'ratio':>7}"
+        self.stdout.write(header)
+        for row in results:
+            line = (
+                f"{row['frames']:>7} {row['references']:>5} {row['stage']:<11} "
+                f"{row['min_ms']:>10.3f} {row['median_ms']:>11.3f} {row['mean_ms']:>10.3f}"
+            )
+            previous = baseline_medians.get((row["frames"], row["references"], row["stage"]))
+            if previous:
+                line += f" {previous:>10.3f} {row['median_ms'] / previous:>6.2f}x"
+            self.stdout.write(line)
@@ -0,0 +1,76 @@
+# benchmarks/management/commands/bench_graph_data.py
+
+import time
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from sklearn.decomposition import PCA
+
+from ai.logic import get_evaluation_graph_data
+from ai.models import MotionType, MotionRecording, UserRecording
+from enrollments.models import Enrollment
+
+
+def get_evaluation_graph_data_legacy(enrollment_id: int) -> dict:
+    """ 비교용: 모범 동작 시계열을 저장하기 전의 구현 (요청마다 모범 동작 JSON 조회 + DataFrame + PCA 학습) """
+    enrollment = Enrollment.objects.select_related('employee', 'course__motion_type').get(id=enrollment_id)
+    employee = enrollment.employee
+    motion_type = enrollment.course.motion_type
+
+    latest_user_recording = UserRecording.objects.filter(user=employee, motion_type=motion_type).order_by('-recorded_at').first()
+    reference_recording = MotionRecording.objects.filter(motion_type=motion_type, score_category='reference').order_by('-recorded_at').first()
+
+    df = pd.DataFrame(reference_recording.sensor_data_json)
+    ref_graph_data = PCA(n_components=1).fit_transform(df.values).flatten().tolist()
+    return {
+        "motionName": motion_type.motion_name,
+        "userName": employee.name,
+        "score": latest_user_recording.score,
+        "userMotionGraphData": latest_user_recording.sensor_data_json,
+        "referenceMotionGraphData": ref_graph_data,
+    }
+
+
+def _measure(func, enrollment_id: int, repeat: int, before=None):
+    """ 가장 빠른 실행 시간(초)과 그때의 쿼리 수 """
+    best, queries = float("inf"), 0
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            func(enrollment_id)
+            elapsed = time.perf_counter() - start
+        if elapsed < best:
+            best, queries = elapsed, len(captured.captured_queries)
+    return best, queries
+
+
+class Command(BaseCommand):
+    help = "수강생 최근 평가 그래프(latest-evaluation-graph) 데이터 생성 시간을 기존 구현/저장된 시계열 사용 시로 비교합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("enrollment_id", type=int)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        enrollment_id = options["enrollment_id"]
+        graph_data = get_evaluation_graph_data(enrollment_id)
+        if "error" in graph_data:
+            raise CommandError(graph_data["error"])
+        motion_type_id = Enrollment.objects.values_list("course__motion_type", flat=True).get(id=enrollment_id)
+
+        def invalidate():
+            MotionType.objects.filter(pk=motion_type_id).update(reference_graph_revision=None)
+
+        results = [
+            ("legacy (PCA per request)", _measure(get_evaluation_graph_data_legacy, enrollment_id, options["repeat"])),
+            ("stored series, cold", _measure(get_evaluation_graph_data, enrollment_id, options["repeat"], before=invalidate)),
+            ("stored series, warm", _measure(get_evaluation_graph_data, enrollment_id, options["repeat"])),
+        ]
+
+        self.stdout.write(f"{'path':<26} {'time(ms)':>10} {'queries':>8}")
+        for name, (elapsed, queries) in results:
+            self.stdout.write(f"{name:<26} {elapsed * 1000:>10.3f} {queries:>8}")
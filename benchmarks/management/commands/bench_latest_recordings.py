@@ -0,0 +1,136 @@
+# benchmarks/management/commands/bench_latest_recordings.py
+
+import datetime
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from ai.models import LatestUserRecording, MotionType, UserRecording
+from benchmarks.fixtures import bench_database, create_bench_company, create_bench_employees
+from organizations.models import Employee
+
+
+def _legacy_latest(user=OuterRef("id"), motion_type_id=None):
+    """ 비교용: 요약 테이블 전의 구현 (기록을 recorded_at 역순으로 정렬해서 첫 번째) """
+    return UserRecording.objects.filter(user=user, motion_type_id=motion_type_id).order_by("-recorded_at").values("id")
+
+
+def _summary_latest(user=OuterRef("id"), motion_type_id=None):
+    return LatestUserRecording.objects.filter(user=user, motion_type_id=motion_type_id).values("recording_id")
+
+
+# 비교하는 최근 기록 찾기 방식: (이름, 쿼리셋을 만드는 함수, 복합 인덱스를 지우고 재는지)
+MODES = [
+    ("order_by, no composite idx", _legacy_latest, True),
+    ("order_by, composite idx", _legacy_latest, False),
+    ("LatestUserRecording", _summary_latest, False),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "직원 x 동작별 가장 최근 평가 기록을 찾는 시간을 UserRecording 정렬(복합 인덱스 없음/있음)과 "
+        "LatestUserRecording 요약 테이블로 비교합니다. 한 건 조회(그래프)와 여러 직원 한 번에 조회(대시보드)를 재며, 임시 테스트 DB를 사용합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=2000, help="직원 수")
+        parser.add_argument("--motions", type=int, default=5, help="동작 수")
+        parser.add_argument("--attempts", type=int, default=100, help="직원 x 동작별 평가 기록 수 (전체 기록 수 = 직원 x 동작 x 기록)")
+        parser.add_argument("--lookups", type=int, default=500, help="한 건 조회를 반복할 횟수")
+        parser.add_argument("--dashboard", type=int, default=500, help="대시보드 조회 한 번에 포함되는 직원 수")
+
+    def handle(self, *args, **options):
+        with bench_database():
+            self._run(options)
+
+    def _create_recordings(self, options):
+        company = create_bench_company()
+        MotionType.objects.bulk_create([MotionType(motion_name=f"bench_latest_{m}") for m in range(options["motions"])])
+        employee_ids = create_bench_employees(company, options["employees"])
+        motion_type_ids = list(MotionType.objects.filter(motion_name__startswith="bench_latest_").values_list("id", flat=True))
+
+        # 운영처럼 시간 순서대로 쌓이도록 recorded_at을 직접 넣음 (auto_now_add는 bulk_create에서도 현재 시각으로 덮어쓰므로 잠시 끔)
+        recorded_at = UserRecording._meta.get_field("recorded_at")
+        recorded_at.auto_now_add = False
+        started_at = timezone.now() - datetime.timedelta(days=365)
+        rng = random.Random(0)
+        try:
+            tick = 0
+            for _ in range(options["attempts"]):
+                batch = []
+                for employee_id in employee_ids:
+                    for motion_type_id in motion_type_ids:
+                        tick += 1
+                        batch.append(UserRecording(
+                            user_id=employee_id,
+                            motion_type_id=motion_type_id,
+                            score=rng.uniform(0, 100),
+                            recorded_at=started_at + datetime.timedelta(seconds=tick),
+                        ))
+                UserRecording.objects.bulk_create(batch, batch_size=2000)
+        finally:
+            recorded_at.auto_now_add = True
+        return employee_ids, motion_type_ids
+
+    def _run(self, options):
+        started = time.perf_counter()
+        employee_ids, motion_type_ids = self._create_recordings(options)
+        insert_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        summary_rows = LatestUserRecording.rebuild()
+        rebuild_seconds = time.perf_counter() - started
+        self.stdout.write(
+            f"recordings={UserRecording.objects.count()} (employees={options['employees']} x motions={options['motions']} "
+            f"x attempts={options['attempts']}) insert={insert_seconds:.1f}s summary rows={summary_rows} rebuild={rebuild_seconds:.1f}s"
+        )
+
+        rng = random.Random(1)
+        pairs = [(rng.choice(employee_ids), rng.choice(motion_type_ids)) for _ in range(options["lookups"])]
+        dashboard_ids = rng.sample(employee_ids, min(options["dashboard"], len(employee_ids)))
+        dashboard_motion = motion_type_ids[0]
+
+        self.stdout.write(f"{'mode':<28} {'graph lookup(ms)':>16} {'dashboard(ms)':>14}")
+        expected = None
+        index = UserRecording._meta.indexes[0]
+        for name, latest, drop_index in MODES:
+            if drop_index:
+                with connection.schema_editor() as editor:
+                    editor.remove_index(UserRecording, index)
+            try:
+                single = self._time_single(latest, pairs)
+                dashboard, found = self._time_dashboard(latest, dashboard_ids, dashboard_motion)
+            finally:
+                if drop_index:
+                    with connection.schema_editor() as editor:
+                        editor.add_index(UserRecording, index)
+            # 모든 방식이 같은 기록을 찾는지 확인
+            if expected is None:
+                expected = found
+            elif found != expected:
+                self.stderr.write(f"{name}: 찾은 최근 기록이 다릅니다.")
+            self.stdout.write(f"{name:<28} {single * 1000:>16.3f} {dashboard * 1000:>14.2f}")
+
+    def _time_single(self, latest, pairs) -> float:
+        """ (직원, 동작) 한 쌍의 최근 기록 id 조회 평균 시간(초) """
+        started = time.perf_counter()
+        for employee_id, motion_type_id in pairs:
+            list(latest(user=employee_id, motion_type_id=motion_type_id)[:1])
+        return (time.perf_counter() - started) / len(pairs)
+
+    def _time_dashboard(self, latest, employee_ids, motion_type_id, repeat: int = 5):
+        """ 여러 직원의 최근 기록 id를 서브쿼리 한 번으로 조회 (get_evaluation_graph_data_batch와 같은 형태). 가장 빠른 시간(초)과 결과 """
+        best, found = float("inf"), None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            found = dict(
+                Employee.objects.filter(id__in=employee_ids)
+                .annotate(latest_recording_id=Subquery(latest(motion_type_id=motion_type_id)[:1]))
+                .values_list("id", "latest_recording_id")
+            )
+            best = min(best, time.perf_counter() - started)
+        return best, found
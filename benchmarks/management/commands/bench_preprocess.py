@@ -0,0 +1,45 @@
+# benchmarks/management/commands/bench_preprocess.py
+
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from ai.safty_training_ai import preprocess_sensor_data
+from benchmarks.fixtures import make_synthetic_frames, preprocess_sensor_data_pandas
+
+def _best_of(func, arg, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class Command(BaseCommand):
+    help = "preprocess_sensor_data의 numpy 경로와 기존 pandas 경로의 속도/결과를 비교합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--frames", type=int, nargs="+", default=[100, 1000, 5000, 10000])
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'frames':>8} {'pandas(ms)':>12} {'numpy(ms)':>12} {'speedup':>8} {'max_abs_diff':>13}")
+        for num_frames in options["frames"]:
+            frames = make_synthetic_frames(num_frames)
+
+            expected = preprocess_sensor_data_pandas(frames)
+            actual = preprocess_sensor_data(frames)
+            # 가장자리 프레임의 다항식 적합(polyfit)이 채널 단위/행렬 단위로 계산되어 부동소수점 반올림 정도의 차이만 허용
+            if expected.shape != actual.shape or not np.allclose(expected, actual, rtol=0, atol=1e-12):
+                raise CommandError(f"{num_frames} 프레임에서 numpy 경로의 결과가 pandas 경로와 다릅니다.")
+            max_abs_diff = float(np.max(np.abs(expected - actual)))
+
+            pandas_time = _best_of(preprocess_sensor_data_pandas, frames, options["repeat"])
+            numpy_time = _best_of(preprocess_sensor_data, frames, options["repeat"])
+
+            self.stdout.write(
+                f"{num_frames:>8} {pandas_time * 1000:>12.3f} {numpy_time * 1000:>12.3f} "
+                f"{pandas_time / numpy_time:>7.1f}x {max_abs_diff:>13.1e}"
+            )
@@ -0,0 +1,133 @@
+# benchmarks/management/commands/bench_recording_list.py
+
+import datetime
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, models
+from django.db.models import Avg
+from django.utils import timezone
+
+from ai.logic import _run_pca_on_preprocessed_data, make_graph_preview
+from ai.models import MotionType, UserRecording, encode_graph_series
+from ai.safty_training_ai import preprocess_sensor_data
+from benchmarks.fixtures import bench_database, create_bench_company, create_bench_employees, make_synthetic_frames
+from organizations.models import Employee
+
+# 서로 다른 시계열 수 (기록마다 PCA를 새로 계산하지 않고 돌려 씀)
+DISTINCT_SERIES = 50
+
+
+def _legacy_model():
+    """ 비교용: 시계열을 같은 행의 JSON 컬럼(sensor_data_json)에 저장하던 이전 UserRecording과 같은 구조의 테이블 (벤치마크 DB에만 만듦) """
+    class Meta:
+        app_label = "ai"
+        db_table = "bench_legacy_userrecording"
+        managed = False
+
+    return type("BenchLegacyUserRecording", (models.Model,), {
+        "__module__": __name__,
+        "Meta": Meta,
+        "user": models.ForeignKey(Employee, on_delete=models.DO_NOTHING, related_name="+"),
+        "motion_type": models.ForeignKey(MotionType, on_delete=models.DO_NOTHING, related_name="+"),
+        "score": models.FloatField(),
+        "sensor_data_json": models.JSONField(null=True),
+        "graph_preview": models.JSONField(null=True),
+        "recorded_at": models.DateTimeField(),
+    })
+
+
+class Command(BaseCommand):
+    help = (
+        "평가 기록 목록/통계 쿼리 시간을 시계열을 같은 행의 JSON 컬럼에 두던 이전 구조와 "
+        "압축 컬럼(기본 쿼리셋에서 그래프 데이터를 미룸)으로 비교합니다. 임시 테스트 DB를 사용합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recordings", type=int, default=20000, help="평가 기록 수")
+        parser.add_argument("--employees", type=int, default=500, help="직원 수")
+        parser.add_argument("--frames", type=int, default=300, help="평가 한 번의 프레임 수 (저장되는 시계열 길이)")
+        parser.add_argument("--page", type=int, default=500, help="목록 조회 한 번의 기록 수")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with bench_database():
+            self._run(options)
+
+    def _create_recordings(self, legacy_model, options):
+        company = create_bench_company()
+        employee_ids = create_bench_employees(company, options["employees"])
+        motion_type = MotionType.objects.create(motion_name="bench_list")
+
+        series = [
+            _run_pca_on_preprocessed_data(preprocess_sensor_data(make_synthetic_frames(options["frames"], seed=s)))
+            for s in range(DISTINCT_SERIES)
+        ]
+        compressed = [encode_graph_series(values) for values in series]
+        previews = [make_graph_preview(values) for values in series]
+
+        started_at = timezone.now() - datetime.timedelta(days=365)
+        for start in range(0, options["recordings"], 2000):
+            rows = range(start, min(start + 2000, options["recordings"]))
+            common = [
+                dict(
+                    user_id=employee_ids[i % len(employee_ids)],
+                    motion_type=motion_type,
+                    score=float(i % 100),
+                    graph_preview=previews[i % DISTINCT_SERIES],
+                    recorded_at=started_at + datetime.timedelta(seconds=i),
+                )
+                for i in rows
+            ]
+            legacy_model.objects.bulk_create([
+                legacy_model(sensor_data_json=series[i % DISTINCT_SERIES], **values) for i, values in zip(rows, common)
+            ])
+            UserRecording.objects.bulk_create([
+                UserRecording(sensor_data_compressed=compressed[i % DISTINCT_SERIES], **values) for i, values in zip(rows, common)
+            ])
+        return motion_type, series, compressed
+
+    def _run(self, options):
+        legacy_model = _legacy_model()
+        with connection.schema_editor() as editor:
+            editor.create_model(legacy_model)
+        motion_type, series, compressed = self._create_recordings(legacy_model, options)
+
+        json_bytes = sum(len(json.dumps(values)) for values in series) / len(series)
+        compressed_bytes = sum(len(data) for data in compressed) / len(compressed)
+        self.stdout.write(
+            f"recordings={options['recordings']} frames={options['frames']} page={options['page']} "
+            f"series bytes/row: json={json_bytes:.0f} compressed={compressed_bytes:.0f} ({json_bytes / compressed_bytes:.1f}x)"
+        )
+
+        page = options["page"]
+        # (이름, 쿼리셋을 받아 실행하는 함수) - 새 구조는 기본 쿼리셋(그래프 데이터를 미룸)과 with_graph()를 비교
+        queries = [
+            (f"list page ({page})", lambda qs: list(qs.filter(motion_type=motion_type).order_by("-recorded_at")[:page])),
+            ("scan all (iterator)", lambda qs: sum(recording.score for recording in qs.iterator(chunk_size=2000))),
+            ("aggregate (Avg)", lambda qs: qs.aggregate(Avg("score"))),
+        ]
+        self.stdout.write(f"{'query':<22} {'legacy json(ms)':>16} {'deferred(ms)':>13} {'with_graph(ms)':>16} {'speedup':>8}")
+        for name, query in queries:
+            legacy = self._best(lambda: query(legacy_model.objects.all()), options["repeat"])
+            deferred = self._best(lambda: query(UserRecording.objects.all()), options["repeat"])
+            with_graph = self._best(lambda: query(UserRecording.objects.with_graph()), options["repeat"])
+            self.stdout.write(
+                f"{name:<22} {legacy * 1000:>16.1f} {deferred * 1000:>13.1f} {with_graph * 1000:>16.1f} {legacy / deferred:>7.1f}x"
+            )
+
+        # 그래프 API처럼 한 건의 전체 시계열을 읽을 때 (JSON 파싱 vs 압축 해제)
+        legacy_id = legacy_model.objects.order_by("-id").values_list("id", flat=True).first()
+        recording_id = UserRecording.objects.order_by("-id").values_list("id", flat=True).first()
+        legacy = self._best(lambda: legacy_model.objects.get(pk=legacy_id).sensor_data_json, options["repeat"] * 20)
+        new = self._best(lambda: UserRecording.objects.with_graph().get(pk=recording_id).sensor_data_json, options["repeat"] * 20)
+        self.stdout.write(f"{'graph series (1 row)':<22} {legacy * 1000:>16.3f} {'-':>13} {new * 1000:>16.3f}")
+
+    def _best(self, func, repeat: int) -> float:
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - started)
+        return best
@@ -0,0 +1,102 @@
+# benchmarks/management/commands/bench_reference_memory.py
+
+import time
+import tracemalloc
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from ai.models import decode_sensor_array, encode_sensor_array
+from ai.safty_training_ai import MotionEvaluator, ReferenceArena, preprocess_sensor_data
+from benchmarks.fixtures import make_synthetic_frames
+
+# 비교하는 보관 방식: (이름, ReferenceArena 자료형. None이면 기존처럼 배열마다 따로 보관)
+MODES = [("list float64", None), ("arena float64", np.float64), ("arena float32", np.float32)]
+
+
+def _build_evaluators(blobs_by_motion: dict, dtype) -> dict:
+    """ DB에 저장된 것과 같은 .npy 바이트로 동작별 평가기를 만듦 (DB를 읽지 않음) """
+    evaluators = {}
+    for motion_name, blobs in blobs_by_motion.items():
+        if dtype is None:
+            # 기존 방식: 기록마다 bytearray로 복사한 float64 배열을 따로 보관
+            references = [decode_sensor_array(blob) for blob in blobs]
+        else:
+            references = ReferenceArena.pack([decode_sensor_array(blob, copy=False) for blob in blobs], dtype)
+        evaluators[motion_name] = MotionEvaluator(motion_name, references=references, use_pruning=False)
+    return evaluators
+
+
+class Command(BaseCommand):
+    help = (
+        "평가기의 모범 동작 보관 방식(배열별 float64 / 하나의 버퍼 float64 / 하나의 버퍼 float32)에 따른 "
+        "메모리 사용량, dtw 평가 시간, float32 점수 오차를 비교합니다. (DB를 사용하지 않음)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--motions", type=int, default=20, help="동작 수")
+        parser.add_argument("--references", type=int, default=10, help="동작별 모범 동작 기록 수")
+        parser.add_argument("--reference-frames", type=int, default=1000, help="모범 동작 기록 하나의 프레임 수")
+        parser.add_argument("--queries", type=int, default=10, help="동작마다 평가할 사용자 데이터 수")
+        parser.add_argument("--query-frames", type=int, default=300, help="사용자 데이터 하나의 프레임 수")
+
+    def handle(self, *args, **options):
+        blobs_by_motion = {
+            f"bench_memory_{m}": [
+                encode_sensor_array(preprocess_sensor_data(make_synthetic_frames(options["reference_frames"], seed=m * 1000 + r)))
+                for r in range(options["references"])
+            ]
+            for m in range(options["motions"])
+        }
+        queries = [
+            preprocess_sensor_data(make_synthetic_frames(options["query_frames"], seed=10**6 + q))
+            for q in range(options["queries"])
+        ]
+        self.stdout.write(
+            f"motions={options['motions']} references={options['references']} reference_frames={options['reference_frames']} "
+            f"queries={options['queries']} query_frames={options['query_frames']}"
+        )
+        self.stdout.write(
+            f"{'mode':<14} {'resident(MB)':>12} {'build peak(MB)':>14} {'build(ms)':>10} "
+            f"{'eval(ms)':>9} {'max |score diff|':>17} {'max dtw rel diff':>17}"
+        )
+
+        baseline_distances, max_dtw = None, None
+        for name, dtype in MODES:
+            tracemalloc.start()
+            started = time.perf_counter()
+            evaluators = _build_evaluators(blobs_by_motion, dtype)
+            build_ms = (time.perf_counter() - started) * 1000
+            resident, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            # 모든 동작 x 사용자 데이터의 모범 동작별 dtw 거리
+            started = time.perf_counter()
+            distances = {
+                (motion_name, q): np.asarray(evaluator.compute_dtw_distances(query))
+                for motion_name, evaluator in evaluators.items()
+                for q, query in enumerate(queries)
+            }
+            eval_ms = (time.perf_counter() - started) * 1000 / len(distances)
+
+            if baseline_distances is None:
+                baseline_distances = distances
+                # 점수가 0~100점에 고르게 퍼지도록 평균 거리 최대값의 1.2배를 정규화 기준으로 사용
+                max_dtw = {
+                    motion_name: 1.2 * max(distances[(motion_name, q)].mean() for q in range(len(queries)))
+                    for motion_name in evaluators
+                }
+
+            score_diff, relative_diff = 0.0, 0.0
+            for (motion_name, q), values in distances.items():
+                baseline = baseline_distances[(motion_name, q)]
+                relative_diff = max(relative_diff, float(np.max(np.abs(values - baseline) / baseline)))
+                score = evaluators[motion_name].evaluate_preprocessed(queries[q], max_dtw[motion_name])["score"]
+                baseline_score = 100 * (1 - min(baseline.mean() / max_dtw[motion_name], 1.0))
+                score_diff = max(score_diff, abs(score - baseline_score))
+
+            self.stdout.write(
+                f"{name:<14} {resident / 1024 / 1024:>12.2f} {peak / 1024 / 1024:>14.2f} {build_ms:>10.1f} "
+                f"{eval_ms:>9.2f} {score_diff:>17.2e} {relative_diff:>17.2e}"
+            )
+            del evaluators
@@ -0,0 +1,165 @@
+# benchmarks/management/commands/bench_warmup.py
+
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from ai.evaluator_cache import evaluator_cache, get_evaluator, warm_up_evaluators
+from ai.models import MotionRecording, MotionType
+from ai.safty_training_ai import preprocess_sensor_data
+from benchmarks.fixtures import bench_database, make_synthetic_frames
+
+# 측정 방식: (이름, 평가기를 fork 전에 미리 만드는지)
+MODES = [("cold", False), ("prewarm", True)]
+
+
+def _memory_kb(pid: int) -> dict:
+    """ /proc/<pid>/smaps_rollup의 Rss, Pss(공유 페이지는 나눠서 계산), Private(이 프로세스만 쓰는 페이지) (KB) """
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup", encoding="ascii") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":"):
+                values[parts[0][:-1]] = int(parts[1])
+    return {
+        "rss": values.get("Rss", 0),
+        "pss": values.get("Pss", 0),
+        "private": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0),
+    }
+
+
+def _worker(motion_types: list, user_data, ready_fd: int, exit_fd: int):
+    """ fork된 워커: 첫 평가 지연 시간을 재고, 모든 동작을 한 번씩 평가한 뒤 부모가 메모리를 잴 때까지 기다림 """
+    first = motion_types[0]
+    started = time.perf_counter()
+    evaluator = get_evaluator(first.motion_name, first.data_revision)
+    evaluator_ms = (time.perf_counter() - started) * 1000
+    evaluator.evaluate_preprocessed(user_data, first.max_dtw_distance)
+    first_ms = (time.perf_counter() - started) * 1000
+
+    # 모든 동작을 한 번씩 평가해서 워커가 오래 실행된 상태(모든 평가기 사용)를 만듦
+    for motion_type in motion_types:
+        get_evaluator(motion_type.motion_name, motion_type.data_revision).evaluate_preprocessed(user_data, motion_type.max_dtw_distance)
+
+    os.write(ready_fd, (json.dumps({"evaluator_ms": evaluator_ms, "first_ms": first_ms}) + "\n").encode())
+    os.read(exit_fd, 1)
+
+
+class Command(BaseCommand):
+    help = (
+        "워커 fork 전에 평가기를 미리 만들었을 때(AI_PREWARM_EVALUATORS)와 그렇지 않을 때의 "
+        "워커별 메모리(RSS/PSS/Private)와 첫 평가 지연 시간을 비교합니다. (Linux 전용, 임시 테스트 DB 사용)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--motions", type=int, default=20, help="동작 수")
+        parser.add_argument("--references", type=int, default=10, help="동작별 모범 동작 기록 수")
+        parser.add_argument("--reference-frames", type=int, default=1000, help="모범 동작 기록 하나의 프레임 수")
+        parser.add_argument("--workers", type=int, default=4, help="fork할 워커 수")
+
+    def handle(self, *args, **options):
+        if not hasattr(os, "fork") or not os.path.exists("/proc/self/smaps_rollup"):
+            raise CommandError("이 명령은 fork와 /proc/<pid>/smaps_rollup을 지원하는 Linux에서만 실행할 수 있습니다.")
+
+        # fork된 워커가 각자 DB에 연결해야 하므로 SQLite는 메모리 DB 대신 임시 파일 DB를 사용
+        with bench_database(sqlite_file="bench_warmup.sqlite3"):
+            self._run(options)
+
+    def _create_motions(self, options) -> list:
+        for m in range(options["motions"]):
+            motion_type = MotionType.objects.create(motion_name=f"bench_warmup_{m}", max_dtw_distance=100.0)
+            MotionRecording.objects.bulk_create([
+                MotionRecording(
+                    motion_type=motion_type,
+                    score_category="reference",
+                    data_frames=options["reference_frames"],
+                    sensor_data_json=[],
+                    sensor_data_npy=None,
+                )
+                for _ in range(options["references"])
+            ])
+            # bulk_create는 save()를 거치지 않으므로 하나씩 저장해서 바이너리 캐시(sensor_data_npy)를 만듦
+            for r, recording in enumerate(MotionRecording.objects.filter(motion_type=motion_type)):
+                recording.sensor_data_json = preprocess_sensor_data(
+                    make_synthetic_frames(options["reference_frames"], seed=m * 1000 + r)
+                ).tolist()
+                recording.save()
+        return list(MotionType.objects.filter(motion_name__startswith="bench_warmup_").order_by("motion_name"))
+
+    def _run(self, options):
+        motion_types = self._create_motions(options)
+        user_data = preprocess_sensor_data(make_synthetic_frames(300, seed=7))
+        reference_mb = options["motions"] * options["references"] * options["reference_frames"] * user_data.shape[1] * 8 / 1024 / 1024
+        self.stdout.write(
+            f"motions={options['motions']} references={options['references']} frames={options['reference_frames']} "
+            f"workers={options['workers']} (모범 동작 배열 약 {reference_mb:.1f}MB)"
+        )
+        self.stdout.write(
+            f"{'mode':<15} {'prefork(s)':>10} {'evaluator(ms)':>13} {'first(ms)':>10} {'rss(MB)':>9} {'pss(MB)':>9} {'private(MB)':>12}"
+        )
+
+        for name, prewarm in MODES:
+            evaluator_cache.clear()
+            started = time.perf_counter()
+            if prewarm:
+                warm_up_evaluators()
+            prefork_seconds = time.perf_counter() - started
+            # fork된 워커들이 부모의 DB 연결을 함께 쓰지 않도록 닫음 (prefork_warm_up()과 같음)
+            connections.close_all()
+
+            try:
+                results = self._fork_workers(options["workers"], motion_types, user_data)
+            finally:
+                evaluator_cache.clear()
+
+            average = lambda key: sum(result[key] for result in results) / len(results)
+            self.stdout.write(
+                f"{name:<15} {prefork_seconds:>10.2f} {average('evaluator_ms'):>13.2f} {average('first_ms'):>10.1f} {average('rss') / 1024:>9.1f} "
+                f"{average('pss') / 1024:>9.1f} {average('private') / 1024:>12.1f}"
+            )
+
+    def _fork_workers(self, num_workers: int, motion_types: list, user_data) -> list:
+        workers = []
+        for _ in range(num_workers):
+            ready_read, ready_write = os.pipe()
+            exit_read, exit_write = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                code = 0
+                try:
+                    os.close(ready_read)
+                    os.close(exit_write)
+                    # 먼저 만든 워커들의 파이프는 닫아야 그 워커들이 종료 신호(EOF)를 받음
+                    for _, other_ready, other_exit in workers:
+                        os.close(other_ready)
+                        os.close(other_exit)
+                    _worker(motion_types, user_data, ready_write, exit_read)
+                except BaseException:
+                    code = 1
+                finally:
+                    # 부모의 atexit 핸들러(테스트 DB 삭제 등)를 실행하지 않고 바로 종료
+                    os._exit(code)
+            os.close(ready_write)
+            os.close(exit_read)
+            workers.append((pid, ready_read, exit_write))
+
+        results = []
+        try:
+            # 모든 워커가 평가를 마치고 살아 있는 동안 메모리를 잼 (PSS는 함께 쓰는 페이지를 프로세스 수로 나눈 값)
+            for pid, ready_read, _ in workers:
+                with os.fdopen(ready_read, "rb") as f:
+                    line = f.readline()
+                if not line:
+                    raise CommandError(f"워커({pid})가 평가 중 실패했습니다.")
+                results.append({"pid": pid, **json.loads(line)})
+            for result in results:
+                result.update(_memory_kb(result["pid"]))
+        finally:
+            for _, _, exit_write in workers:
+                os.close(exit_write)
+            for pid, _, _ in workers:
+                os.waitpid(pid, 0)
+        return results
@@ -0,0 +1,59 @@
+# benchmarks/management/commands/bench_wire_format.py
+
+import base64
+import io
+import json
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+
+from ai.parsers import SensorFramesParser
+from ai.serializers import EvaluationRequestSerializer
+from benchmarks.fixtures import SENSOR_CHANNELS, make_synthetic_frames
+
+
+def _parse_and_validate(parser, body: bytes):
+    data = parser.parse(io.BytesIO(body))
+    serializer = EvaluationRequestSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+def _best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class Command(BaseCommand):
+    help = "/api/ai/evaluate/ 본문의 JSON 형식과 컬럼형 바이너리 형식의 전송 크기/파싱 시간을 비교합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--frames", type=int, nargs="+", default=[100, 1000, 10000])
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'frames':>8} {'format':>14} {'bytes':>10} {'parse+validate(ms)':>20}")
+        for num_frames in options["frames"]:
+            frames = make_synthetic_frames(num_frames)
+            matrix = np.array([[frame[c] for c in SENSOR_CHANNELS] for frame in frames], dtype="<f4")
+            meta = {"motionName": "bench", "empNo": "BENCH001"}
+
+            bodies = {
+                "json": (JSONParser(), json.dumps({**meta, "sensorData": frames}).encode()),
+                "json+base64": (JSONParser(), json.dumps({**meta, "sensorData": {
+                    "channels": SENSOR_CHANNELS,
+                    "dtype": "<f4",
+                    "data": base64.b64encode(matrix.tobytes()).decode(),
+                }}).encode()),
+                "binary": (SensorFramesParser(), json.dumps({**meta, "channels": SENSOR_CHANNELS}).encode() + b"\n" + matrix.tobytes()),
+            }
+
+            for name, (parser, body) in bodies.items():
+                elapsed = _best_of(lambda: _parse_and_validate(parser, body), options["repeat"])
+                self.stdout.write(f"{num_frames:>8} {name:>14} {len(body):>10} {elapsed * 1000:>20.3f}")
@@ -11,6 +11,11 @@ class CourseViewSet(ModelViewSet):
     - GET /api/courses/
     - POST /api/courses/
     """
-    queryset = Course.objects.select_related('motion_type').all().order_by('-created_at')
+    # 목록에는 동작 이름만 필요하므로 동작의 그래프용 JSON(모범 동작 시계열, 투영 축)은 읽지 않음
+    queryset = (
+        Course.objects.select_related('motion_type')
+        .defer('motion_type__projection_mean', 'motion_type__projection_axis', 'motion_type__reference_graph_series')
+        .order_by('-created_at')
+    )
     serializer_class = CourseSerializer
     permission_classes = [IsCompanySession] # 로그인한 회사 관리자만 접근 가능
\ No newline at end of file
@@ -1,3 +1,144 @@
+import uuid
+
 from django.test import TestCase
 
-# Create your tests here.
+from ai.logic import make_graph_preview
+from ai.models import MotionRecording, MotionType, UserRecording
+from courses.models import Course
+from organizations.models import Company, Employee
+
+from .models import Enrollment
+
+
+def _create_reference(motion_type, frames=40):
+    return MotionRecording.objects.create(
+        motion_type=motion_type,
+        data_frames=frames,
+        score_category="reference",
+        sensor_data_json=[[0.1 * i, 0.05 * i * i, 1.0] for i in range(frames)],
+    )
+
+
+def _create_user_recording(employee, motion_type, score, frames=60):
+    series = [float(score) + ((i * 7) % 11) * 0.1 for i in range(frames)]
+    return UserRecording.objects.create(
+        user=employee, motion_type=motion_type, score=score,
+        sensor_data_json=series, graph_preview=make_graph_preview(series, points=20),
+    )
+
+
+class LatestEvaluationGraphsTests(TestCase):
+    batch_url = "/api/enrollments/latest-evaluation-graphs/"
+
+    def setUp(self):
+        self.company = Company.objects.create(name="graphs", biz_no="5556677777")
+        session = self.client.session
+        session["company_id"] = str(self.company.pk)
+        session.save()
+
+        self.motion_types = [MotionType.objects.create(motion_name=f"graph_{i}") for i in range(2)]
+        for motion_type in self.motion_types:
+            _create_reference(motion_type)
+        self.courses = [
+            Course.objects.create(code=f"G{i}", title=f"graph {i}", motion_type=motion_type)
+            for i, motion_type in enumerate(self.motion_types)
+        ]
+        employees = [Employee.objects.create(company=self.company, emp_no=f"G{i}", name=f"graph {i}") for i in range(3)]
+
+        self.enrollments = [
+            Enrollment.objects.create(employee=employees[0], course=self.courses[0], status=Enrollment.Status.COMPLETED),
+            Enrollment.objects.create(employee=employees[1], course=self.courses[0], status=Enrollment.Status.ENROLLED),
+            Enrollment.objects.create(employee=employees[2], course=self.courses[1], status=Enrollment.Status.COMPLETED),
+        ]
+        _create_user_recording(employees[0], self.motion_types[0], 70.0)
+        _create_user_recording(employees[0], self.motion_types[0], 80.0)
+        _create_user_recording(employees[2], self.motion_types[1], 90.0)
+
+        # 다른 회사의 수강 정보는 조회되지 않아야 함
+        other = Company.objects.create(name="other", biz_no="5556688888")
+        other_employee = Employee.objects.create(company=other, emp_no="G0", name="other")
+        Enrollment.objects.create(employee=other_employee, course=self.courses[0])
+
+    def _single_url(self, enrollment_id):
+        return f"/api/enrollments/{enrollment_id}/latest-evaluation-graph/"
+
+    def _enrollment_ids(self, response):
+        self.assertEqual(response.status_code, 200, response.content)
+        return [item["enrollmentId"] for item in response.json()["results"]]
+
+    def test_lists_company_enrollments(self):
+        response = self.client.get(self.batch_url)
+        self.assertEqual(self._enrollment_ids(response), [enrollment.id for enrollment in self.enrollments])
+
+        results = response.json()["results"]
+        self.assertEqual(results[0]["score"], 80.0)
+        self.assertEqual(results[1]["error"], "사용자의 평가 기록을 찾을 수 없습니다.")
+        self.assertEqual(set(response.json()["referenceMotionGraphData"]), {"graph_0", "graph_1"})
+
+    def test_course_and_status_filters(self):
+        course_id = self.courses[0].id
+        response = self.client.get(self.batch_url, {"course": str(course_id)})
+        self.assertEqual(self._enrollment_ids(response), [self.enrollments[0].id, self.enrollments[1].id])
+
+        response = self.client.get(self.batch_url, {"status": Enrollment.Status.COMPLETED})
+        self.assertEqual(self._enrollment_ids(response), [self.enrollments[0].id, self.enrollments[2].id])
+
+        response = self.client.get(self.batch_url, {"course": str(course_id), "status": Enrollment.Status.ENROLLED})
+        self.assertEqual(self._enrollment_ids(response), [self.enrollments[1].id])
+
+        response = self.client.get(self.batch_url, {"course": str(uuid.uuid4())})
+        self.assertEqual(self._enrollment_ids(response), [])
+
+    def test_invalid_course_id(self):
+        response = self.client.get(self.batch_url, {"course": "not-a-uuid"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("course", response.json())
+
+    def test_points_below_three_rejected(self):
+        for points in ("2", "0", "-5", "many"):
+            for url in (self.batch_url, self._single_url(self.enrollments[0].id)):
+                response = self.client.get(url, {"points": points})
+                self.assertEqual(response.status_code, 400, (url, points))
+                self.assertIn("points", response.json())
+
+    def test_batch_item_matches_single_endpoint(self):
+        for params in ({}, {"points": "10"}, {"points": "100"}):
+            batch = self.client.get(self.batch_url, params).json()
+            for item in batch["results"]:
+                single = self.client.get(self._single_url(item["enrollmentId"]), params)
+                if "error" in item:
+                    self.assertEqual(single.status_code, 404)
+                    self.assertEqual(single.json()["error"], item["error"])
+                    continue
+
+                self.assertEqual(single.status_code, 200)
+                single = single.json()
+                motion_name = item["motionName"]
+                self.assertEqual(single["motionName"], motion_name)
+                for key in ("userName", "score", "userMotionGraphData", "projectionOutdated"):
+                    self.assertEqual(single[key], item[key], (params, key))
+                self.assertEqual(single["referenceMotionGraphData"], batch["referenceMotionGraphData"][motion_name])
+                if params:
+                    self.assertEqual(single["userMotionGraphIndex"], item["userMotionGraphIndex"])
+                    self.assertEqual(single["referenceMotionGraphIndex"], batch["referenceMotionGraphIndex"][motion_name])
+                else:
+                    self.assertNotIn("userMotionGraphIndex", item)
+
+    def test_points_downsample_user_and_reference_series(self):
+        url = self._single_url(self.enrollments[0].id)
+        full = self.client.get(url).json()
+        self.assertEqual(len(full["userMotionGraphData"]), 60)
+
+        # 10: 저장된 미리보기(20점)를 줄임, 40: 전체 시계열을 줄임, 100: 시계열보다 많으므로 그대로
+        for points in (10, 40, 100):
+            graph = self.client.get(url, {"points": str(points)}).json()
+            for kind in ("user", "reference"):
+                series = full[f"{kind}MotionGraphData"]
+                values, index = graph[f"{kind}MotionGraphData"], graph[f"{kind}MotionGraphIndex"]
+                if points >= len(series):
+                    self.assertEqual(values, series)
+                    self.assertEqual(index, list(range(len(series))))
+                    continue
+                self.assertEqual(len(values), points)
+                self.assertEqual((index[0], index[-1]), (0, len(series) - 1))
+                self.assertEqual(values, [series[i] for i in index])
@@ -1,5 +1,7 @@
 # enrollments/views.py
 
+import uuid
+
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.response import Response
 from rest_framework import status, serializers
@@ -9,14 +11,28 @@ from organizations.views import IsCompanySession
 from organizations.models import Employee
 from .models import Enrollment
 from .serializers import EnrollmentSerializer, EnrollmentDetailSerializer
-from ai.logic import get_evaluation_graph_data
+from ai.logic import get_evaluation_graph_data, get_evaluation_graph_data_batch
+
+def _parse_graph_points(request):
+    """ 그래프 시계열을 줄일 점 개수(?points=) 쿼리 파라미터. 없으면 None(전체 시계열) """
+    points = request.query_params.get('points')
+    if points is None:
+        return None
+    try:
+        points = int(points)
+    except ValueError:
+        points = 0
+    if points < 3:
+        raise serializers.ValidationError({"points": "points는 3 이상의 정수여야 합니다."})
+    return points
 
 class EnrollmentViewSet(ModelViewSet):
     """
     수강(Enrollment) 정보를 관리하는 API
     - GET /api/enrollments/
     - POST /api/enrollments/
-    - GET /api/enrollments/{id}/latest-evaluation-graph/
+    - GET /api/enrollments/{id}/latest-evaluation-graph/?points={n}
+    - GET /api/enrollments/latest-evaluation-graphs/?course={courseId}&points={n}
     """
     queryset = Enrollment.objects.all()
     permission_classes = [IsCompanySession]
@@ -46,9 +62,25 @@ class EnrollmentViewSet(ModelViewSet):
     def latest_evaluation_graph(self, request, pk=None):
         """ 가장 최근의 평가 기록을 그래프용 데이터로 가공하여 반환 """
         enrollment = self.get_object()
-        graph_data = get_evaluation_graph_data(enrollment.id)
+        graph_data = get_evaluation_graph_data(enrollment.id, points=_parse_graph_points(request))
 
         if "error" in graph_data:
             return Response(graph_data, status=status.HTTP_404_NOT_FOUND)
         
         return Response(graph_data)
+
+    @action(detail=False, methods=['get'], url_path='latest-evaluation-graphs')
+    def latest_evaluation_graphs(self, request):
+        """ 교육 과정(course) 또는 필터에 해당하는 수강생 전체의 최근 평가 그래프 데이터를 한 번에 반환 """
+        enrollments = self.get_queryset()
+        course_id = request.query_params.get('course')
+        if course_id:
+            try:
+                enrollments = enrollments.filter(course_id=uuid.UUID(course_id))
+            except ValueError:
+                return Response({"course": "올바른 교육 과정 ID가 아닙니다."}, status=status.HTTP_400_BAD_REQUEST)
+        enrollment_status = request.query_params.get('status')
+        if enrollment_status:
+            enrollments = enrollments.filter(status=enrollment_status)
+
+        return Response(get_evaluation_graph_data_batch(enrollments, points=_parse_graph_points(request)))
@@ -0,0 +1,152 @@
+# organizations/bulk.py
+import codecs
+import csv
+import io
+from itertools import islice
+
+from django.db import connection, transaction
+
+from .models import Employee
+
+# 엑셀/CSV 한 행에서 읽는 직원 필드 (emp_no는 필수, 나머지는 비어 있으면 "")
+EMPLOYEE_FIELDS = ["emp_no", "name", "dept", "phone", "email"]
+# 한 번에 INSERT/UPDATE 하는 행 수
+BULK_CHUNK_SIZE = 1000
+
+
+# 한국어 Windows 엑셀에서 "CSV (쉼표로 분리)"로 저장한 파일의 인코딩 (UTF-8로 읽을 수 없을 때 사용)
+CSV_FALLBACK_ENCODING = "cp949"
+# 인코딩을 확인할 때 한 번에 읽는 크기
+CSV_DETECT_BLOCK_SIZE = 64 * 1024
+
+
+class EmployeeFileError(ValueError):
+    """ 업로드한 직원 파일을 읽을 수 없을 때 발생 """
+
+
+def _detect_csv_encoding(file) -> str:
+    """ 파일 전체가 UTF-8이면 "utf-8-sig"(엑셀에서 저장한 CSV의 BOM 제거), 아니면 cp949. 블록 단위로 확인하고 처음 위치로 되돌림 """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        for block in iter(lambda: file.read(CSV_DETECT_BLOCK_SIZE), b""):
+            decoder.decode(block)
+        decoder.decode(b"", final=True)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return CSV_FALLBACK_ENCODING
+    finally:
+        file.seek(0)
+
+
+def iter_employee_rows_from_csv(file):
+    """ 업로드된 CSV 파일(헤더: emp_no,name,dept,phone,email)을 한 행씩 읽어서 딕셔너리로 반환 (파일 전체를 메모리에 올리지 않음) """
+    encoding = _detect_csv_encoding(file)
+    text = io.TextIOWrapper(file, encoding=encoding, newline="")
+    try:
+        reader = csv.DictReader(text)
+        if not reader.fieldnames or "emp_no" not in [name.strip() for name in reader.fieldnames]:
+            raise EmployeeFileError("CSV 첫 줄에 emp_no 열이 있어야 합니다.")
+        for row in reader:
+            yield {(key or "").strip(): value for key, value in row.items()}
+    except UnicodeDecodeError:
+        raise EmployeeFileError("CSV 파일의 인코딩을 읽을 수 없습니다. UTF-8 또는 CP949(엑셀 기본)로 저장해 주세요.")
+    except csv.Error as e:
+        raise EmployeeFileError(f"CSV 파일을 읽을 수 없습니다: {e}")
+
+
+def iter_employee_rows_from_xlsx(file):
+    """ 업로드된 XLSX 파일의 첫 시트(첫 행: 헤더)를 한 행씩 읽어서 딕셔너리로 반환 (read_only 모드로 스트리밍) """
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise EmployeeFileError("XLSX 업로드에는 openpyxl 패키지가 필요합니다.")
+
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except Exception as e:
+        raise EmployeeFileError(f"XLSX 파일을 읽을 수 없습니다: {e}")
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(value).strip() if value is not None else "" for value in next(rows, ())]
+        if "emp_no" not in header:
+            raise EmployeeFileError("XLSX 첫 행에 emp_no 열이 있어야 합니다.")
+        for values in rows:
+            yield {key: value for key, value in zip(header, values) if key}
+    finally:
+        workbook.close()
+
+
+def _text(value) -> str:
+    if value is None:
+        return ""
+    # 엑셀에서 숫자로 저장된 값(예: 사번 1001.0)을 문자열로 맞춤
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def _upsert_chunk(employees: list, existing_ids: dict):
+    """ 한 묶음의 직원을 (company, emp_no) 기준으로 INSERT 또는 UPDATE """
+    update_fields = ["name", "dept", "phone", "email"]
+    if connection.features.supports_update_conflicts:
+        # INSERT ... ON CONFLICT/ON DUPLICATE KEY UPDATE 한 문장으로 처리 (MySQL은 충돌 대상 지정을 지원하지 않음)
+        # 기존 직원은 (company, emp_no) 충돌로 UPDATE 되므로 id는 바뀌지 않음
+        unique_fields = ["company", "emp_no"] if connection.features.supports_update_conflicts_with_target else None
+        Employee.objects.bulk_create(employees, update_conflicts=True, unique_fields=unique_fields, update_fields=update_fields)
+        return
+
+    to_create, to_update = [], []
+    for employee in employees:
+        if employee.emp_no in existing_ids:
+            employee.pk = existing_ids[employee.emp_no]
+            to_update.append(employee)
+        else:
+            to_create.append(employee)
+    Employee.objects.bulk_create(to_create)
+    Employee.objects.bulk_update(to_update, update_fields)
+
+
+def upsert_employees(company_id, rows, chunk_size: int = BULK_CHUNK_SIZE) -> dict:
+    """
+    직원 행(딕셔너리) 목록/이터레이터를 (company, emp_no) 기준으로 upsert하고 {"created", "updated", "count"}를 반환
+    - 기존 사번은 쿼리 한 번으로 미리 조회하고, chunk_size 행씩 묶어서 한 문장으로 INSERT/UPDATE
+    - 전체가 하나의 트랜잭션으로 처리됨 (중간에 실패하면 모두 취소)
+    - update_or_create를 행마다 호출하던 기존 동작과 같은 결과: emp_no가 빈 행은 건너뛰고, 같은 사번이 여러 번 나오면 마지막 값이 남음
+    """
+    created, updated, count = 0, 0, 0
+    rows = iter(rows)
+    with transaction.atomic():
+        existing_ids = dict(Employee.objects.filter(company_id=company_id).values_list("emp_no", "id"))
+        seen = set()
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            count += len(chunk)
+
+            # 묶음 안에서 같은 사번은 마지막 행만 남김
+            employees = {}
+            for row in chunk:
+                emp_no = _text(row.get("emp_no")).strip()
+                if not emp_no:
+                    continue
+                if emp_no in existing_ids or emp_no in seen:
+                    updated += 1
+                else:
+                    created += 1
+                    seen.add(emp_no)
+
+                employee = Employee(
+                    company_id=company_id,
+                    emp_no=emp_no,
+                    **{field: _text(row.get(field)) for field in EMPLOYEE_FIELDS if field != "emp_no"},
+                )
+                employees[emp_no] = employee
+
+            if employees:
+                _upsert_chunk(list(employees.values()), existing_ids)
+                # 다음 묶음에 같은 사번이 다시 나오면 UPDATE 되도록 새로 만든 직원도 기존 사번으로 기록
+                for emp_no, employee in employees.items():
+                    existing_ids.setdefault(emp_no, employee.pk)
+
+    return {"created": created, "updated": updated, "count": count}
@@ -1,3 +1,50 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
 
-# Create your tests here.
+from .bulk import EmployeeFileError, iter_employee_rows_from_csv
+from .models import Company, Employee
+
+
+def _csv_upload(text: str, encoding: str, name: str = "employees.csv"):
+    return SimpleUploadedFile(name, text.encode(encoding), content_type="text/csv")
+
+
+class EmployeeCsvTests(TestCase):
+    csv_text = "emp_no,name,dept\r\nE001,홍길동,개발\r\nE002,김철수,안전\r\n"
+
+    def test_reads_utf8_with_bom(self):
+        rows = list(iter_employee_rows_from_csv(_csv_upload(self.csv_text, "utf-8-sig")))
+        self.assertEqual([row["name"] for row in rows], ["홍길동", "김철수"])
+
+    def test_falls_back_to_cp949(self):
+        # 한국어 Windows 엑셀에서 "CSV (쉼표로 분리)"로 저장한 파일
+        rows = list(iter_employee_rows_from_csv(_csv_upload(self.csv_text, "cp949")))
+        self.assertEqual([(row["emp_no"], row["dept"]) for row in rows], [("E001", "개발"), ("E002", "안전")])
+
+    def test_undecodable_file_raises_employee_file_error(self):
+        upload = SimpleUploadedFile("employees.csv", b"emp_no,name\r\nE001,\xff\xff\r\n", content_type="text/csv")
+        with self.assertRaises(EmployeeFileError):
+            list(iter_employee_rows_from_csv(upload))
+
+
+class EmployeeBulkUploadTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="bulk", biz_no="3334455555")
+        session = self.client.session
+        session["company_id"] = str(self.company.pk)
+        session.save()
+
+    def _upload(self, upload):
+        return self.client.post("/api/org/employees/bulk/", {"file": upload})
+
+    def test_cp949_csv_upload(self):
+        response = self._upload(_csv_upload("emp_no,name\r\nE001,홍길동\r\n", "cp949"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Employee.objects.get(company=self.company, emp_no="E001").name, "홍길동")
+
+    def test_undecodable_csv_upload_returns_400(self):
+        response = self._upload(SimpleUploadedFile("employees.csv", b"emp_no,name\r\nE001,\xff\xff\r\n"))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Employee.objects.filter(company=self.company).exists())
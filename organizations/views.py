@@ -5,6 +5,7 @@ from rest_framework.decorators import action
 from rest_framework.permissions import BasePermission, AllowAny
 
 from .models import Company, Employee
+from .bulk import EmployeeFileError, iter_employee_rows_from_csv, iter_employee_rows_from_xlsx, upsert_employees
 from .serializers import (
     CompanyCreateSerializer, CompanySerializer,
     EmployeeSerializer
@@ -69,35 +70,32 @@ class EmployeeViewSet(ModelViewSet):
             ...
           ]
         }
+        또는 multipart/form-data의 file 필드로 CSV/XLSX 파일 업로드 (첫 행 헤더: emp_no,name,dept,phone,email)
         - (company, emp_no) 기준 upsert
+        - 기존 사번은 한 번에 조회하고, 여러 행을 묶어서 한 번에 INSERT/UPDATE (전체가 하나의 트랜잭션)
         """
         cid = request.session.get("company_id")
         if not cid:
             return Response({"detail": "Unauthorized"}, status=401)
 
-        rows = request.data.get("employees", [])
-        if not isinstance(rows, list):
-            return Response({"detail": "employees must be a list"}, status=400)
+        upload = request.FILES.get("file")
+        if upload is not None:
+            # 파일은 한 행씩 읽어서 처리하므로 큰 파일도 전체를 메모리에 올리지 않음
+            name = (upload.name or "").lower()
+            if name.endswith(".xlsx"):
+                rows = iter_employee_rows_from_xlsx(upload)
+            elif name.endswith(".csv"):
+                rows = iter_employee_rows_from_csv(upload)
+            else:
+                return Response({"detail": "file must be .csv or .xlsx"}, status=400)
+        else:
+            rows = request.data.get("employees", [])
+            if not isinstance(rows, list):
+                return Response({"detail": "employees must be a list"}, status=400)
 
-        created, updated = 0, 0
-        for r in rows:
-            emp_no = (r.get("emp_no") or "").strip()
-            if not emp_no:
-                continue
-            defaults = {
-                "name":  r.get("name", "") or "",
-                "dept":  r.get("dept", "") or "",
-                "phone": r.get("phone", "") or "",
-                "email": r.get("email", "") or "",
-            }
+        try:
+            result = upsert_employees(cid, rows)
+        except EmployeeFileError as e:
+            return Response({"detail": str(e)}, status=400)
 
-            # was_created: 새로운 직원이 생성되었으면 True, 업데이트 되었으면 False
-            obj, was_created = Employee.objects.update_or_create(
-                company_id=cid, emp_no=emp_no, defaults=defaults
-            )
-
-            # 결과 집계
-            created += 1 if was_created else 0
-            updated += 0 if was_created else 1
-
-        return Response({"ok": True, "created": created, "updated": updated, "count": len(rows)})
+        return Response({"ok": True, **result})